@@ -0,0 +1,85 @@
+"""Per-username and client throttling of failed login attempts."""
+from collections import deque
+from typing import Dict, Tuple
+import time
+
+
+class LoginThrottle:
+    """
+    Sliding-window limit on failed login attempts per (username, client IP).
+
+    Attempts are checked before any password hashing, so a guessing storm against one
+    account is turned away without costing bcrypt time. An attempt is counted when it
+    starts, so concurrent guesses cannot all slip past the check; a successful login
+    clears its key, and an attempt that was never evaluated is refunded. Keying on the
+    client IP as well keeps one client's failures from locking the account owner out.
+    """
+
+    def __init__(self, max_attempts: int, window_seconds: int, max_tracked: int = 100000):
+        """Initialize throttle. max_attempts of 0 disables it."""
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self.max_tracked = max_tracked
+        self._attempts: Dict[Tuple[str, str], deque] = {}
+
+        # Statistics
+        self.allowed = 0
+        self.throttled = 0
+        self.resets = 0
+
+    def _prune(self, now: float):
+        """Forget keys with no attempts inside the window."""
+        cutoff = now - self.window_seconds
+        for key in [k for k, attempts in self._attempts.items() if not attempts or attempts[-1] <= cutoff]:
+            del self._attempts[key]
+
+    def hit(self, username: str, client_ip: str) -> float:
+        """
+        Record a login attempt.
+
+        Returns 0 if the attempt may proceed, otherwise the seconds until the next
+        attempt for this username from this client is allowed.
+        """
+        if self.max_attempts <= 0:
+            return 0.0
+
+        now = time.monotonic()
+        key = (username, client_ip)
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            if len(self._attempts) >= self.max_tracked:
+                self._prune(now)
+            attempts = self._attempts[key] = deque()
+
+        while attempts and attempts[0] <= now - self.window_seconds:
+            attempts.popleft()
+
+        if len(attempts) >= self.max_attempts:
+            self.throttled += 1
+            return attempts[0] + self.window_seconds - now
+
+        attempts.append(now)
+        self.allowed += 1
+        return 0.0
+
+    def reset(self, username: str, client_ip: str):
+        """Clear the attempts of a key after a successful login."""
+        if self._attempts.pop((username, client_ip), None) is not None:
+            self.resets += 1
+
+    def refund(self, username: str, client_ip: str):
+        """Take back an attempt that was never evaluated (e.g. the hasher was busy)."""
+        attempts = self._attempts.get((username, client_ip))
+        if attempts:
+            attempts.pop()
+
+    def get_stats(self) -> dict:
+        """Get throttle statistics."""
+        return {
+            "max_attempts": self.max_attempts,
+            "window_seconds": self.window_seconds,
+            "tracked_keys": len(self._attempts),
+            "allowed": self.allowed,
+            "throttled": self.throttled,
+            "resets": self.resets
+        }
@@ -0,0 +1,105 @@
+"""Password hashing in a bounded worker pool, off the event loop."""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+import asyncio
+import time
+from passlib.context import CryptContext
+
+
+class HasherBusyError(Exception):
+    """Raised when too many hash operations are already waiting for a worker."""
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification in a fixed-size thread pool.
+
+    bcrypt releases the GIL while hashing, so at most `workers` hashes run in parallel
+    while the event loop keeps serving streams. Once `max_queue` operations are waiting
+    for a worker, new ones fail fast with HasherBusyError instead of queueing without
+    bound.
+    """
+
+    def __init__(self, pwd_context: CryptContext, workers: int, max_queue: int):
+        """Initialize hasher with its pool size and queue bound."""
+        self.pwd_context = pwd_context
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+        self.pending = 0  # Submitted and not yet finished (running + queued)
+
+        # Statistics
+        self.hashes = 0
+        self.verifications = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self._wait_ms: deque = deque(maxlen=1000)
+        self._run_ms: deque = deque(maxlen=1000)
+
+    @property
+    def queue_depth(self) -> int:
+        """Operations waiting for a free worker."""
+        return max(0, self.pending - self.workers)
+
+    async def _run(self, fn, *args):
+        if self.queue_depth >= self.max_queue:
+            self.rejected += 1
+            raise HasherBusyError("Password hashing queue is full")
+
+        def timed():
+            started = time.perf_counter()
+            result = fn(*args)
+            return result, started, time.perf_counter()
+
+        self.pending += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        submitted = time.perf_counter()
+        try:
+            result, started, finished = await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        finally:
+            self.pending -= 1
+
+        self._wait_ms.append((started - submitted) * 1000)
+        self._run_ms.append((finished - started) * 1000)
+        return result
+
+    async def hash(self, password: str) -> str:
+        """Hash a password in the worker pool."""
+        self.hashes += 1
+        return await self._run(self.pwd_context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash in the worker pool."""
+        self.verifications += 1
+        return await self._run(self.pwd_context.verify, plain_password, hashed_password)
+
+    def get_stats(self) -> dict:
+        """Get pool and queueing statistics."""
+        wait_ms = sorted(self._wait_ms)
+        run_ms = sorted(self._run_ms)
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "running": min(self.pending, self.workers),
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "hashes": self.hashes,
+            "verifications": self.verifications,
+            "rejected": self.rejected,
+            "wait_p50_ms": round(_percentile(wait_ms, 50), 2),
+            "wait_p95_ms": round(_percentile(wait_ms, 95), 2),
+            "hash_p50_ms": round(_percentile(run_ms, 50), 2),
+            "hash_p95_ms": round(_percentile(run_ms, 95), 2)
+        }
+
+    def shutdown(self):
+        """Stop the worker threads."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
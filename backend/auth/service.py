@@ -5,8 +5,14 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from schemas.auth import User as UserSchema, TokenPayload, LoginResponse
 from config import settings
-from database import get_db, SessionLocal
+from sqlalchemy import select, update
+from database import SessionLocal, AsyncSessionLocal
 from database.models import User as UserModel
+from auth.password_hasher import PasswordHasher
+from auth.login_throttle import LoginThrottle
+from auth.token_cache import VerifiedTokenCache, RevocationList
+import hashlib
+import time
 import uuid
 
 
@@ -16,6 +22,10 @@ class AuthService:
     def __init__(self):
         """Initialize authentication service."""
         self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.hasher = PasswordHasher(self.pwd_context, settings.AUTH_HASH_WORKERS, settings.AUTH_HASH_MAX_QUEUE)
+        self.login_throttle = LoginThrottle(settings.AUTH_LOGIN_MAX_ATTEMPTS, settings.AUTH_LOGIN_WINDOW_SECONDS)
+        self.token_cache = VerifiedTokenCache(settings.AUTH_TOKEN_CACHE_SIZE)
+        self.revocations = RevocationList(settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
         self._initialize_default_users()
 
     def _initialize_default_users(self):
@@ -47,32 +57,36 @@ class AuthService:
             db.close()
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        """Verify a password against its hash."""
+        """Verify a password against its hash (blocking; use hasher.verify from async code)."""
         return self.pwd_context.verify(plain_password, hashed_password)
 
     def get_password_hash(self, password: str) -> str:
-        """Generate password hash."""
+        """Generate password hash (blocking; use hasher.hash from async code)."""
         return self.pwd_context.hash(password)
 
-    def authenticate_user(self, username: str, password: str) -> Optional[UserSchema]:
+    async def authenticate_user(self, username: str, password: str) -> Optional[UserSchema]:
         """Authenticate a user by username and password."""
-        db = SessionLocal()
-        try:
-            user_model = db.query(UserModel).filter(UserModel.username == username).first()
+        async with AsyncSessionLocal() as db:
+            user_model = await db.scalar(select(UserModel).where(UserModel.username == username))
             if not user_model:
                 return None
-            if not self.verify_password(password, user_model.password_hash):
-                return None
 
             # Convert to schema
-            return UserSchema(
+            user = UserSchema(
                 user_id=user_model.user_id,
                 username=user_model.username,
                 password_hash=user_model.password_hash,
                 is_admin=user_model.is_admin
             )
-        finally:
-            db.close()
+
+        # Accounts imported without a password hash cannot log in
+        if not self.pwd_context.identify(user.password_hash, required=False):
+            return None
+
+        # Hash outside the session, so no pooled connection is held while bcrypt runs
+        if not await self.hasher.verify(password, user.password_hash):
+            return None
+        return user
 
     def create_access_token(self, user: UserSchema) -> str:
         """Create JWT access token for authenticated user."""
@@ -81,7 +95,8 @@ class AuthService:
             sub=user.user_id,
             username=user.username,
             is_admin=user.is_admin,
-            exp=int(expire.timestamp())
+            exp=int(expire.timestamp()),
+            iat=time.time()
         )
         token = jwt.encode(
             payload.model_dump(),
@@ -90,22 +105,37 @@ class AuthService:
         )
         return token
 
+    @staticmethod
+    def _token_hash(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
     def verify_token(self, token: str) -> Optional[TokenPayload]:
-        """Verify and decode JWT token."""
-        try:
-            payload = jwt.decode(
-                token,
-                settings.SECRET_KEY,
-                algorithms=[settings.ALGORITHM]
-            )
-            token_data = TokenPayload(**payload)
-            return token_data
-        except JWTError:
+        """Verify and decode JWT token, reusing earlier verifications until exp."""
+        token_hash = self._token_hash(token)
+        token_data = self.token_cache.get(token_hash)
+        if token_data is None:
+            try:
+                payload = jwt.decode(
+                    token,
+                    settings.SECRET_KEY,
+                    algorithms=[settings.ALGORITHM]
+                )
+                token_data = TokenPayload(**payload)
+            except JWTError:
+                return None
+            self.token_cache.put(token_hash, token_data)
+
+        if self.revocations.is_revoked(token_hash, token_data):
             return None
+        return token_data
+
+    def logout(self, token: str, token_data: TokenPayload):
+        """Revoke a token so it is rejected on every replica."""
+        self.revocations.revoke_token(self._token_hash(token), token_data.exp)
 
-    def login(self, username: str, password: str) -> Optional[LoginResponse]:
+    async def login(self, username: str, password: str) -> Optional[LoginResponse]:
         """Process user login and return access token."""
-        user = self.authenticate_user(username, password)
+        user = await self.authenticate_user(username, password)
         if not user:
             return None
 
@@ -118,11 +148,10 @@ class AuthService:
             is_admin=user.is_admin
         )
 
-    def get_user_by_id(self, user_id: str) -> Optional[UserSchema]:
+    async def get_user_by_id(self, user_id: str) -> Optional[UserSchema]:
         """Get user by user_id."""
-        db = SessionLocal()
-        try:
-            user_model = db.query(UserModel).filter(UserModel.user_id == user_id).first()
+        async with AsyncSessionLocal() as db:
+            user_model = await db.get(UserModel, user_id)
             if not user_model:
                 return None
 
@@ -133,70 +162,90 @@ class AuthService:
                 password_hash=user_model.password_hash,
                 is_admin=user_model.is_admin
             )
-        finally:
-            db.close()
 
-    def register_user(self, username: str, password: str) -> Optional[LoginResponse]:
+    async def register_user(self, username: str, password: str) -> Optional[LoginResponse]:
         """Register a new user."""
-        db = SessionLocal()
-        try:
+        async with AsyncSessionLocal() as db:
             # Check if username already exists
-            existing_user = db.query(UserModel).filter(UserModel.username == username).first()
+            existing_user = await db.scalar(select(UserModel.user_id).where(UserModel.username == username))
             if existing_user:
                 return None  # Username already taken
 
-            # Create new user
-            new_user = UserModel(
-                user_id=str(uuid.uuid4()),
-                username=username,
-                password_hash=self.get_password_hash(password),
-                is_admin=False  # New users are not admin by default
-            )
-            db.add(new_user)
-            db.commit()
-            db.refresh(new_user)
+        password_hash = await self.hasher.hash(password)
 
-            # Convert to schema
-            user_schema = UserSchema(
-                user_id=new_user.user_id,
-                username=new_user.username,
-                password_hash=new_user.password_hash,
-                is_admin=new_user.is_admin
-            )
+        async with AsyncSessionLocal() as db:
+            try:
+                # Create new user (the unique constraint catches a concurrent registration)
+                new_user = UserModel(
+                    user_id=str(uuid.uuid4()),
+                    username=username,
+                    password_hash=password_hash,
+                    is_admin=False  # New users are not admin by default
+                )
+                db.add(new_user)
+                await db.commit()
+
+                # Convert to schema
+                user_schema = UserSchema(
+                    user_id=new_user.user_id,
+                    username=new_user.username,
+                    password_hash=new_user.password_hash,
+                    is_admin=new_user.is_admin
+                )
+            except Exception as e:
+                await db.rollback()
+                return None
 
-            # Auto-login: generate token
-            access_token = self.create_access_token(user_schema)
-            return LoginResponse(
-                access_token=access_token,
-                token_type="bearer",
-                user_id=user_schema.user_id,
-                username=user_schema.username,
-                is_admin=user_schema.is_admin
-            )
-        except Exception as e:
-            db.rollback()
-            return None
-        finally:
-            db.close()
+        # Auto-login: generate token
+        access_token = self.create_access_token(user_schema)
+        return LoginResponse(
+            access_token=access_token,
+            token_type="bearer",
+            user_id=user_schema.user_id,
+            username=user_schema.username,
+            is_admin=user_schema.is_admin
+        )
 
-    def change_password(self, user_id: str, old_password: str, new_password: str) -> bool:
+    async def change_password(self, user_id: str, old_password: str, new_password: str) -> bool:
         """Change user password."""
-        db = SessionLocal()
-        try:
-            user_model = db.query(UserModel).filter(UserModel.user_id == user_id).first()
-            if not user_model:
+        async with AsyncSessionLocal() as db:
+            old_hash = await db.scalar(select(UserModel.password_hash).where(UserModel.user_id == user_id))
+            if old_hash is None:
                 return False
 
-            # Verify old password
-            if not self.verify_password(old_password, user_model.password_hash):
+        # Verify old password
+        if not await self.hasher.verify(old_password, old_hash):
+            return False
+        new_hash = await self.hasher.hash(new_password)
+
+        async with AsyncSessionLocal() as db:
+            try:
+                # Update password, unless it changed while hashing
+                updated = (await db.execute(
+                    update(UserModel)
+                    .where(UserModel.user_id == user_id, UserModel.password_hash == old_hash)
+                    .values(password_hash=new_hash)
+                )).rowcount
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
                 return False
 
-            # Update password
-            user_model.password_hash = self.get_password_hash(new_password)
-            db.commit()
-            return True
-        except Exception as e:
-            db.rollback()
-            return False
-        finally:
-            db.close()
+        if updated == 1:
+            # Tokens issued with the old password stop working immediately
+            self.revocations.revoke_user(user_id, time.time())
+        return updated == 1
+
+    def get_stats(self) -> dict:
+        """Get password hashing, login throttling and token verification statistics."""
+        return {
+            "hasher": self.hasher.get_stats(),
+            "login_throttle": self.login_throttle.get_stats(),
+            "token_cache": self.token_cache.get_stats(),
+            "revocations": self.revocations.get_stats()
+        }
+
+    def shutdown(self):
+        """Stop the password hashing workers and the revocation listener."""
+        self.hasher.shutdown()
+        self.revocations.stop()
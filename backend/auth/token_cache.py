@@ -0,0 +1,212 @@
+"""Cache of verified JWTs and the token revocation list shared through Redis."""
+from collections import OrderedDict
+from typing import Dict, Optional
+import threading
+import time
+from config import settings
+from schemas.auth import TokenPayload
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+REVOKED_TOKEN_PREFIX = "auth:revoked:"
+REVOKED_USER_PREFIX = "auth:revoked_user:"
+REVOCATION_CHANNEL = "auth:revocations"
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of decoded token payloads keyed by token hash.
+
+    Entries are only served until the token's exp, so a hit never outlives the JWT
+    itself. Revocation is checked separately on every request.
+    """
+
+    def __init__(self, max_entries: int):
+        """Initialize cache holding at most max_entries tokens (0 disables it)."""
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, TokenPayload] = OrderedDict()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token_hash: str) -> Optional[TokenPayload]:
+        """Return the cached payload of an unexpired token."""
+        payload = self._entries.get(token_hash)
+        if payload is None:
+            self.misses += 1
+            return None
+        if payload.exp <= time.time():
+            del self._entries[token_hash]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token_hash)
+        self.hits += 1
+        return payload
+
+    def put(self, token_hash: str, payload: TokenPayload):
+        """Cache a verified payload, evicting the least recently used token if full."""
+        if self.max_entries <= 0:
+            return
+        self._entries[token_hash] = payload
+        self._entries.move_to_end(token_hash)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_stats(self) -> dict:
+        """Get cache statistics."""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total * 100, 2) if total > 0 else 0.0
+        }
+
+
+class RevocationList:
+    """
+    Revoked tokens and per-user revocation cutoffs, checked in memory.
+
+    Revoking a token (logout) or all of a user's tokens issued before a point in time
+    (password change) updates the local sets, stores a Redis key that expires with the
+    tokens it covers, and publishes the change so other replicas apply it at once. A
+    listener thread applies published changes and reloads the keys after reconnecting.
+    Without Redis, revocations are local to this process.
+    """
+
+    def __init__(self, token_lifetime_seconds: int):
+        """Initialize revocation list, connecting to Redis if available."""
+        self.token_lifetime = token_lifetime_seconds
+        self.revoked_tokens: Dict[str, float] = {}  # token hash -> exp
+        self.user_cutoffs: Dict[str, float] = {}  # user_id -> tokens issued before this are revoked
+        self.redis_client = None
+        self._lock = threading.Lock()  # Guards updates from the listener thread
+        self._listener: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+        # Statistics
+        self.revocations = 0
+        self.rejected = 0
+
+        if REDIS_AVAILABLE:
+            try:
+                self.redis_client = redis.Redis(
+                    host=settings.REDIS_HOST,
+                    port=settings.REDIS_PORT,
+                    db=settings.REDIS_DB,
+                    password=settings.REDIS_PASSWORD,
+                    decode_responses=True,
+                    socket_connect_timeout=5
+                )
+                self.redis_client.ping()
+                self._load()
+                print("✓ Token revocations shared through Redis")
+            except Exception as e:
+                print(f"⚠ Redis unavailable for token revocations ({e}). Revocations are local to this process.")
+                self.redis_client = None
+
+    def is_revoked(self, token_hash: str, payload: TokenPayload) -> bool:
+        """Whether a verified token has been revoked."""
+        cutoff = self.user_cutoffs.get(payload.sub)
+        revoked = token_hash in self.revoked_tokens or (cutoff is not None and (payload.iat or 0) < cutoff)
+        if revoked:
+            self.rejected += 1
+        return revoked
+
+    def revoke_token(self, token_hash: str, exp: float):
+        """Revoke one token until it expires."""
+        self._apply_token(token_hash, exp)
+        self.revocations += 1
+        ttl = int(exp - time.time()) + 1
+        if ttl > 0:
+            self._publish(f"{REVOKED_TOKEN_PREFIX}{token_hash}", exp, ttl, f"token {token_hash} {exp}")
+
+    def revoke_user(self, user_id: str, before: float):
+        """Revoke every token of a user issued before the given time."""
+        self._apply_user(user_id, before)
+        self.revocations += 1
+        self._publish(f"{REVOKED_USER_PREFIX}{user_id}", before, self.token_lifetime + 1, f"user {user_id} {before}")
+
+    def _apply_token(self, token_hash: str, exp: float):
+        now = time.time()
+        with self._lock:
+            for expired in [h for h, e in self.revoked_tokens.items() if e <= now]:
+                del self.revoked_tokens[expired]
+            self.revoked_tokens[token_hash] = exp
+
+    def _apply_user(self, user_id: str, before: float):
+        # A cutoff older than the token lifetime no longer covers any valid token
+        oldest = time.time() - self.token_lifetime
+        with self._lock:
+            for stale in [u for u, cutoff in self.user_cutoffs.items() if cutoff <= oldest]:
+                del self.user_cutoffs[stale]
+            self.user_cutoffs[user_id] = max(before, self.user_cutoffs.get(user_id, 0.0))
+
+    def _publish(self, key: str, value: float, ttl: int, message: str):
+        if self.redis_client is None:
+            return
+        try:
+            pipe = self.redis_client.pipeline()
+            pipe.set(key, value, ex=ttl)
+            pipe.publish(REVOCATION_CHANNEL, message)
+            pipe.execute()
+        except Exception as e:
+            print(f"[Auth] Redis revocation error: {type(e).__name__}: {str(e)}")
+
+    def _load(self):
+        """Load revocations stored in Redis by any replica."""
+        for prefix, apply in ((REVOKED_TOKEN_PREFIX, self._apply_token), (REVOKED_USER_PREFIX, self._apply_user)):
+            keys = list(self.redis_client.scan_iter(f"{prefix}*", count=1000))
+            values = self.redis_client.mget(keys) if keys else []
+            for key, value in zip(keys, values):
+                if value is not None:
+                    apply(key[len(prefix):], float(value))
+
+    def _handle(self, message: str):
+        kind, subject, value = message.split(" ", 2)
+        if kind == "token":
+            self._apply_token(subject, float(value))
+        elif kind == "user":
+            self._apply_user(subject, float(value))
+
+    def _listen(self):
+        while not self._stopped.is_set():
+            try:
+                pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(REVOCATION_CHANNEL)
+                # Anything published while disconnected is still in the keys
+                self._load()
+                while not self._stopped.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self._handle(message["data"])
+                pubsub.close()
+            except Exception as e:
+                print(f"[Auth] Revocation listener error: {type(e).__name__}: {str(e)}")
+                self._stopped.wait(5)
+
+    def start(self):
+        """Start applying revocations published by other replicas."""
+        if self.redis_client is not None and self._listener is None:
+            self._listener = threading.Thread(target=self._listen, name="token-revocations", daemon=True)
+            self._listener.start()
+
+    def stop(self):
+        """Stop the listener thread."""
+        self._stopped.set()
+
+    def get_stats(self) -> dict:
+        """Get revocation statistics."""
+        return {
+            "shared": self.redis_client is not None,
+            "revoked_tokens": len(self.revoked_tokens),
+            "revoked_users": len(self.user_cutoffs),
+            "revocations": self.revocations,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,106 @@
+"""
+Benchmark light-user latency while a heavy user saturates the engine.
+
+One heavy user runs many concurrent long streams, and several light users send short
+streaming requests one after another. Requests go through
+ModelInferenceService.stream_infer, first without a scheduler (every stream
+interleaves with every other) and then with FairScheduler. Light-user time to first
+token and completion time are reported. The engine is simulated: it blocks the event
+loop for --token-ms per token, as in-process generation does. Run from backend/:
+
+    python -m benchmarks.bench_fair_scheduling
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from services.inference_scheduler import FairScheduler
+from services.llm_service import ModelInferenceService
+
+
+def _percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index]
+
+
+class SimulatedEngine:
+    """Stands in for LLMEngine: emits max_tokens tokens, blocking for token_ms each."""
+
+    def __init__(self, token_ms: float):
+        self.token_seconds = token_ms / 1000
+
+    def generate(self, prompt, max_tokens=None, temperature=None, stream=False):
+        def tokens():
+            for i in range(max_tokens):
+                time.sleep(self.token_seconds)
+                yield f" t{i}"
+        return tokens()
+
+
+async def _stream(service, user_id: str, tokens: int, ttft: list, total: list):
+    start = time.perf_counter()
+    first = None
+    async for _ in service.stream_infer("prompt", max_tokens=tokens, user_id=user_id):
+        if first is None:
+            first = time.perf_counter() - start
+        await asyncio.sleep(0)
+    ttft.append(first * 1000)
+    total.append((time.perf_counter() - start) * 1000)
+
+
+async def _light_user(service, user_id: str, requests: int, tokens: int, ttft: list, total: list):
+    for _ in range(requests):
+        await _stream(service, user_id, tokens, ttft, total)
+        await asyncio.sleep(0.05)  # Think time
+
+
+async def _run(service, heavy_streams, heavy_tokens, light_users, light_requests, light_tokens):
+    heavy_ttft, heavy_total, light_ttft, light_total = [], [], [], []
+    heavy = [
+        asyncio.create_task(_stream(service, "heavy", heavy_tokens, heavy_ttft, heavy_total))
+        for _ in range(heavy_streams)
+    ]
+    await asyncio.sleep(0.05)
+    await asyncio.gather(*(
+        _light_user(service, f"light-{i}", light_requests, light_tokens, light_ttft, light_total)
+        for i in range(light_users)
+    ))
+    for task in heavy:
+        task.cancel()
+    await asyncio.gather(*heavy, return_exceptions=True)
+    return light_ttft, light_total
+
+
+async def main(heavy_streams, heavy_tokens, light_users, light_requests, light_tokens, token_ms):
+    engine = SimulatedEngine(token_ms)
+    scheduler = FairScheduler({"interactive": 4.0, "batch": 1.0}, admin_multiplier=2.0)
+
+    for label, sched in (("no scheduler", None), ("fair scheduler", scheduler)):
+        service = ModelInferenceService(cache_manager=None, llm_engine=engine, scheduler=sched)
+        ttft, total = await _run(service, heavy_streams, heavy_tokens, light_users, light_requests, light_tokens)
+        print(
+            f"{label:<16} light TTFT p50={statistics.median(ttft):7.1f}ms p99={_percentile(ttft, 99):7.1f}ms | "
+            f"light request p50={statistics.median(total):7.1f}ms p99={_percentile(total, 99):7.1f}ms"
+        )
+
+    users = scheduler.get_stats()["users"]
+    heavy_wait = users["heavy"]["wait_p99_ms"]
+    light_wait = max(stats["wait_p99_ms"] for user_id, stats in users.items() if user_id != "heavy")
+    print(f"scheduler step wait p99: heavy={heavy_wait}ms, worst light user={light_wait}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--heavy-streams", type=int, default=8)
+    parser.add_argument("--heavy-tokens", type=int, default=100000, help="Tokens per heavy stream (runs until light users finish)")
+    parser.add_argument("--light-users", type=int, default=4)
+    parser.add_argument("--light-requests", type=int, default=5, help="Sequential requests per light user")
+    parser.add_argument("--light-tokens", type=int, default=30)
+    parser.add_argument("--token-ms", type=float, default=2.0, help="Simulated time per token")
+    args = parser.parse_args()
+    asyncio.run(main(
+        args.heavy_streams, args.heavy_tokens, args.light_users,
+        args.light_requests, args.light_tokens, args.token_ms
+    ))
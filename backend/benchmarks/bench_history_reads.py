@@ -0,0 +1,85 @@
+"""
+Benchmark history reads running concurrently with chat writes.
+
+Measures read latency of SessionService.get_session on its own and while writer tasks
+keep appending messages, using the async database layer. Run from backend/:
+
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.bench_history_reads
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from database import init_db, close_db
+from services.session_service import SessionService
+
+
+def _percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index]
+
+
+async def _reader(service: SessionService, session_ids: list, reads: int, latencies: list):
+    for i in range(reads):
+        start = time.perf_counter()
+        await service.get_session(session_ids[i % len(session_ids)], limit=50)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def _writer(service: SessionService, session_id: str, user_id: str, stop: asyncio.Event, counter: list):
+    while not stop.is_set():
+        await service.add_message(session_id, user_id, "user", "benchmark message " * 20)
+        counter[0] += 1
+
+
+async def _run_reads(service, session_ids, readers, reads) -> list:
+    latencies = []
+    await asyncio.gather(*(_reader(service, session_ids, reads, latencies) for _ in range(readers)))
+    return latencies
+
+
+async def main(readers: int, writers: int, reads: int):
+    init_db()
+    service = SessionService()
+    user_id = "bench-user"
+
+    session_ids = [await service.create_session(user_id) for _ in range(max(readers, writers))]
+    for session_id in session_ids:
+        for _ in range(50):
+            await service.add_message(session_id, user_id, "assistant", "seed message " * 20)
+
+    baseline = await _run_reads(service, session_ids, readers, reads)
+
+    stop = asyncio.Event()
+    written = [0]
+    write_tasks = [
+        asyncio.create_task(_writer(service, session_ids[i], user_id, stop, written))
+        for i in range(writers)
+    ]
+    start = time.perf_counter()
+    contended = await _run_reads(service, session_ids, readers, reads)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await asyncio.gather(*write_tasks)
+
+    for label, samples in (("reads only", baseline), (f"reads + {writers} writers", contended)):
+        print(
+            f"{label:<22} n={len(samples):<6} "
+            f"p50={statistics.median(samples):7.2f}ms "
+            f"p95={_percentile(samples, 95):7.2f}ms "
+            f"p99={_percentile(samples, 99):7.2f}ms"
+        )
+    print(f"writes during contended run: {written[0]} ({written[0] / elapsed:.0f}/s)")
+
+    await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--reads", type=int, default=200, help="Reads per reader")
+    args = parser.parse_args()
+    asyncio.run(main(args.readers, args.writers, args.reads))
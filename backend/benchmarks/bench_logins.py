@@ -0,0 +1,92 @@
+"""
+Benchmark logins/s alongside concurrent token streams.
+
+Runs concurrent AuthService.login calls while simulated streams emit one token every
+--token-ms, first with bcrypt called inline on the event loop (the old behaviour) and
+then through the bounded hashing pool. Stream stalls show how long tokens were held
+back by hashing. Run from backend/:
+
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.bench_logins
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from database import init_db, close_db
+from auth.service import AuthService
+
+
+def _percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index]
+
+
+async def _stream(token_interval: float, stop: asyncio.Event, gaps: list):
+    """Emit tokens at a fixed pace, recording how late each one was."""
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(token_interval)
+        now = time.perf_counter()
+        gaps.append((now - last - token_interval) * 1000)
+        last = now
+
+
+async def _login_worker(service: AuthService, usernames: list, logins: int, offset: int):
+    for i in range(logins):
+        response = await service.login(usernames[(offset + i) % len(usernames)], "password123")
+        assert response is not None
+
+
+async def _run(service: AuthService, usernames: list, concurrency: int, logins: int, streams: int, token_ms: float):
+    stop = asyncio.Event()
+    gaps = []
+    stream_tasks = [asyncio.create_task(_stream(token_ms / 1000, stop, gaps)) for _ in range(streams)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_login_worker(service, usernames, logins, i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await asyncio.gather(*stream_tasks)
+    return concurrency * logins / elapsed, gaps
+
+
+async def main(concurrency: int, logins: int, streams: int, token_ms: float, users: int):
+    init_db()
+    service = AuthService()
+    service.login_throttle.max_attempts = 0
+
+    usernames = [f"bench-login-{i}" for i in range(users)]
+    for username in usernames:
+        await service.register_user(username, "password123")
+
+    pooled_verify = service.hasher.verify
+
+    async def inline_verify(plain_password: str, hashed_password: str) -> bool:
+        return service.pwd_context.verify(plain_password, hashed_password)
+
+    for label, verify in (("inline bcrypt", inline_verify), (f"pool ({service.hasher.workers} workers)", pooled_verify)):
+        service.hasher.verify = verify
+        rate, gaps = await _run(service, usernames, concurrency, logins, streams, token_ms)
+        print(
+            f"{label:<20} logins/s={rate:7.1f}  "
+            f"stream stall p50={statistics.median(gaps):7.2f}ms "
+            f"p99={_percentile(gaps, 99):7.2f}ms max={max(gaps):7.2f}ms"
+        )
+
+    print(f"pool stats: {service.hasher.get_stats()}")
+    service.shutdown()
+    await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent login clients")
+    parser.add_argument("--logins", type=int, default=8, help="Logins per client")
+    parser.add_argument("--streams", type=int, default=20, help="Concurrent simulated token streams")
+    parser.add_argument("--token-ms", type=float, default=20.0, help="Interval between stream tokens")
+    parser.add_argument("--users", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.logins, args.streams, args.token_ms, args.users))
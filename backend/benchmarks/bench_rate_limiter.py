@@ -0,0 +1,82 @@
+"""
+Benchmark the per-request overhead of RateLimiter.check.
+
+Measures check() against in-process buckets; against a Redis that refuses
+connections (the fallback after a failed call); and, when Redis is reachable at
+REDIS_HOST/REDIS_PORT, against the Lua token bucket script. The Redis call is
+synchronous, so its latency is also time the event loop is blocked. Run from backend/:
+
+    python -m benchmarks.bench_rate_limiter
+"""
+import argparse
+import statistics
+import time
+
+from config import settings
+from services.rate_limiter import RateLimiter
+
+
+def _percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index]
+
+
+def _run(limiter: RateLimiter, users: int, requests: int) -> list:
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        limiter.check("read", f"bench-user-{i % users}")
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+    return latencies
+
+
+def _redis_client():
+    try:
+        import redis
+        client = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            password=settings.REDIS_PASSWORD,
+            socket_connect_timeout=2
+        )
+        client.ping()
+        return client
+    except Exception as e:
+        print(f"Redis unavailable ({e}); skipping the Redis backend")
+        return None
+
+
+def _down_client():
+    import redis
+    # Nothing listens on port 1, so every call fails with a refused connection
+    return redis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=2)
+
+
+def main(users: int, requests: int):
+    limits = {"read": 1_000_000}
+    backends = [
+        ("in-memory", RateLimiter(limits, 60)),
+        ("redis-down", RateLimiter(limits, 60, redis_client=_down_client())),
+    ]
+    client = _redis_client()
+    if client is not None:
+        backends.append(("redis", RateLimiter(limits, 60, redis_client=client)))
+
+    for label, limiter in backends:
+        samples = _run(limiter, users, requests)
+        print(
+            f"{label:<10} n={len(samples):<7} "
+            f"p50={statistics.median(samples):7.1f}us "
+            f"p99={_percentile(samples, 99):7.1f}us "
+            f"mean={statistics.mean(samples):7.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=100000)
+    args = parser.parse_args()
+    main(args.users, args.requests)
@@ -0,0 +1,86 @@
+"""
+Benchmark /chat/search queries on a large synthetic message table.
+
+Bulk-loads messages for many users (the FTS index is maintained by triggers), then
+times SessionService.search_messages for one user. Run from backend/:
+
+    DATABASE_URL=sqlite:///./bench_search.db python -m benchmarks.bench_search --messages 1000000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from database import init_db, close_db, engine
+from database.models import Session as SessionModel, Message as MessageModel
+from services.session_service import SessionService
+
+WORDS = (
+    "python cache redis model token stream latency prompt session history index query "
+    "bread garden music travel budget recipe weather project meeting deadline invoice "
+    "kernel thread memory socket docker deploy schema migration backup replica"
+).split()
+
+
+def _populate(num_messages: int, num_users: int, batch_size: int = 10000) -> list:
+    users = [str(uuid.uuid4()) for _ in range(num_users)]
+    sessions = [(str(uuid.uuid4()), random.choice(users)) for _ in range(max(1, num_messages // 20))]
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        conn.execute(insert(SessionModel), [
+            {"session_id": sid, "user_id": uid, "created_at": now, "updated_at": now} for sid, uid in sessions
+        ])
+
+    for start in range(0, num_messages, batch_size):
+        rows = []
+        for _ in range(min(batch_size, num_messages - start)):
+            sid, uid = random.choice(sessions)
+            rows.append({
+                "message_id": str(uuid.uuid4()),
+                "session_id": sid,
+                "user_id": uid,
+                "role": random.choice(("user", "assistant")),
+                "content": " ".join(random.choices(WORDS, k=random.randint(8, 60))),
+                "timestamp": now
+            })
+        with engine.begin() as conn:
+            conn.execute(insert(MessageModel), rows)
+    return users
+
+
+async def main(num_messages: int, num_users: int, queries: int):
+    init_db()
+    start = time.perf_counter()
+    users = _populate(num_messages, num_users)
+    print(f"loaded {num_messages} messages for {num_users} users in {time.perf_counter() - start:.1f}s")
+
+    service = SessionService()
+    latencies = []
+    for _ in range(queries):
+        user_id = random.choice(users)
+        query = " ".join(random.sample(WORDS, random.randint(1, 2)))
+        start = time.perf_counter()
+        await service.search_messages(user_id, query, limit=20)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    print(
+        f"search n={queries} p50={statistics.median(latencies):.2f}ms "
+        f"p95={latencies[int(len(latencies) * 0.95) - 1]:.2f}ms max={latencies[-1]:.2f}ms"
+    )
+    await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.users, args.queries))
@@ -0,0 +1,92 @@
+"""
+Benchmark SSE framing of a streamed response.
+
+Compares one json.dumps frame per token against SSEWriter, which batches tokens
+produced within the flush window into one frame. Tokens arrive from a simulated
+engine every --token-ms milliseconds. Frames, bytes and process CPU time are reported
+per response: cpu for the framing loop alone, asgi_cpu for the same stream sent
+through StreamingResponse as the chat router sends it. Run from backend/:
+
+    python -m benchmarks.bench_sse_framing
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi.responses import StreamingResponse
+
+from utils.sse import ORJSON_AVAILABLE, SSEWriter
+
+
+async def _tokens(count: int, token_ms: float):
+    for i in range(count):
+        if token_ms > 0:
+            await asyncio.sleep(token_ms / 1000)
+        yield f" word{i}"
+
+
+async def _per_token(count: int, token_ms: float, counts: dict):
+    async for token in _tokens(count, token_ms):
+        frame = f"data: {json.dumps({'type': 'token', 'content': token})}\n\n".encode("utf-8")
+        counts["frames"] += 1
+        counts["bytes"] += len(frame)
+        yield frame
+        await asyncio.sleep(0)
+
+
+async def _batched(count: int, token_ms: float, flush_ms: int, flush_chars: int, counts: dict):
+    writer = SSEWriter(flush_ms, flush_chars)
+    async for frame in writer.frames_from(_tokens(count, token_ms)):
+        yield frame
+    counts["frames"], counts["bytes"] = writer.frames, writer.bytes
+
+
+async def _drain(frames):
+    async for _ in frames:
+        pass
+
+
+async def _through_asgi(frames):
+    """Send the frames through StreamingResponse, as the chat router does."""
+    scope = {"type": "http", "method": "POST", "path": "/chat/stream", "headers": []}
+
+    async def receive():
+        await asyncio.Event().wait()  # The client never disconnects
+
+    async def send(message):
+        pass
+
+    await StreamingResponse(frames, media_type="text/event-stream")(scope, receive, send)
+
+
+async def _measure(run, frames) -> float:
+    start = time.process_time()
+    await run(frames)
+    return time.process_time() - start
+
+
+async def main(tokens: int, token_ms: float, flush_ms: int, flush_chars: int):
+    print(f"orjson available: {ORJSON_AVAILABLE}")
+    modes = [
+        ("per-token", lambda counts: _per_token(tokens, token_ms, counts)),
+        (f"batched {flush_ms}ms", lambda counts: _batched(tokens, token_ms, flush_ms, flush_chars, counts)),
+    ]
+    for label, frames in modes:
+        counts = {"frames": 0, "bytes": 0}
+        loop_cpu = await _measure(_drain, frames(counts))
+        asgi_cpu = await _measure(_through_asgi, frames({"frames": 0, "bytes": 0}))
+        print(
+            f"{label:<14} frames={counts['frames']:<6} bytes={counts['bytes']:<8} "
+            f"cpu={loop_cpu * 1000:7.1f}ms asgi_cpu={asgi_cpu * 1000:7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tokens", type=int, default=500)
+    parser.add_argument("--token-ms", type=float, default=2.0, help="Simulated time between tokens")
+    parser.add_argument("--flush-ms", type=int, default=15)
+    parser.add_argument("--flush-chars", type=int, default=512)
+    args = parser.parse_args()
+    asyncio.run(main(args.tokens, args.token_ms, args.flush_ms, args.flush_chars))
@@ -0,0 +1,62 @@
+"""
+Benchmark per-request JWT verification cost with and without the verified-token cache.
+
+Calls AuthService.verify_token (what get_current_user runs on every request) for a
+pool of tokens, first with the cache disabled (full decode and signature check every
+time) and then with it enabled. Run from backend/:
+
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.bench_token_verify
+"""
+import argparse
+import statistics
+import time
+
+from database import init_db
+from auth.service import AuthService
+from schemas.auth import User as UserSchema
+
+
+def _percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index]
+
+
+def _run(service: AuthService, tokens: list, requests: int) -> list:
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        assert service.verify_token(tokens[i % len(tokens)]) is not None
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+    return latencies
+
+
+def main(tokens: int, requests: int):
+    init_db()
+    service = AuthService()
+    pool = [
+        service.create_access_token(UserSchema(user_id=f"bench-{i}", username=f"bench-{i}", password_hash="", is_admin=False))
+        for i in range(tokens)
+    ]
+    cache_size = service.token_cache.max_entries
+
+    for label, max_entries in (("no cache", 0), (f"cache ({cache_size})", cache_size)):
+        service.token_cache.max_entries = max_entries
+        samples = _run(service, pool, requests)
+        print(
+            f"{label:<16} n={len(samples):<7} "
+            f"p50={statistics.median(samples):7.1f}us "
+            f"p99={_percentile(samples, 99):7.1f}us "
+            f"mean={statistics.mean(samples):7.1f}us"
+        )
+
+    print(f"token cache: {service.token_cache.get_stats()}")
+    service.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tokens", type=int, default=1000, help="Distinct tokens in use")
+    parser.add_argument("--requests", type=int, default=50000)
+    args = parser.parse_args()
+    main(args.tokens, args.requests)
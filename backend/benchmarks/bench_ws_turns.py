@@ -0,0 +1,85 @@
+"""
+Benchmark per-turn overhead of POST /chat/stream against the /chat/ws WebSocket.
+
+Talks to a running backend over TCP. Every turn sends the same prompt, so after the
+first turn the reply is replayed from the cache and the timing is dominated by per-turn
+work: the HTTP request, JWT verification, session checks, stream setup and saving the
+turn. SSE turns use a keep-alive connection (--new-connections opens one per turn, as
+a client without pooling does); WebSocket turns share one connection. Start the
+backend with rate limiting disabled, then run from backend/:
+
+    RATE_LIMIT_ENABLED=false python main.py
+    python -m benchmarks.bench_ws_turns --url http://localhost:8000
+"""
+import argparse
+import json
+import statistics
+import time
+
+import httpx
+from websockets.sync.client import connect
+
+
+def _percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index]
+
+
+def _sse_turns(url: str, headers: dict, session_id: str, turns: int, new_connections: bool) -> list:
+    latencies = []
+    client = httpx.Client(base_url=url)
+    for _ in range(turns):
+        if new_connections:
+            client.close()
+            client = httpx.Client(base_url=url)
+        start = time.perf_counter()
+        response = client.post("/chat/stream", json={"prompt": "benchmark turn", "session_id": session_id}, headers=headers)
+        assert '"type":"done"' in response.text, response.text
+        latencies.append((time.perf_counter() - start) * 1000)
+    client.close()
+    return latencies
+
+
+def _ws_turns(url: str, token: str, session_id: str, turns: int) -> list:
+    latencies = []
+    with connect(url.replace("http", "ws", 1) + f"/chat/ws?token={token}") as ws:
+        for i in range(turns):
+            start = time.perf_counter()
+            ws.send(json.dumps({"type": "chat", "prompt": "benchmark turn", "session_id": session_id, "message_id": str(i)}))
+            while True:
+                message = json.loads(ws.recv())
+                if message["type"] in ("done", "error"):
+                    break
+            assert message["type"] == "done", message
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main(url: str, turns: int, new_connections: bool):
+    login = httpx.post(f"{url}/auth/login", json={"username": "user1", "password": "password123"})
+    token = login.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    first = httpx.post(f"{url}/chat/stream", json={"prompt": "benchmark turn"}, headers=headers, timeout=60)
+    session_id = json.loads(first.text.splitlines()[0][6:])["session_id"]
+
+    sse_label = "sse (new conn)" if new_connections else "sse"
+    for label, samples in (
+        (sse_label, _sse_turns(url, headers, session_id, turns, new_connections)),
+        ("websocket", _ws_turns(url, token, session_id, turns)),
+    ):
+        print(
+            f"{label:<15} turns={len(samples):<5} "
+            f"p50={statistics.median(samples):6.2f}ms "
+            f"p99={_percentile(samples, 99):6.2f}ms "
+            f"mean={statistics.mean(samples):6.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--new-connections", action="store_true", help="Open a new HTTP connection for every SSE turn")
+    args = parser.parse_args()
+    main(args.url, args.turns, args.new_connections)
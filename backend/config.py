@@ -18,11 +18,77 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Password hashing (bcrypt runs in a bounded thread pool, off the event loop)
+    AUTH_HASH_WORKERS: int = 4
+    AUTH_HASH_MAX_QUEUE: int = 64  # Hash operations allowed to wait for a worker before 503s
+    AUTH_LOGIN_MAX_ATTEMPTS: int = 10  # Failed logins per username and client IP per window (0 disables)
+    AUTH_LOGIN_WINDOW_SECONDS: int = 60
+    AUTH_TOKEN_CACHE_SIZE: int = 10000  # Verified tokens kept until their exp (0 disables)
+
     # CORS
     CORS_ORIGINS: list[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
 
     # Database
     DATABASE_URL: str = "sqlite:///./pocketllm.db"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a pooled connection
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a pooled connection is replaced
+
+    # SQLite performance profile (applied to every pooled connection)
+    SQLITE_JOURNAL_MODE: str = "WAL"  # WAL lets readers run concurrently with a writer
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # NORMAL is durable across app crashes in WAL mode
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_MMAP_SIZE: int = 268435456  # Bytes of the database file to memory-map (0 disables)
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+
+    # Write-behind message persistence (queue inserts and commit them in batches)
+    MESSAGE_WRITE_BEHIND: bool = False
+    MESSAGE_FLUSH_INTERVAL_MS: int = 50
+    MESSAGE_FLUSH_BATCH_SIZE: int = 100
+    MESSAGE_FLUSH_MAX_RETRIES: int = 3  # Then the batch is written row by row and rejected rows are dropped
+    MESSAGE_QUEUE_MAX_ROWS: int = 10000  # Queued rows before add_message flushes inline
+
+    # Cold-session archival (messages of idle sessions are compressed into one row per session)
+    ARCHIVE_IDLE_DAYS: int = 30
+    ARCHIVE_INTERVAL_SECONDS: int = 3600  # 0 disables the background archiver
+    ARCHIVE_BATCH_SIZE: int = 100
+    ARCHIVE_COMPRESS_LEVEL: int = 6
+
+    # Retention purge (sessions not updated for the retention period are deleted in batches)
+    RETENTION_DAYS: int = 0  # 0 keeps history forever
+    RETENTION_USER_DAYS: dict[str, int] = {}  # Per-username overrides, e.g. {"user1": 7}; 0 keeps forever
+    RETENTION_INTERVAL_SECONDS: int = 3600
+    RETENTION_BATCH_SIZE: int = 50  # Sessions deleted per transaction
+    RETENTION_BATCH_PAUSE_MS: int = 100  # Pause between batches so live writes can take the lock
+
+    # NDJSON export/import
+    EXPORT_YIELD_PER: int = 1000  # Rows fetched per server-side cursor round trip
+    IMPORT_BATCH_SIZE: int = 5000  # Rows inserted per transaction
+
+    # Rolling conversation summarisation (older turns condensed into a summary on the session)
+    SUMMARY_ENABLED: bool = False
+    SUMMARY_RECENT_MESSAGES: int = 4  # Most recent messages kept verbatim in the prompt
+    SUMMARY_TRIGGER_MESSAGES: int = 6  # Unsummarised older messages that trigger a refresh
+    SUMMARY_MAX_TOKENS: int = 256
+    SUMMARY_IDLE_SECONDS: float = 2.0
+
+    # Admin statistics
+    METRICS_SAMPLE_INTERVAL_SECONDS: float = 1.0  # Background sampling (time-series resolution)
+    METRICS_RAW_POINTS: int = 3600  # Raw samples kept (1 hour at 1 s)
+    METRICS_MINUTE_POINTS: int = 1440  # 1-minute rollups kept (1 day)
+    METRICS_HOUR_POINTS: int = 720  # 1-hour rollups kept (30 days)
+    COUNTERS_RECONCILE_SECONDS: int = 300  # Recount sessions/messages from the database
+
+    # Fair-share inference scheduling (weighted fair queuing of generation steps per user)
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_WEIGHT_INTERACTIVE: float = 4.0
+    SCHEDULER_WEIGHT_BATCH: float = 1.0
+    SCHEDULER_ADMIN_MULTIPLIER: float = 2.0  # Admin flows get this multiple of their class weight
+
+    # Chat history cache (recent messages kept per session to avoid reloading history)
+    HISTORY_CACHE_SESSIONS: int = 1024
+    HISTORY_CACHE_MESSAGES: int = 20
 
     # Redis
     REDIS_HOST: str = "localhost"
@@ -43,10 +109,50 @@ class Settings(BaseSettings):
     # Cache settings
     CACHE_TTL_SECONDS: int = 3600  # 1 hour
     ENABLE_CACHE: bool = True
+    CACHE_REPLAY_FRAME_CHARS: int = 256  # Coalesce replayed stream chunks up to this size per frame
+    CACHE_REPLAY_DELAY_MS: int = 0  # Pause between replayed frames (0 = instant delivery)
+    STREAM_FLUSH_MS: int = 15  # Batch live tokens produced within this window into one SSE frame (0 = frame per token)
+    STREAM_FLUSH_CHARS: int = 512  # Send the batched frame early once it holds this much text
+    CACHE_MAX_MEMORY_ENTRIES: int = 10000  # Bound for the in-memory fallback cache
+    CACHE_COMPRESS_MIN_BYTES: int = 512  # Compress cached values at least this large
+    CACHE_COMPRESS_LEVEL: int = 1  # zlib level (1 = fastest)
+
+    # Cache persistence and warm-up
+    CACHE_SNAPSHOT_ENABLED: bool = True
+    CACHE_SNAPSHOT_PATH: str = "./data/cache_snapshot.bin"
+    CACHE_SNAPSHOT_INTERVAL_SECONDS: int = 300  # 0 = only on shutdown
+    CACHE_WARMUP_FILE: Optional[str] = None  # Popular prompts, one per line
+    CACHE_WARMUP_IDLE_SECONDS: float = 2.0  # Idle time required before each warm-up generation
+
+    # Cache analytics
+    CACHE_ANALYTICS_TOP_K: int = 100  # Heavy-hitter keys tracked
+    CACHE_ANALYTICS_WINDOW_SECONDS: int = 60
+    CACHE_ANALYTICS_WINDOWS: int = 60  # Windows retained for hit-rate and savings history
 
-    # Rate limiting
-    RATE_LIMIT_REQUESTS: int = 10
+    # Cache admission (TinyLFU: only cache prompts requested repeatedly)
+    CACHE_ADMISSION_ENABLED: bool = False
+    CACHE_ADMISSION_MIN_FREQUENCY: int = 2  # Requests within the sketch window before caching
+    CACHE_ADMISSION_SKETCH_WIDTH: int = 65536  # Counters per sketch row
+    CACHE_ADMISSION_SAMPLE_SIZE: int = 100000  # Accesses between counter halvings
+
+    # Semantic cache (matches rephrased prompts by embedding similarity)
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_THRESHOLD: float = 0.97  # Minimum cosine similarity for a hit (content words must also match)
+    SEMANTIC_CACHE_CAPACITY: int = 10000
+    SEMANTIC_CACHE_DIM: int = 512
+    SEMANTIC_CACHE_INDEX_PATH: str = "./data/semantic_index.npz"
+
+    # Rate limiting (token bucket per user and route class, shared through Redis when available)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_REQUESTS: int = 10  # Chat generations per period
     RATE_LIMIT_PERIOD: int = 60  # seconds
+    RATE_LIMIT_READ_REQUESTS: int = 300  # History, search and deletes per period
+    RATE_LIMIT_ADMIN_REQUESTS: int = 600  # Admin API calls per period
+    RATE_LIMIT_REDIS_RETRY_SECONDS: float = 5.0  # In-process buckets for this long after a Redis error
+
+    # WebSocket chat (/chat/ws: one authenticated connection, generations multiplexed by message id)
+    WS_MAX_GENERATIONS: int = 4  # Concurrent generations per connection
+    WS_SEND_QUEUE_FRAMES: int = 64  # Per connection: queued generation frames before generation pauses, and unsent replies before reading pauses
 
     class Config:
         env_file = ".env"
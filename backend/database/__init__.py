@@ -1,4 +1,4 @@
 """Database package for SQLAlchemy ORM."""
-from .database import engine, SessionLocal, Base, init_db, get_db
+from .database import DIALECT, engine, SessionLocal, async_engine, AsyncSessionLocal, Base, init_db, close_db, get_db
 
-__all__ = ["engine", "SessionLocal", "Base", "init_db", "get_db"]
+__all__ = ["DIALECT", "engine", "SessionLocal", "async_engine", "AsyncSessionLocal", "Base", "init_db", "close_db", "get_db"]
@@ -2,39 +2,125 @@
 Database configuration and initialization for PocketLLM.
 
 Architecture Reference: HW3 Section 3.2 - Database Layer
-- SQLAlchemy ORM for SQLite
-- Session management
+- SQLAlchemy ORM for SQLite (single instance) or PostgreSQL (multiple replicas)
+- Session management (sync for startup tasks, asyncio for request handling)
 - Database initialization
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from config import settings
 
-# SQLite database URL
+# Database URL (sqlite:///... or postgresql://...)
 DATABASE_URL = getattr(settings, 'DATABASE_URL', 'sqlite:///./pocketllm.db')
+if DATABASE_URL.startswith("postgres://"):
+    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+
+# Backend name: "sqlite" or "postgresql"
+DIALECT = make_url(DATABASE_URL).get_backend_name()
 
 # Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith('sqlite') else {},
-    echo=settings.DEBUG  # Log SQL queries in debug mode
-)
+if DIALECT == "sqlite":
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        echo=settings.DEBUG  # Log SQL queries in debug mode
+    )
+else:
+    # Only used for startup tasks, so a small pool is enough
+    engine = create_engine(
+        DATABASE_URL,
+        pool_size=1,
+        max_overflow=1,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+        echo=settings.DEBUG
+    )
+
+
+def _sqlite_pragmas() -> list[str]:
+    """PRAGMA statements of the configured SQLite performance profile."""
+    return [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",  # Negative values are KiB
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply the SQLite profile to every new pooled connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+if DIALECT == "sqlite":
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
 
 # Create SessionLocal class for database sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_url(url: str) -> str:
+    """Map a sync database URL to its asyncio driver."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if parsed.get_backend_name() == "postgresql":
+        return parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    return url
+
+
+# Asyncio engine used by request-path services so queries never block the event loop
+async_engine = create_async_engine(
+    _async_url(DATABASE_URL),
+    poolclass=AsyncAdaptedQueuePool,  # aiosqlite defaults to NullPool (a new connection per session)
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    echo=settings.DEBUG
+)
+
+if DIALECT == "sqlite":
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+
+# expire_on_commit=False so returned ORM attributes stay readable after commit
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
 # Create Base class for declarative models
 Base = declarative_base()
 
 
 def init_db():
     """
-    Initialize database by creating all tables.
-    Called on application startup.
+    Initialize database by creating all tables and applying pending migrations.
+    Called on application startup. Returns the migration versions applied.
+    """
+    from .models import User, Session, Message, SessionArchive  # Import models to register them
+    from .migrations import migration_lock, run_migrations
+    with migration_lock(engine):
+        Base.metadata.create_all(bind=engine)
+        return run_migrations(engine)
+
+
+async def close_db():
+    """
+    Dispose database connection pools.
+    Called on application shutdown.
     """
-    from .models import User, Session, Message  # Import models to register them
-    Base.metadata.create_all(bind=engine)
+    await async_engine.dispose()
+    engine.dispose()
 
 
 def get_db():
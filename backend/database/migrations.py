@@ -0,0 +1,171 @@
+"""
+Versioned schema migrations for existing PocketLLM databases.
+
+`create_all` only creates missing tables, so changes to tables that already exist
+(new indexes, columns) are listed here and applied once, in order, on startup.
+Applied versions are recorded in the schema_migrations table.
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+# pg_advisory_lock key serialising migrations of replicas starting together
+MIGRATION_LOCK_KEY = 0x504C4D47
+
+
+def _add_column(table: str, column: str, ddl: str):
+    """Statement adding a column unless it exists (fresh databases get it from create_all)."""
+    def apply(conn):
+        if column not in {c["name"] for c in inspect(conn).get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return apply
+
+
+# (version, description, statements). Statements must be safe to run on a database
+# created by create_all with the current models, since fresh databases run them too.
+# Dialect-specific statements are given as a dict keyed by dialect name, and a
+# statement may also be a callable taking the connection.
+MIGRATIONS = [
+    (
+        1,
+        "Composite indexes for session listings and recent-history windows",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_sessions_user_updated ON sessions (user_id, updated_at)",
+            "CREATE INDEX IF NOT EXISTS ix_messages_session_timestamp ON messages (session_id, timestamp)",
+        ],
+    ),
+    (
+        2,
+        "Full-text index over message content",
+        {
+            "sqlite": [
+                # External-content FTS5 table kept in sync with messages by triggers
+                "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+                "content, user_id, content='messages', content_rowid='rowid', tokenize='unicode61')",
+                "CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN "
+                "INSERT INTO messages_fts(rowid, content, user_id) VALUES (new.rowid, new.content, new.user_id); END",
+                "CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN "
+                "INSERT INTO messages_fts(messages_fts, rowid, content, user_id) "
+                "VALUES ('delete', old.rowid, old.content, old.user_id); END",
+                "CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE ON messages BEGIN "
+                "INSERT INTO messages_fts(messages_fts, rowid, content, user_id) "
+                "VALUES ('delete', old.rowid, old.content, old.user_id); "
+                "INSERT INTO messages_fts(rowid, content, user_id) VALUES (new.rowid, new.content, new.user_id); END",
+                # Index messages that existed before the triggers
+                "INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')",
+            ],
+            "postgresql": [
+                "CREATE INDEX IF NOT EXISTS ix_messages_content_fts ON messages "
+                "USING GIN (to_tsvector('english', content))",
+            ],
+        },
+    ),
+    (
+        3,
+        "Running conversation summary on sessions",
+        [
+            _add_column("sessions", "summary", "TEXT"),
+            _add_column("sessions", "summarized_until", "TIMESTAMP"),
+        ],
+    ),
+    (
+        4,
+        "Rehydration time on sessions, so restored sessions are not archived again at once",
+        [
+            _add_column("sessions", "rehydrated_at", "TIMESTAMP"),
+        ],
+    ),
+    (
+        5,
+        "Key the full-text index on a stored integer column instead of the implicit rowid",
+        {
+            # messages has a string primary key, so its rowid may change on VACUUM and
+            # the external-content index would point at the wrong rows
+            "sqlite": [
+                _add_column("messages", "seq", "INTEGER"),
+                "UPDATE messages SET seq = rowid WHERE seq IS NULL",
+                "CREATE UNIQUE INDEX IF NOT EXISTS ix_messages_seq ON messages (seq)",
+                "DROP TRIGGER IF EXISTS messages_fts_insert",
+                "DROP TRIGGER IF EXISTS messages_fts_delete",
+                "DROP TRIGGER IF EXISTS messages_fts_update",
+                "DROP TABLE IF EXISTS messages_fts",
+                "CREATE VIRTUAL TABLE messages_fts USING fts5("
+                "content, user_id, content='messages', content_rowid='seq', tokenize='unicode61')",
+                # seq is assigned on insert, then the row is indexed under it
+                "CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN "
+                "UPDATE messages SET seq = (SELECT COALESCE(MAX(seq), 0) + 1 FROM messages) "
+                "WHERE rowid = new.rowid AND seq IS NULL; "
+                "INSERT INTO messages_fts(rowid, content, user_id) "
+                "SELECT seq, content, user_id FROM messages WHERE rowid = new.rowid; END",
+                "CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN "
+                "INSERT INTO messages_fts(messages_fts, rowid, content, user_id) "
+                "VALUES ('delete', old.seq, old.content, old.user_id); END",
+                "CREATE TRIGGER messages_fts_update AFTER UPDATE OF content, user_id ON messages BEGIN "
+                "INSERT INTO messages_fts(messages_fts, rowid, content, user_id) "
+                "VALUES ('delete', old.seq, old.content, old.user_id); "
+                "INSERT INTO messages_fts(rowid, content, user_id) VALUES (new.seq, new.content, new.user_id); END",
+                "INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')",
+            ],
+            "postgresql": [
+                _add_column("messages", "seq", "INTEGER"),
+            ],
+        },
+    ),
+]
+
+
+@contextmanager
+def migration_lock(engine: Engine):
+    """Hold a PostgreSQL advisory lock so only one replica creates or migrates the schema at a time."""
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+
+    with engine.connect() as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        lock_conn.commit()
+        try:
+            yield
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            lock_conn.commit()
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """
+    Apply pending migrations. Returns the versions applied by this call.
+
+    Call under migration_lock: applied versions are read once, so a replica that
+    waited for the lock skips the migrations the other one applied.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, description VARCHAR(255) NOT NULL, applied_at TIMESTAMP NOT NULL)"
+        ))
+        applied_versions = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        if version in applied_versions:
+            continue
+
+        if isinstance(statements, dict):
+            statements = statements.get(engine.dialect.name, [])
+
+        # Each migration commits atomically with its version record
+        with engine.begin() as conn:
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(text(statement))
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": version, "d": description, "t": datetime.utcnow()}
+            )
+        applied.append(version)
+
+    return applied
@@ -5,8 +5,9 @@ Architecture Reference: HW3 Section 3.2 - Database Schema
 - User model for authentication
 - Session model for chat sessions
 - Message model for chat messages
+- SessionArchive model for messages of idle sessions
 """
-from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey, Text, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -45,13 +46,23 @@ class Session(Base):
         user_id: Foreign key to User
         created_at: Session creation timestamp
         updated_at: Last message timestamp
+        summary: Running summary of older turns (summarisation mode)
+        summarized_until: Timestamp of the last message folded into the summary
+        rehydrated_at: When the session's messages were last restored from the archive
     """
     __tablename__ = "sessions"
+    __table_args__ = (
+        # Serves per-user session listings ordered by recency
+        Index("ix_sessions_user_updated", "user_id", "updated_at"),
+    )
 
     session_id = Column(String(36), primary_key=True, index=True)
     user_id = Column(String(36), ForeignKey("users.user_id"), nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    summary = Column(Text, nullable=True)
+    summarized_until = Column(DateTime, nullable=True)
+    rehydrated_at = Column(DateTime, nullable=True)
 
     # Relationships
     user = relationship("User", back_populates="sessions")
@@ -70,8 +81,13 @@ class Message(Base):
         content: Message text content
         timestamp: Message creation timestamp
         tokens_used: Number of tokens used (for assistant messages)
+        seq: Stable integer key of the SQLite full-text index (assigned by trigger)
     """
     __tablename__ = "messages"
+    __table_args__ = (
+        # Serves "last N messages of a session" with an index range scan
+        Index("ix_messages_session_timestamp", "session_id", "timestamp"),
+    )
 
     message_id = Column(String(36), primary_key=True, index=True)
     session_id = Column(String(36), ForeignKey("sessions.session_id"), nullable=False, index=True)
@@ -80,7 +96,35 @@ class Message(Base):
     content = Column(Text, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     tokens_used = Column(Integer, nullable=True)
+    seq = Column(Integer, nullable=True)
 
     # Relationships
     session = relationship("Session", back_populates="messages")
     user = relationship("User", back_populates="messages")
+
+
+class SessionArchive(Base):
+    """
+    Compressed messages of a session that has been idle past the archive threshold.
+
+    The session row stays in `sessions`; its messages move out of the hot `messages`
+    table into one blob and are restored when the session is opened again.
+
+    Attributes:
+        session_id: Primary key, foreign key to Session
+        user_id: Foreign key to User
+        message_count: Number of archived messages
+        title: Preview of the first user message
+        last_message_preview: Preview of the last message
+        payload: zlib-compressed JSON of the messages
+        archived_at: Archive timestamp
+    """
+    __tablename__ = "session_archives"
+
+    session_id = Column(String(36), ForeignKey("sessions.session_id"), primary_key=True)
+    user_id = Column(String(36), ForeignKey("users.user_id"), nullable=False, index=True)
+    message_count = Column(Integer, nullable=False)
+    title = Column(String(100), nullable=True)
+    last_message_preview = Column(String(100), nullable=True)
+    payload = Column(LargeBinary, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
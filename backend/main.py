@@ -4,9 +4,11 @@ PocketLLM Backend - FastAPI Application
 Main entry point for the PocketLLM backend service.
 Implements the architecture from HW3 with service-based design.
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
+import time
 
 # Import configuration
 from config import settings
@@ -16,7 +18,12 @@ from auth.service import AuthService
 from services.session_service import SessionService
 from services.cache_service import CacheManager
 from services.llm_service import LLMEngine, ModelInferenceService
+from services.inference_scheduler import FairScheduler
 from services.monitoring_service import MonitoringService
+from services.cache_warmup import CacheWarmer, load_warmup_prompts
+from services.conversation_summarizer import ConversationSummarizer
+from services.retention_purger import RetentionPurger
+from services.rate_limiter import RateLimiter
 
 # Import routers
 from routers.auth_router import router as auth_router
@@ -27,7 +34,7 @@ from routers.admin_router import router as admin_router
 import utils.dependencies as deps
 
 # Import database initialization
-from database import init_db
+from database import DIALECT, init_db, close_db
 
 
 @asynccontextmanager
@@ -42,14 +49,17 @@ async def lifespan(app: FastAPI):
 
     # Initialize database
     print("Initializing database...")
-    init_db()
-    print(" Database initialized (SQLite)")
+    applied_migrations = init_db()
+    print(f" Database initialized ({DIALECT})")
+    if applied_migrations:
+        print(f" Applied database migrations: {applied_migrations}")
 
     # Initialize services
     print("Initializing services...")
 
     # Auth service
     auth_service = AuthService()
+    auth_service.revocations.start()
     print(" Auth service initialized")
 
     # Session service
@@ -72,7 +82,13 @@ async def lifespan(app: FastAPI):
         print(" LLM engine in mock mode (Model not loaded)")
 
     # Inference service
-    inference_service = ModelInferenceService(cache_manager, llm_engine)
+    scheduler = None
+    if settings.SCHEDULER_ENABLED:
+        scheduler = FairScheduler(
+            {"interactive": settings.SCHEDULER_WEIGHT_INTERACTIVE, "batch": settings.SCHEDULER_WEIGHT_BATCH},
+            settings.SCHEDULER_ADMIN_MULTIPLIER
+        )
+    inference_service = ModelInferenceService(cache_manager, llm_engine, scheduler)
     print(" Inference service initialized")
 
     # Monitoring service
@@ -86,6 +102,78 @@ async def lifespan(app: FastAPI):
     deps.inference_service = inference_service
     deps.monitoring_service = monitoring_service
 
+    if settings.RATE_LIMIT_ENABLED:
+        deps.rate_limiter = RateLimiter(
+            {
+                "chat": settings.RATE_LIMIT_REQUESTS,
+                "read": settings.RATE_LIMIT_READ_REQUESTS,
+                "admin": settings.RATE_LIMIT_ADMIN_REQUESTS,
+            },
+            settings.RATE_LIMIT_PERIOD,
+            redis_client=cache_manager.redis_client if cache_manager.use_redis else None,
+            redis_retry_seconds=settings.RATE_LIMIT_REDIS_RETRY_SECONDS
+        )
+        print(f" Rate limiting enabled ({deps.rate_limiter.get_stats()['backend']})")
+
+    # Seed the incrementally maintained admin counters
+    await session_service.reconcile_counters()
+
+    # Background tasks
+    background_tasks = [
+        asyncio.create_task(monitoring_service.run_sampler(
+            settings.METRICS_SAMPLE_INTERVAL_SECONDS, cache_manager, inference_service
+        ))
+    ]
+    if settings.COUNTERS_RECONCILE_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(
+            session_service.run_reconcile_loop(settings.COUNTERS_RECONCILE_SECONDS)
+        ))
+    if session_service.writer is not None:
+        background_tasks.append(asyncio.create_task(session_service.writer.run()))
+        print(f" Write-behind message persistence enabled ({settings.MESSAGE_FLUSH_INTERVAL_MS}ms batches)")
+
+    if cache_manager.snapshot_path and settings.CACHE_SNAPSHOT_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(
+            cache_manager.run_snapshot_loop(settings.CACHE_SNAPSHOT_INTERVAL_SECONDS)
+        ))
+
+    if settings.ARCHIVE_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(
+            session_service.run_archive_loop(settings.ARCHIVE_INTERVAL_SECONDS)
+        ))
+
+    retention_purger = RetentionPurger(
+        session_service,
+        retention_days=settings.RETENTION_DAYS,
+        user_overrides=settings.RETENTION_USER_DAYS,
+        batch_size=settings.RETENTION_BATCH_SIZE,
+        pause_ms=settings.RETENTION_BATCH_PAUSE_MS
+    )
+    deps.retention_purger = retention_purger
+    if retention_purger.enabled and settings.RETENTION_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(retention_purger.run(settings.RETENTION_INTERVAL_SECONDS)))
+        print(f" Retention purge enabled ({settings.RETENTION_DAYS} days, {len(settings.RETENTION_USER_DAYS)} user overrides)")
+
+    if settings.SUMMARY_ENABLED:
+        summarizer = ConversationSummarizer(
+            session_service,
+            inference_service,
+            recent_messages=settings.SUMMARY_RECENT_MESSAGES,
+            trigger_messages=settings.SUMMARY_TRIGGER_MESSAGES,
+            max_tokens=settings.SUMMARY_MAX_TOKENS,
+            idle_seconds=settings.SUMMARY_IDLE_SECONDS,
+            max_context_tokens=settings.MODEL_N_CTX
+        )
+        deps.summarizer = summarizer
+        background_tasks.append(asyncio.create_task(summarizer.run()))
+        print(" Conversation summarisation enabled")
+
+    warmup_prompts = load_warmup_prompts(settings.CACHE_WARMUP_FILE) if cache_manager.enabled else []
+    if warmup_prompts:
+        warmer = CacheWarmer(cache_manager, inference_service, warmup_prompts, settings.CACHE_WARMUP_IDLE_SECONDS)
+        background_tasks.append(asyncio.create_task(warmer.run()))
+        print(f" Cache warm-up scheduled ({len(warmup_prompts)} prompts)")
+
     print("=" * 60)
     print(f"Server ready on http://{settings.HOST}:{settings.PORT}")
     print(f"API docs available at http://{settings.HOST}:{settings.PORT}/docs")
@@ -99,6 +187,13 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     print("\nShutting down services...")
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    cache_manager.shutdown()
+    auth_service.shutdown()
+    await session_service.shutdown()
+    await close_db()
     print("Goodbye!")
 
 
@@ -119,6 +214,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Record request latency for the metrics time series."""
+    start = time.perf_counter()
+    response = await call_next(request)
+    if deps.monitoring_service is not None:
+        deps.monitoring_service.record_latency((time.perf_counter() - start) * 1000)
+    return response
+
+
+@app.middleware("http")
+async def add_rate_limit_headers(request: Request, call_next):
+    """Attach the rate limit headers computed by the rate_limit dependency."""
+    response = await call_next(request)
+    headers = getattr(request.state, "rate_limit_headers", None)
+    if headers:
+        response.headers.update(headers)
+    return response
+
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(chat_router)
@@ -1,12 +1,16 @@
 """Admin API router."""
-from fastapi import APIRouter, Depends
-from typing import Annotated
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from typing import Annotated, Optional
+from datetime import datetime
+from config import settings
 from schemas.auth import TokenPayload
 from schemas.admin import SystemMetrics, CacheFlushResponse, ModelConfig
-from utils.dependencies import get_current_admin
+from services.session_transfer import SessionTransfer
+from utils.dependencies import get_current_admin, rate_limit
 import utils.dependencies as deps
 
-router = APIRouter(prefix="/admin", tags=["Admin"])
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(rate_limit("admin"))])
 
 
 @router.get("/metrics", response_model=SystemMetrics)
@@ -19,11 +23,37 @@ async def get_metrics(
     deps.monitoring_service.increment_request_count()
 
     cache_stats = deps.cache_manager.get_stats()
-    active_sessions = deps.session_service.get_total_sessions_count()
+    active_sessions = await deps.session_service.get_total_sessions_count()
 
     return deps.monitoring_service.get_system_metrics(cache_stats, active_sessions)
 
 
+@router.get("/metrics/timeseries")
+async def get_metrics_timeseries(
+    current_admin: Annotated[TokenPayload, Depends(get_current_admin)],
+    resolution: str = "raw",
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    fields: Optional[str] = None
+):
+    """
+    Get service metrics over time (admin only).
+
+    resolution is "raw" (one point per sample), "1m" or "1h"; start and end are unix
+    timestamps; fields is a comma-separated subset of the recorded fields.
+    """
+    deps.monitoring_service.increment_request_count()
+    try:
+        return deps.monitoring_service.timeseries.query(
+            resolution,
+            start=start,
+            end=end,
+            fields=fields.split(",") if fields else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.post("/cache/flush", response_model=CacheFlushResponse)
 async def flush_cache(
     current_admin: Annotated[TokenPayload, Depends(get_current_admin)]
@@ -83,6 +113,141 @@ async def get_session_count(
     """
     deps.monitoring_service.increment_request_count()
     return {
-        "total_sessions": deps.session_service.get_total_sessions_count(),
-        "total_users": deps.session_service.get_total_users_count()
+        "total_sessions": await deps.session_service.get_total_sessions_count(),
+        "total_users": await deps.session_service.get_total_users_count(),
+        "total_messages": await deps.session_service.get_total_messages_count()
     }
+
+
+@router.get("/persistence/stats")
+async def get_persistence_stats(
+    current_admin: Annotated[TokenPayload, Depends(get_current_admin)]
+):
+    """
+    Get write-behind message persistence statistics (admin only).
+    """
+    deps.monitoring_service.increment_request_count()
+    return deps.session_service.get_write_stats()
+
+
+@router.get("/archive/stats")
+async def get_archive_stats(
+    current_admin: Annotated[TokenPayload, Depends(get_current_admin)]
+):
+    """
+    Get cold-session archival statistics (admin only).
+    """
+    deps.monitoring_service.increment_request_count()
+    return deps.session_service.get_archive_stats()
+
+
+@router.get("/scheduler/stats")
+async def get_scheduler_stats(
+    current_admin: Annotated[TokenPayload, Depends(get_current_admin)]
+):
+    """
+    Get fair-share inference scheduling statistics, including per-user queueing delay (admin only).
+    """
+    deps.monitoring_service.increment_request_count()
+    scheduler = deps.inference_service.scheduler
+    if scheduler is None:
+        return {"enabled": False}
+    return {"enabled": True, **scheduler.get_stats()}
+
+
+@router.get("/streaming/stats")
+async def get_streaming_stats(
+    current_admin: Annotated[TokenPayload, Depends(get_current_admin)]
+):
+    """
+    Get SSE framing statistics for streamed chat responses (admin only).
+    """
+    deps.monitoring_service.increment_request_count()
+    return deps.monitoring_service.get_stream_stats()
+
+
+@router.get("/ratelimit/stats")
+async def get_rate_limit_stats(
+    current_admin: Annotated[TokenPayload, Depends(get_current_admin)]
+):
+    """
+    Get rate limiter statistics (admin only).
+    """
+    deps.monitoring_service.increment_request_count()
+    if deps.rate_limiter is None:
+        return {"enabled": False}
+    return {"enabled": True, **deps.rate_limiter.get_stats()}
+
+
+@router.get("/auth/stats")
+async def get_auth_stats(
+    current_admin: Annotated[TokenPayload, Depends(get_current_admin)]
+):
+    """
+    Get password hashing, login throttling, token cache and revocation statistics (admin only).
+    """
+    deps.monitoring_service.increment_request_count()
+    return deps.auth_service.get_stats()
+
+
+@router.get("/retention/stats")
+async def get_retention_stats(
+    current_admin: Annotated[TokenPayload, Depends(get_current_admin)]
+):
+    """
+    Get retention purge statistics, including rows deleted and lock time (admin only).
+    """
+    deps.monitoring_service.increment_request_count()
+    return deps.retention_purger.get_stats()
+
+
+@router.post("/retention/purge")
+async def run_retention_purge(
+    current_admin: Annotated[TokenPayload, Depends(get_current_admin)]
+):
+    """
+    Purge sessions past their retention period now, in batches (admin only).
+    """
+    deps.monitoring_service.increment_request_count()
+    return await deps.retention_purger.purge()
+
+
+@router.get("/export")
+async def export_sessions(
+    current_admin: Annotated[TokenPayload, Depends(get_current_admin)],
+    include_password_hashes: bool = False
+):
+    """
+    Stream all users, sessions and messages as NDJSON (admin only).
+    Password hashes are only included with include_password_hashes=true.
+    The last line is a summary record with counts and throughput.
+    """
+    deps.monitoring_service.increment_request_count()
+    transfer = SessionTransfer(deps.session_service, settings.EXPORT_YIELD_PER, settings.IMPORT_BATCH_SIZE)
+    filename = f"pocketllm-export-{datetime.utcnow():%Y%m%d-%H%M%S}.ndjson"
+
+    return StreamingResponse(
+        transfer.export_ndjson(include_password_hashes),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@router.post("/import")
+async def import_sessions(
+    request: Request,
+    current_admin: Annotated[TokenPayload, Depends(get_current_admin)],
+    keep_admin: bool = False
+):
+    """
+    Import an NDJSON export from the request body (admin only).
+    Existing records are skipped, so an interrupted import can be re-run.
+    Imported users lose is_admin unless keep_admin=true.
+    """
+    deps.monitoring_service.increment_request_count()
+    transfer = SessionTransfer(deps.session_service, settings.EXPORT_YIELD_PER, settings.IMPORT_BATCH_SIZE)
+
+    try:
+        return await transfer.import_ndjson(request.stream(), keep_admin)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
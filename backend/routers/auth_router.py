@@ -1,23 +1,49 @@
 """Authentication API router."""
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, Request, status, Depends
+from fastapi.security import HTTPAuthorizationCredentials
 from typing import Annotated
 from schemas.auth import LoginRequest, LoginResponse, RegisterRequest, ChangePasswordRequest, ChangePasswordResponse, TokenPayload
-from utils.dependencies import get_current_user
+from auth.password_hasher import HasherBusyError
+from utils.dependencies import get_current_user, security
 import utils.dependencies as deps
+import math
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is busy, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/login", response_model=LoginResponse)
-async def login(request: LoginRequest):
+async def login(request: LoginRequest, http_request: Request):
     """
     User login endpoint.
 
-    Authenticates user and returns JWT access token.
+    Authenticates user and returns JWT access token. Failed attempts are throttled per
+    username and client IP.
     """
     deps.monitoring_service.increment_request_count()
 
-    login_response = deps.auth_service.login(request.username, request.password)
+    throttle = deps.auth_service.login_throttle
+    client_ip = http_request.client.host if http_request.client else "unknown"
+    retry_after = throttle.hit(request.username, client_ip)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please retry later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+    try:
+        login_response = await deps.auth_service.login(request.username, request.password)
+    except HasherBusyError:
+        throttle.refund(request.username, client_ip)
+        raise _hasher_busy()
 
     if not login_response:
         raise HTTPException(
@@ -26,6 +52,7 @@ async def login(request: LoginRequest):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    throttle.reset(request.username, client_ip)
     return login_response
 
 
@@ -52,7 +79,10 @@ async def register(request: RegisterRequest):
             detail="Password must be at least 6 characters long"
         )
 
-    register_response = deps.auth_service.register_user(request.username, request.password)
+    try:
+        register_response = await deps.auth_service.register_user(request.username, request.password)
+    except HasherBusyError:
+        raise _hasher_busy()
 
     if not register_response:
         raise HTTPException(
@@ -82,11 +112,14 @@ async def change_password(
             detail="New password must be at least 6 characters long"
         )
 
-    success = deps.auth_service.change_password(
-        current_user.sub,
-        request.old_password,
-        request.new_password
-    )
+    try:
+        success = await deps.auth_service.change_password(
+            current_user.sub,
+            request.old_password,
+            request.new_password
+        )
+    except HasherBusyError:
+        raise _hasher_busy()
 
     if not success:
         raise HTTPException(
@@ -100,6 +133,21 @@ async def change_password(
     )
 
 
+@router.post("/logout")
+async def logout(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    current_user: Annotated[TokenPayload, Depends(get_current_user)]
+):
+    """
+    Logout endpoint (requires authentication).
+
+    Revokes the current access token on every replica.
+    """
+    deps.monitoring_service.increment_request_count()
+    deps.auth_service.logout(credentials.credentials, current_user)
+    return {"success": True, "message": "Logged out"}
+
+
 @router.get("/test")
 async def test_auth():
     """Test endpoint to verify auth service is working."""
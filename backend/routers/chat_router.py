@@ -1,23 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
 from fastapi.responses import StreamingResponse
-from typing import Annotated, List
-from schemas.chat import ChatRequest, ChatResponse, ChatHistory
+from typing import Annotated, Dict, List, Optional
+from pydantic import ValidationError
+from schemas.chat import ChatRequest, ChatResponse, ChatHistory, SessionPage, SearchResponse
 from schemas.auth import TokenPayload
-from utils.dependencies import get_current_user
+from utils.dependencies import get_current_user, rate_limit
 from utils.prompt_builder import (
     build_prompt,
     load_system_prompt
 )
+from config import settings
 import utils.dependencies as deps
+from utils.sse import SSEWriter, WebSocketWriter, encode_json
 from datetime import datetime
+from collections import Counter
 import uuid
 import json
 import asyncio
+import itertools
+import time
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
 
-@router.post("", response_model=ChatResponse)
+def _coalesce_chunks(chunks: List[str], max_chars: int) -> List[str]:
+    """Group consecutive stream chunks into frames of up to max_chars, keeping chunk boundaries."""
+    frames = []
+    current = ""
+    for chunk in chunks:
+        if current and len(current) + len(chunk) > max_chars:
+            frames.append(current)
+            current = ""
+        current += chunk
+    if current:
+        frames.append(current)
+    return frames
+
+
+@router.post("", response_model=ChatResponse, dependencies=[Depends(rate_limit("chat"))])
 async def send_message(
     request: ChatRequest,
     current_user: Annotated[TokenPayload, Depends(get_current_user)]
@@ -26,15 +46,22 @@ async def send_message(
 
     session_id = request.session_id
     if not session_id:
-        session_id = deps.session_service.create_session(current_user.sub)
+        session_id = await deps.session_service.create_session(current_user.sub)
     else:
-        session = deps.session_service.get_session(session_id)
-        if not session:
+        owner_id = await deps.session_service.get_session_owner(session_id)
+        if not owner_id:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
-        if session.user_id != current_user.sub:
+        if owner_id != current_user.sub:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied to this session")
 
-    deps.session_service.add_message(
+    # Only keep recent conversation history (read before adding the new message)
+    summary = None
+    if deps.summarizer is not None:
+        summary, conversation_history = await deps.summarizer.build_context(session_id)
+    else:
+        conversation_history = await deps.session_service.get_recent_messages(session_id, limit=3)
+
+    await deps.session_service.add_message(
         session_id=session_id,
         user_id=current_user.sub,
         role="user",
@@ -42,27 +69,24 @@ async def send_message(
         tokens_used=None
     )
 
-    session = deps.session_service.get_session(session_id)
-    conversation_history = session.messages if session else []
-
-    # Only keep recent conversation history
-    conversation_history = conversation_history[:-1][-3:]
-
     system_prompt = load_system_prompt("prompt.txt")
-    formatted_prompt = build_prompt(conversation_history, system_prompt, request.prompt)
+    formatted_prompt = build_prompt(conversation_history, system_prompt, request.prompt, summary=summary)
 
     # Use plain text (user's original input) as cache key, but send formatted prompt to LLM
-    response_text, cached = deps.inference_service.infer(
+    response_text, cached = await deps.inference_service.infer(
         prompt=formatted_prompt,
         max_tokens=request.max_tokens,
         temperature=request.temperature,
         use_cache=True,
-        cache_key=request.prompt  # Cache based on plain text only
+        cache_key=request.prompt,  # Cache based on plain text only
+        user_id=current_user.sub,
+        priority=request.priority,
+        is_admin=current_user.is_admin
     )
 
     tokens_used = len(response_text.split())
 
-    deps.session_service.add_message(
+    await deps.session_service.add_message(
         session_id=session_id,
         user_id=current_user.sub,
         role="assistant",
@@ -80,31 +104,69 @@ async def send_message(
     )
 
 
-@router.get("/history", response_model=List[ChatHistory])
-async def get_history(current_user: Annotated[TokenPayload, Depends(get_current_user)]):
+@router.get("/history", response_model=SessionPage, dependencies=[Depends(rate_limit("read"))])
+async def get_history(
+    current_user: Annotated[TokenPayload, Depends(get_current_user)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: Optional[str] = None
+):
+    deps.monitoring_service.increment_request_count()
+    try:
+        sessions, next_cursor = await deps.session_service.list_user_sessions(current_user.sub, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return SessionPage(sessions=sessions, next_cursor=next_cursor)
+
+
+@router.get("/search", response_model=SearchResponse, dependencies=[Depends(rate_limit("read"))])
+async def search_history(
+    current_user: Annotated[TokenPayload, Depends(get_current_user)],
+    q: Annotated[str, Query(min_length=1, max_length=500)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    offset: Annotated[int, Query(ge=0, le=10000)] = 0
+):
+    """
+    Search the current user's messages. Results are ranked by relevance, with
+    matched terms wrapped in <mark></mark> in each snippet. Messages of archived
+    sessions are not searched; archived_sessions reports how many there are.
+    """
     deps.monitoring_service.increment_request_count()
-    sessions = deps.session_service.get_user_sessions(current_user.sub)
-    return sessions
+    results, next_offset = await deps.session_service.search_messages(current_user.sub, q, limit=limit, offset=offset)
+    archived_sessions = await deps.session_service.count_archived_sessions(current_user.sub)
+    return SearchResponse(query=q, results=results, next_offset=next_offset, archived_sessions=archived_sessions)
 
 
-@router.get("/history/{session_id}", response_model=ChatHistory)
-async def get_session_history(session_id: str, current_user: Annotated[TokenPayload, Depends(get_current_user)]):
+@router.get("/history/{session_id}", response_model=ChatHistory, dependencies=[Depends(rate_limit("read"))])
+async def get_session_history(
+    session_id: str,
+    current_user: Annotated[TokenPayload, Depends(get_current_user)],
+    limit: Annotated[Optional[int], Query(ge=1, le=500)] = None,
+    before: Optional[str] = None
+):
     deps.monitoring_service.increment_request_count()
-    session = deps.session_service.get_session(session_id)
 
-    if not session:
+    owner_id = await deps.session_service.get_session_owner(session_id)
+    if not owner_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
 
-    if session.user_id != current_user.sub:
+    if owner_id != current_user.sub:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
 
+    try:
+        session = await deps.session_service.get_session(session_id, limit=limit, before=before)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if not session:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+
     return session
 
 
-@router.delete("/history/{session_id}")
+@router.delete("/history/{session_id}", dependencies=[Depends(rate_limit("read"))])
 async def delete_session(session_id: str, current_user: Annotated[TokenPayload, Depends(get_current_user)]):
     deps.monitoring_service.increment_request_count()
-    success = deps.session_service.delete_session(session_id, current_user.sub)
+    success = await deps.session_service.delete_session(session_id, current_user.sub)
 
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
@@ -112,36 +174,44 @@ async def delete_session(session_id: str, current_user: Annotated[TokenPayload,
     return {"message": "Session deleted successfully"}
 
 
-@router.post("/stream")
-async def send_message_stream(
+async def _prepare_turn(
     request: ChatRequest,
-    current_user: Annotated[TokenPayload, Depends(get_current_user)]
-):
-    deps.monitoring_service.increment_request_count()
-    
-    print(f"[DEBUG] Stream request from user: {current_user.username} (ID: {current_user.sub})")
-    print(f"[DEBUG] Request session_id: {request.session_id}")
-
+    current_user: TokenPayload,
+    known_sessions: Optional[set] = None
+) -> tuple[str, str]:
+    """
+    Resolve the session for a streamed turn, save the user message and build the prompt.
+
+    Sessions in known_sessions were already checked to belong to the user and are not
+    checked again; sessions resolved here are added to it. Returns (session_id, prompt).
+    """
     # FIX: Ensure session_id is properly initialized
     session_id = request.session_id
     if not session_id:
         # Create new session for this user
-        session_id = deps.session_service.create_session(current_user.sub)
+        session_id = await deps.session_service.create_session(current_user.sub)
         print(f"[DEBUG] Created new session: {session_id}")
-    else:
+    elif known_sessions is None or session_id not in known_sessions:
         # Validate existing session ownership
-        session = deps.session_service.get_session(session_id)
-        if not session:
+        owner_id = await deps.session_service.get_session_owner(session_id)
+        if not owner_id:
             print(f"[ERROR] Session not found: {session_id}")
             raise HTTPException(status_code=404, detail="Session not found")
-        if session.user_id != current_user.sub:
-            print(f"[ERROR] Access denied - session owner: {session.user_id}, requester: {current_user.sub}")
+        if owner_id != current_user.sub:
+            print(f"[ERROR] Access denied - session owner: {owner_id}, requester: {current_user.sub}")
             raise HTTPException(status_code=403, detail="Access denied to this session")
         print(f"[DEBUG] Validated existing session: {session_id}")
 
+    # Get conversation history (before the message we are about to add)
+    summary = None
+    if deps.summarizer is not None:
+        summary, conversation_history = await deps.summarizer.build_context(session_id)
+    else:
+        conversation_history = await deps.session_service.get_recent_messages(session_id, limit=5)
+
     # FIX: Add user message BEFORE streaming starts
     try:
-        deps.session_service.add_message(
+        await deps.session_service.add_message(
             session_id=session_id,
             user_id=current_user.sub,
             role="user",
@@ -157,103 +227,342 @@ async def send_message_stream(
         print(f"[ERROR] Unexpected error adding user message: {type(e).__name__}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to save message: {str(e)}")
 
-    # Get conversation history (excluding the message we just added)
-    session = deps.session_service.get_session(session_id)
-    conversation_history = session.messages if session else []
-    conversation_history = conversation_history[:-1][-5:]
-
     system_prompt = load_system_prompt("prompt.txt")
-    formatted_prompt = build_prompt(conversation_history, system_prompt, request.prompt)
+    formatted_prompt = build_prompt(conversation_history, system_prompt, request.prompt, summary=summary)
+    if known_sessions is not None:
+        known_sessions.add(session_id)
+    return session_id, formatted_prompt
 
-    async def generate_stream():
-        full_response = ""
-        message_id = str(uuid.uuid4())
-        cached = False
 
-        try:
-            print(f"[DEBUG] Starting stream generation for session {session_id}")
-            yield f"data: {json.dumps({'type': 'start', 'session_id': session_id, 'message_id': message_id})}\n\n"
+async def _stream_turn(
+    writer: SSEWriter,
+    request: ChatRequest,
+    current_user: TokenPayload,
+    session_id: str,
+    formatted_prompt: str,
+    message_id: str
+):
+    """Generate the reply for one turn, yielding frames encoded by writer."""
+    full_response = ""
+    cached = False
 
-            # Use plain text (user's original input) as cache key instead of formatted_prompt
-            cache_key = request.prompt
+    try:
+        print(f"[DEBUG] Starting stream generation for session {session_id}")
+        yield writer.event({'type': 'start', 'session_id': session_id, 'message_id': message_id})
 
-            cached_response = deps.cache_manager.get(
-                cache_key,
-                max_tokens=request.max_tokens,
-                temperature=request.temperature
-            )
+        # Use plain text (user's original input) as cache key instead of formatted_prompt
+        cache_key = request.prompt
 
-            if cached_response:
-                print(f"[DEBUG] Using cached response for session {session_id}")
-                cached = True
-                full_response = cached_response
-                for i, word in enumerate(cached_response.split(' ')):
-                    token = word if i == 0 else ' ' + word
-                    yield f"data: {json.dumps({'type': 'token', 'content': token})}\n\n"
-                    await asyncio.sleep(0.01)
-            else:
-                print(f"[DEBUG] Generating new response for session {session_id}")
-                try:
-                    token_stream = deps.inference_service.stream_infer(
-                        prompt=formatted_prompt,
+        cached_chunks = deps.cache_manager.get_chunks(
+            cache_key,
+            max_tokens=request.max_tokens,
+            temperature=request.temperature
+        )
+
+        if cached_chunks:
+            print(f"[DEBUG] Using cached response for session {session_id}")
+            cached = True
+            full_response = "".join(cached_chunks)
+            delay = settings.CACHE_REPLAY_DELAY_MS / 1000
+            for frame in _coalesce_chunks(cached_chunks, settings.CACHE_REPLAY_FRAME_CHARS):
+                yield writer.event({'type': 'token', 'content': frame})
+                if delay > 0:
+                    await asyncio.sleep(delay)
+        else:
+            print(f"[DEBUG] Generating new response for session {session_id}")
+            generation_start = time.perf_counter()
+            try:
+                token_stream = deps.inference_service.stream_infer(
+                    prompt=formatted_prompt,
+                    max_tokens=request.max_tokens,
+                    temperature=request.temperature,
+                    user_id=current_user.sub,
+                    priority=request.priority,
+                    is_admin=current_user.is_admin
+                )
+
+                chunks = []
+                async for frame in writer.frames_from(token_stream, chunks):
+                    yield frame
+                full_response = "".join(chunks)
+
+                print(f"[DEBUG] Generated {len(chunks)} tokens for session {session_id}")
+
+                if full_response:
+                    # Cache using plain text as key
+                    deps.cache_manager.set(
+                        cache_key,  # cache_key is already set to request.prompt
+                        full_response,
+                        chunks=chunks,
+                        generation_ms=(time.perf_counter() - generation_start) * 1000,
+                        tokens=len(chunks),
                         max_tokens=request.max_tokens,
                         temperature=request.temperature
                     )
 
-                    token_count = 0
-                    for token in token_stream:
-                        if token:
-                            full_response += token
-                            token_count += 1
-                            yield f"data: {json.dumps({'type': 'token', 'content': token})}\n\n"
-                            await asyncio.sleep(0)
-                    
-                    print(f"[DEBUG] Generated {token_count} tokens for session {session_id}")
-
-                    if full_response:
-                        # Cache using plain text as key
-                        deps.cache_manager.set(
-                            cache_key,  # cache_key is already set to request.prompt
-                            full_response,
-                            max_tokens=request.max_tokens,
-                            temperature=request.temperature
-                        )
-
-                except Exception as e:
-                    error_msg = f"Generation error: {type(e).__name__}: {str(e)}"
-                    print(f"[ERROR] {error_msg}")
-                    yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
-                    return
-
-            # FIX: Add assistant message with proper error handling
-            try:
-                tokens_used = len(full_response.split())
-                deps.session_service.add_message(
-                    session_id=session_id,
-                    user_id=current_user.sub,  # Use current_user.sub consistently
-                    role="assistant",
-                    content=full_response,
-                    tokens_used=tokens_used
-                )
-                print(f"[DEBUG] Saved assistant message to session {session_id}")
-            except ValueError as e:
-                # Log error but don't fail the stream
-                print(f"[WARNING] Failed to save assistant message: {str(e)}")
             except Exception as e:
-                print(f"[ERROR] Unexpected error saving assistant message: {type(e).__name__}: {str(e)}")
+                error_msg = f"Generation error: {type(e).__name__}: {str(e)}"
+                print(f"[ERROR] {error_msg}")
+                yield writer.event({'type': 'error', 'message': str(e)})
+                return
 
-            yield f"data: {json.dumps({'type': 'done', 'tokens_used': len(full_response.split()), 'cached': cached, 'timestamp': datetime.utcnow().isoformat()})}\n\n"
-            print(f"[DEBUG] Stream completed for session {session_id}")
-            
+        # FIX: Add assistant message with proper error handling
+        try:
+            tokens_used = len(full_response.split())
+            await deps.session_service.add_message(
+                session_id=session_id,
+                user_id=current_user.sub,  # Use current_user.sub consistently
+                role="assistant",
+                content=full_response,
+                tokens_used=tokens_used
+            )
+            print(f"[DEBUG] Saved assistant message to session {session_id}")
+        except ValueError as e:
+            # Log error but don't fail the stream
+            print(f"[WARNING] Failed to save assistant message: {str(e)}")
         except Exception as e:
-            error_msg = f"Stream error: {type(e).__name__}: {str(e)}"
-            print(f"[ERROR] {error_msg}")
-            import traceback
-            traceback.print_exc()
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+            print(f"[ERROR] Unexpected error saving assistant message: {type(e).__name__}: {str(e)}")
+
+        yield writer.event({
+            'type': 'done',
+            'tokens_used': len(full_response.split()),
+            'cached': cached,
+            'frames': writer.frames,
+            'bytes': writer.bytes,
+            'timestamp': datetime.utcnow().isoformat()
+        })
+        deps.monitoring_service.record_stream(writer.frames, writer.bytes)
+        print(f"[DEBUG] Stream completed for session {session_id}")
+        
+    except Exception as e:
+        error_msg = f"Stream error: {type(e).__name__}: {str(e)}"
+        print(f"[ERROR] {error_msg}")
+        import traceback
+        traceback.print_exc()
+        yield writer.event({'type': 'error', 'message': str(e)})
+
+
+@router.post("/stream", dependencies=[Depends(rate_limit("chat"))])
+async def send_message_stream(
+    request: ChatRequest,
+    current_user: Annotated[TokenPayload, Depends(get_current_user)]
+):
+    deps.monitoring_service.increment_request_count()
+    
+    print(f"[DEBUG] Stream request from user: {current_user.username} (ID: {current_user.sub})")
+    print(f"[DEBUG] Request session_id: {request.session_id}")
+
+    session_id, formatted_prompt = await _prepare_turn(request, current_user)
+    writer = SSEWriter(settings.STREAM_FLUSH_MS, settings.STREAM_FLUSH_CHARS)
 
     return StreamingResponse(
-        generate_stream(),
+        _stream_turn(writer, request, current_user, session_id, formatted_prompt, str(uuid.uuid4())),
         media_type="text/event-stream",
         headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
-    )
\ No newline at end of file
+    )
+
+
+class _ChatConnection:
+    """
+    One /chat/ws connection: the authenticated user, the sessions already verified as
+    theirs, the generations in flight and the queue of outgoing frames.
+
+    Generations put frames on the queue and a single sender drains it. Generation frames
+    take one of WS_SEND_QUEUE_FRAMES slots, so a client that reads slowly pauses its own
+    generations. Replies to client messages (pong, cancelled, errors) skip the slots and
+    are sent ahead of generation frames, so handling a message never waits on the queue;
+    instead the next message is not read while WS_SEND_QUEUE_FRAMES replies are unsent.
+    """
+
+    REPLY = 0
+    FRAME = 1
+
+    def __init__(self, websocket: WebSocket, token: str, current_user: TokenPayload):
+        self.websocket = websocket
+        self.token = token
+        self.current_user = current_user
+        self.known_sessions: set = set()
+        self.generations: Dict[str, asyncio.Task] = {}
+        self.outbox: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self.frame_slots = asyncio.Semaphore(settings.WS_SEND_QUEUE_FRAMES)
+        self.queued_replies = 0
+        self._reply_sent = asyncio.Event()
+        self._order = itertools.count()  # Keeps FIFO order within a priority
+        self._queued_frames: Counter = Counter()  # message_id -> frames in the outbox
+        self._cancelled_at: Dict[str, tuple] = {}  # message_id -> (order of its cancel, its task)
+
+    def reply(self, payload: dict):
+        """Queue a reply ahead of generation frames, without waiting."""
+        self.queued_replies += 1
+        self.outbox.put_nowait((self.REPLY, next(self._order), None, encode_json(payload)))
+
+    async def wait_for_reply_room(self):
+        """Wait while the client has WS_SEND_QUEUE_FRAMES unsent replies."""
+        while self.queued_replies >= settings.WS_SEND_QUEUE_FRAMES:
+            self._reply_sent.clear()
+            await self._reply_sent.wait()
+
+    async def put_frame(self, message_id: str, frame: bytes):
+        """Queue a generation frame, waiting while the client is WS_SEND_QUEUE_FRAMES behind."""
+        await self.frame_slots.acquire()
+        self._queued_frames[message_id] += 1
+        self.outbox.put_nowait((self.FRAME, next(self._order), message_id, frame))
+
+    def _forget_cancel(self, message_id: str):
+        """Drop a cancel mark once its generation has stopped and none of its frames are queued."""
+        cancel = self._cancelled_at.get(message_id)
+        if cancel is not None and cancel[1].done() and not self._queued_frames[message_id]:
+            del self._cancelled_at[message_id]
+
+    async def run_sender(self):
+        while True:
+            priority, order, message_id, frame = await self.outbox.get()
+            # Frames queued before a cancel would otherwise follow its "cancelled" reply
+            cancel = self._cancelled_at.get(message_id)
+            if cancel is None or order > cancel[0]:
+                await self.websocket.send_text(frame.decode("utf-8"))
+            if priority == self.REPLY:
+                self.queued_replies -= 1
+                self._reply_sent.set()
+            else:
+                self.frame_slots.release()
+                self._queued_frames[message_id] -= 1
+                if not self._queued_frames[message_id]:
+                    del self._queued_frames[message_id]
+                    self._forget_cancel(message_id)
+            self.outbox.task_done()
+
+    def handle(self, message: dict) -> bool:
+        """Handle one client message without blocking. Returns False when the connection should close."""
+        message_type = message.get("type")
+        message_id = message.get("message_id")
+
+        if message_type == "ping":
+            self.reply({"type": "pong"})
+        elif message_type == "cancel":
+            task = self.generations.pop(message_id, None)
+            if task is None:
+                self.reply({"type": "error", "message_id": message_id, "message": "No such generation"})
+            else:
+                task.cancel()
+                self._cancelled_at[message_id] = (next(self._order), task)
+                task.add_done_callback(lambda _: self._forget_cancel(message_id))
+                self.reply({"type": "cancelled", "message_id": message_id})
+        elif message_type == "chat":
+            # Cheap after the first verification; picks up expiry, logout and revocation
+            if deps.auth_service.verify_token(self.token) is None:
+                self.reply({"type": "error", "message_id": message_id, "message": "Invalid authentication credentials"})
+                return False
+            self.start_generation(message_id or str(uuid.uuid4()), message)
+        else:
+            self.reply({"type": "error", "message_id": message_id, "message": f"Unknown message type: {message_type}"})
+        return True
+
+    def start_generation(self, message_id: str, message: dict):
+        if message_id in self.generations:
+            self.reply({"type": "error", "message_id": message_id, "message": "Duplicate message_id"})
+            return
+        if len(self.generations) >= settings.WS_MAX_GENERATIONS:
+            self.reply({"type": "error", "message_id": message_id, "message": "Too many concurrent generations"})
+            return
+
+        try:
+            request = ChatRequest.model_validate(message)
+        except ValidationError as e:
+            self.reply({"type": "error", "message_id": message_id, "message": str(e)})
+            return
+
+        if deps.rate_limiter is not None:
+            decision = deps.rate_limiter.check("chat", self.current_user.sub)
+            if not decision.allowed:
+                self.reply({
+                    "type": "error",
+                    "message_id": message_id,
+                    "message": "Rate limit exceeded",
+                    "retry_after": decision.retry_after
+                })
+                return
+
+        deps.monitoring_service.increment_request_count()
+        self.generations[message_id] = asyncio.create_task(self.generate(message_id, request))
+
+    async def generate(self, message_id: str, request: ChatRequest):
+        try:
+            try:
+                session_id, formatted_prompt = await _prepare_turn(request, self.current_user, self.known_sessions)
+            except HTTPException as e:
+                await self.put_frame(message_id, encode_json({"type": "error", "message_id": message_id, "message": e.detail}))
+                return
+
+            writer = WebSocketWriter(settings.STREAM_FLUSH_MS, settings.STREAM_FLUSH_CHARS, message_id)
+            async for frame in _stream_turn(writer, request, self.current_user, session_id, formatted_prompt, message_id):
+                await self.put_frame(message_id, frame)
+        finally:
+            if self.generations.get(message_id) is asyncio.current_task():
+                del self.generations[message_id]
+
+    async def close(self):
+        tasks = list(self.generations.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _client_message(received: dict) -> tuple[Optional[dict], Optional[str]]:
+    """Decode a received WebSocket frame into a JSON object, or an error to reply with."""
+    if received.get("text") is None:
+        return None, "Binary frames are not supported"
+    try:
+        message = json.loads(received["text"])
+    except ValueError:
+        return None, "Invalid JSON"
+    if not isinstance(message, dict):
+        return None, "Expected a JSON object"
+    return message, None
+
+
+@router.websocket("/ws")
+async def chat_websocket(websocket: WebSocket, token: Optional[str] = Query(None)):
+    """
+    Multiplexed streaming chat over one WebSocket.
+
+    The token (query parameter or Authorization header) is verified once at connect;
+    session ownership is checked once per session. Client messages:
+    {"type": "chat", "prompt", "message_id"?, "session_id"?, ...ChatRequest fields},
+    {"type": "cancel", "message_id"} and {"type": "ping"}, as text frames; binary frames
+    get an error reply. Server frames are the SSE events of /chat/stream, each tagged
+    with its message_id, plus "cancelled" and "pong".
+    """
+    if token is None:
+        authorization = websocket.headers.get("authorization", "")
+        if authorization.lower().startswith("bearer "):
+            token = authorization[7:]
+    current_user = deps.auth_service.verify_token(token) if token else None
+    if current_user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    print(f"[DEBUG] WebSocket connected for user: {current_user.username} (ID: {current_user.sub})")
+    connection = _ChatConnection(websocket, token, current_user)
+    sender = asyncio.create_task(connection.run_sender())
+    try:
+        while True:
+            await connection.wait_for_reply_room()
+            received = await websocket.receive()
+            if received["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(received.get("code", status.WS_1000_NORMAL_CLOSURE))
+
+            message, error = _client_message(received)
+            if error is not None:
+                connection.reply({"type": "error", "message": error})
+            elif not connection.handle(message):
+                await connection.outbox.join()
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+                break
+    except WebSocketDisconnect:
+        print(f"[DEBUG] WebSocket disconnected for user: {current_user.username}")
+    finally:
+        await connection.close()
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
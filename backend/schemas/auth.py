@@ -24,6 +24,7 @@ class TokenPayload(BaseModel):
     username: str
     is_admin: bool
     exp: int  # expiration timestamp
+    iat: Optional[float] = None  # issue timestamp (checked against password-change revocations)
 
 
 class User(BaseModel):
@@ -1,6 +1,6 @@
 """Chat schemas."""
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 
@@ -21,6 +21,7 @@ class ChatRequest(BaseModel):
     session_id: Optional[str] = None
     max_tokens: Optional[int] = None
     temperature: Optional[float] = None
+    priority: Literal["interactive", "batch"] = "interactive"  # Scheduling class of the generation
 
 
 class ChatResponse(BaseModel):
@@ -40,3 +41,39 @@ class ChatHistory(BaseModel):
     messages: List[ChatMessage]
     created_at: datetime
     updated_at: datetime
+    next_cursor: Optional[str] = None  # Cursor for older messages when paginated
+
+
+class SessionSummary(BaseModel):
+    """Session summary schema for history listings."""
+    session_id: str
+    user_id: str
+    created_at: datetime
+    updated_at: datetime
+    message_count: int
+    title: Optional[str] = None  # Preview of the first user message
+    last_message_preview: Optional[str] = None
+
+
+class SessionPage(BaseModel):
+    """Page of session summaries."""
+    sessions: List[SessionSummary]
+    next_cursor: Optional[str] = None
+
+
+class SearchResult(BaseModel):
+    """Message matching a search query."""
+    message_id: str
+    session_id: str
+    role: str
+    snippet: str  # Excerpt with matched terms wrapped in <mark></mark>
+    timestamp: datetime
+    score: float  # Higher is more relevant
+
+
+class SearchResponse(BaseModel):
+    """Page of search results."""
+    query: str
+    results: List[SearchResult]
+    next_offset: Optional[int] = None
+    archived_sessions: int = 0  # Archived sessions of the user, whose messages are not searched
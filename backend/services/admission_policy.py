@@ -0,0 +1,111 @@
+"""Frequency-based cache admission policy (TinyLFU) backed by a decaying count-min sketch."""
+from typing import Optional
+import hashlib
+
+
+class FrequencySketch:
+    """
+    Count-min sketch with small saturating counters and periodic aging.
+
+    Each key maps to one counter per row; the estimate is the minimum across rows.
+    After sample_size increments every counter is halved, so the sketch reflects
+    recent popularity rather than all-time counts.
+    """
+
+    MAX_COUNT = 15  # 4-bit saturating counters, as in TinyLFU
+
+    def __init__(self, width: int, depth: int = 4, sample_size: int = 100000):
+        """Initialize sketch with depth rows of width counters each."""
+        self.width = width
+        self.depth = depth
+        self.sample_size = sample_size
+        self.rows = [bytearray(width) for _ in range(depth)]
+        self.additions = 0
+        self.resets = 0
+
+    def _indexes(self, key: str) -> list[int]:
+        """Derive one counter index per row using double hashing."""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        h = int.from_bytes(digest, "little")
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def increment(self, key: str):
+        """Record one occurrence of a key."""
+        for row, index in zip(self.rows, self._indexes(key)):
+            if row[index] < self.MAX_COUNT:
+                row[index] += 1
+
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._reset()
+
+    def estimate(self, key: str) -> int:
+        """Estimate how often a key occurred in the recent window."""
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+    def _reset(self):
+        """Halve all counters to age out old popularity."""
+        for i, row in enumerate(self.rows):
+            self.rows[i] = bytearray(count >> 1 for count in row)
+        self.additions //= 2
+        self.resets += 1
+
+    def clear(self):
+        """Reset all counters."""
+        self.rows = [bytearray(self.width) for _ in range(self.depth)]
+        self.additions = 0
+
+
+class AdmissionPolicy:
+    """Decides whether new cache entries are worth storing based on recent access frequency."""
+
+    def __init__(self, min_frequency: int, sketch_width: int, sample_size: int):
+        """Initialize admission policy."""
+        self.min_frequency = min_frequency
+        self.sketch = FrequencySketch(sketch_width, sample_size=sample_size)
+
+        # Statistics
+        self.admitted = 0
+        self.rejected = 0
+
+    def record_access(self, key: str):
+        """Record a lookup for a key, whether it hit or missed."""
+        self.sketch.increment(key)
+
+    def admit(self, key: str, victim: Optional[str] = None) -> bool:
+        """
+        Decide whether a new entry should be stored.
+
+        The key must have been requested at least min_frequency times recently and,
+        when storing it would evict a victim, be more popular than that victim.
+        """
+        frequency = self.sketch.estimate(key)
+        admitted = frequency >= self.min_frequency
+        if admitted and victim is not None:
+            admitted = frequency > self.sketch.estimate(victim)
+
+        if admitted:
+            self.admitted += 1
+        else:
+            self.rejected += 1
+        return admitted
+
+    def reset_stats(self):
+        """Reset admission counters."""
+        self.admitted = 0
+        self.rejected = 0
+
+    def get_stats(self) -> dict:
+        """Get admission statistics."""
+        total = self.admitted + self.rejected
+        admission_rate = (self.admitted / total * 100) if total > 0 else 0
+
+        return {
+            "min_frequency": self.min_frequency,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "admission_rate": round(admission_rate, 2),
+            "sketch_resets": self.sketch.resets
+        }
@@ -0,0 +1,112 @@
+"""Hot-key tracking and windowed savings analytics for the LLM cache."""
+from collections import deque
+from typing import Optional
+import time
+
+
+class SpaceSavingTopK:
+    """
+    Space-saving heavy-hitter tracker keeping at most k counters.
+
+    When a new key arrives and the table is full, it replaces the key with the smallest
+    count and inherits that count as its error bound.
+    """
+
+    def __init__(self, k: int):
+        """Initialize tracker with capacity k."""
+        self.k = k
+        self.counters: dict[str, list] = {}  # key -> [count, error, label]
+
+    def add(self, key: str, label: str):
+        """Record one occurrence of a key."""
+        counter = self.counters.get(key)
+        if counter is not None:
+            counter[0] += 1
+            return
+
+        if len(self.counters) < self.k:
+            self.counters[key] = [1, 0, label]
+            return
+
+        min_key = min(self.counters, key=lambda k: self.counters[k][0])
+        min_count = self.counters.pop(min_key)[0]
+        self.counters[key] = [min_count + 1, min_count, label]
+
+    def top(self, n: int) -> list[dict]:
+        """Return the n most frequent keys with their counts and error bounds."""
+        ranked = sorted(self.counters.items(), key=lambda item: item[1][0], reverse=True)[:n]
+        return [
+            {"key": key, "prompt": label, "count": count, "error": error}
+            for key, (count, error, label) in ranked
+        ]
+
+    def clear(self):
+        """Remove all counters."""
+        self.counters.clear()
+
+
+class CacheAnalytics:
+    """Tracks hot keys, windowed hit rates and the compute time saved by cache hits."""
+
+    def __init__(self, top_k: int, window_seconds: int, num_windows: int):
+        """Initialize analytics with a top-K tracker and a ring of fixed-length windows."""
+        self.hot_keys = SpaceSavingTopK(top_k)
+        self.window_seconds = window_seconds
+        self.windows: deque = deque(maxlen=num_windows)
+
+        # Lifetime savings
+        self.saved_ms = 0
+        self.saved_tokens = 0
+
+    def _current_window(self) -> dict:
+        """Return the bucket for the current window, starting a new one if needed."""
+        start = int(time.time()) // self.window_seconds * self.window_seconds
+        if not self.windows or self.windows[-1]["start"] != start:
+            self.windows.append({"start": start, "hits": 0, "misses": 0, "saved_ms": 0, "saved_tokens": 0})
+        return self.windows[-1]
+
+    def record_hit(self, key: str, prompt: str, cost: Optional[tuple[int, int]]):
+        """Record a cache hit and the generation cost it avoided."""
+        window = self._current_window()
+        window["hits"] += 1
+        if cost is not None:
+            generation_ms, tokens = cost
+            window["saved_ms"] += generation_ms
+            window["saved_tokens"] += tokens
+            self.saved_ms += generation_ms
+            self.saved_tokens += tokens
+
+        self.hot_keys.add(key, prompt[:100])
+
+    def record_miss(self):
+        """Record a cache miss."""
+        self._current_window()["misses"] += 1
+
+    def clear(self):
+        """Reset all analytics."""
+        self.hot_keys.clear()
+        self.windows.clear()
+        self.saved_ms = 0
+        self.saved_tokens = 0
+
+    def get_stats(self, top_n: int = 10) -> dict:
+        """Get hot keys, per-window hit rates and savings."""
+        windows = []
+        for window in self.windows:
+            total = window["hits"] + window["misses"]
+            windows.append({
+                "start": window["start"],
+                "hits": window["hits"],
+                "misses": window["misses"],
+                "hit_rate": round(window["hits"] / total * 100, 2) if total > 0 else 0,
+                "compute_seconds_saved": round(window["saved_ms"] / 1000, 3),
+                "tokens_saved": window["saved_tokens"]
+            })
+
+        return {
+            "window_seconds": self.window_seconds,
+            "windows": windows,
+            "compute_seconds_saved": round(self.saved_ms / 1000, 3),
+            "tokens_saved": self.saved_tokens,
+            "hot_keys": self.hot_keys.top(top_n)
+        }
@@ -0,0 +1,148 @@
+"""Versioned storage format for cached LLM responses with size-aware compression."""
+from typing import Optional, List
+import json
+import struct
+import time
+import zlib
+
+# Header of versioned values: magic bytes, format version, flags
+FORMAT_MAGIC = b"\x00PL"
+FORMAT_VERSION = 2  # 2 adds the optional generation cost header (FLAG_COST)
+SUPPORTED_VERSIONS = (1, 2)
+FLAG_COMPRESSED = 0x01
+FLAG_CHUNKED = 0x02
+FLAG_COST = 0x04  # Version 2 only
+
+# Generation cost recorded with an entry: milliseconds, tokens
+_COST = struct.Struct("<II")
+
+# Prefix used by unversioned values that carried stream chunk boundaries
+LEGACY_CHUNKED_PREFIX = "\x01"
+
+
+class CacheCodec:
+    """Encodes responses into the versioned cache format, compressing values above a size threshold."""
+
+    def __init__(self, min_compress_bytes: int, level: int):
+        """Initialize codec with compression threshold and zlib level."""
+        self.min_compress_bytes = min_compress_bytes
+        self.level = level
+
+        # Statistics
+        self.encoded = 0
+        self.compressed = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self.compress_seconds = 0.0
+        self.decompress_seconds = 0.0
+
+    def encode(
+        self,
+        response: str,
+        chunks: Optional[List[str]] = None,
+        cost: Optional[tuple[float, int]] = None
+    ) -> bytes:
+        """Encode a response, keeping stream chunk boundaries and generation cost (ms, tokens) when given."""
+        flags = 0
+        if chunks and "".join(chunks) == response:
+            flags |= FLAG_CHUNKED
+            payload = json.dumps({"text": response, "chunks": [len(c) for c in chunks]}).encode("utf-8")
+        else:
+            payload = response.encode("utf-8")
+
+        raw_size = len(payload)
+        if raw_size >= self.min_compress_bytes:
+            start = time.perf_counter()
+            compressed = zlib.compress(payload, self.level)
+            self.compress_seconds += time.perf_counter() - start
+
+            # Keep the raw payload if compression does not pay off
+            if len(compressed) < raw_size:
+                payload = compressed
+                flags |= FLAG_COMPRESSED
+                self.compressed += 1
+
+        cost_bytes = b""
+        if cost is not None:
+            flags |= FLAG_COST
+            cost_bytes = _COST.pack(max(0, int(cost[0])), max(0, int(cost[1] or 0)))
+
+        value = FORMAT_MAGIC + bytes([FORMAT_VERSION, flags]) + cost_bytes + payload
+        self.encoded += 1
+        self.raw_bytes += raw_size
+        self.stored_bytes += len(value)
+        return value
+
+    def decode(self, value: bytes | str) -> tuple[str, Optional[List[str]], Optional[tuple[int, int]]]:
+        """Decode a stored value into its text, stream chunks and generation cost (if recorded)."""
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+
+        if not value.startswith(FORMAT_MAGIC):
+            return self._decode_legacy(value.decode("utf-8"))
+
+        header_size = len(FORMAT_MAGIC) + 2
+        version, flags = value[len(FORMAT_MAGIC)], value[len(FORMAT_MAGIC) + 1]
+        if version not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Unsupported cache value format version {version}")
+
+        cost = None
+        if version >= 2 and flags & FLAG_COST:
+            cost = _COST.unpack_from(value, header_size)
+            header_size += _COST.size
+
+        payload = value[header_size:]
+        if flags & FLAG_COMPRESSED:
+            start = time.perf_counter()
+            payload = zlib.decompress(payload)
+            self.decompress_seconds += time.perf_counter() - start
+
+        if not flags & FLAG_CHUNKED:
+            return payload.decode("utf-8"), None, cost
+
+        data = json.loads(payload)
+        return data["text"], self._split(data["text"], data["chunks"]), cost
+
+    def _decode_legacy(self, raw: str) -> tuple[str, Optional[List[str]], None]:
+        """Decode values written before the versioned format was introduced."""
+        if not raw.startswith(LEGACY_CHUNKED_PREFIX):
+            return raw, None, None
+
+        data = json.loads(raw[len(LEGACY_CHUNKED_PREFIX):])
+        return data["text"], self._split(data["text"], data["chunks"]), None
+
+    @staticmethod
+    def _split(text: str, lengths: List[int]) -> List[str]:
+        """Split text into chunks of the given lengths."""
+        chunks = []
+        offset = 0
+        for length in lengths:
+            chunks.append(text[offset:offset + length])
+            offset += length
+        return chunks
+
+    def reset_stats(self):
+        """Reset codec statistics."""
+        self.encoded = 0
+        self.compressed = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self.compress_seconds = 0.0
+        self.decompress_seconds = 0.0
+
+    def get_stats(self) -> dict:
+        """Get compression statistics."""
+        ratio = (self.raw_bytes / self.stored_bytes) if self.stored_bytes > 0 else 1.0
+
+        return {
+            "format_version": FORMAT_VERSION,
+            "min_compress_bytes": self.min_compress_bytes,
+            "values_encoded": self.encoded,
+            "values_compressed": self.compressed,
+            "raw_bytes": self.raw_bytes,
+            "stored_bytes": self.stored_bytes,
+            "bytes_saved": self.raw_bytes - self.stored_bytes,
+            "compression_ratio": round(ratio, 2),
+            "compress_cpu_ms": round(self.compress_seconds * 1000, 3),
+            "decompress_cpu_ms": round(self.decompress_seconds * 1000, 3)
+        }
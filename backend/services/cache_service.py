@@ -1,9 +1,15 @@
 """Cache manager service using Redis for prompt caching with in-memory fallback."""
-from typing import Optional, Dict
+from typing import Optional, Dict, List
+import asyncio
 import hashlib
 import json
 from config import settings
 from datetime import datetime, timedelta
+from services.semantic_cache import SemanticCache, NUMPY_AVAILABLE
+from services.admission_policy import AdmissionPolicy
+from services.cache_codec import CacheCodec
+from services.cache_snapshot import write_snapshot, read_snapshot
+from services.cache_analytics import CacheAnalytics
 
 try:
     import redis
@@ -21,8 +27,10 @@ class CacheManager:
         self.redis_client: Optional[redis.Redis] = None
         self.use_redis = False
 
-        # In-memory cache fallback
-        self.memory_cache: Dict[str, tuple[str, datetime]] = {}
+        # In-memory cache fallback (insertion order doubles as LRU order)
+        self.memory_cache: Dict[str, tuple[bytes, datetime]] = {}
+        self.max_memory_entries = settings.CACHE_MAX_MEMORY_ENTRIES
+        self.memory_evictions = 0
 
         # Try to connect to Redis if available
         if settings.ENABLE_CACHE and REDIS_AVAILABLE:
@@ -32,7 +40,7 @@ class CacheManager:
                     port=settings.REDIS_PORT,
                     db=settings.REDIS_DB,
                     password=settings.REDIS_PASSWORD,
-                    decode_responses=True,
+                    decode_responses=False,  # Values are binary (see CacheCodec)
                     socket_connect_timeout=5
                 )
                 # Test connection
@@ -48,9 +56,50 @@ class CacheManager:
 
         self.enabled = settings.ENABLE_CACHE
 
+        # Versioned value format with compression of large responses
+        self.codec = CacheCodec(
+            min_compress_bytes=settings.CACHE_COMPRESS_MIN_BYTES,
+            level=settings.CACHE_COMPRESS_LEVEL
+        )
+
+        # Optional semantic tier matching rephrased prompts to existing entries
+        self.semantic_cache: Optional[SemanticCache] = None
+        if self.enabled and settings.SEMANTIC_CACHE_ENABLED:
+            if NUMPY_AVAILABLE:
+                self.semantic_cache = SemanticCache(
+                    capacity=settings.SEMANTIC_CACHE_CAPACITY,
+                    dim=settings.SEMANTIC_CACHE_DIM,
+                    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+                    index_path=settings.SEMANTIC_CACHE_INDEX_PATH
+                )
+                print("✓ Semantic cache enabled")
+            else:
+                print("⚠ numpy not installed. Semantic cache disabled.")
+
+        # Optional frequency-based admission filter (TinyLFU)
+        self.admission: Optional[AdmissionPolicy] = None
+        if self.enabled and settings.CACHE_ADMISSION_ENABLED:
+            self.admission = AdmissionPolicy(
+                min_frequency=settings.CACHE_ADMISSION_MIN_FREQUENCY,
+                sketch_width=settings.CACHE_ADMISSION_SKETCH_WIDTH,
+                sample_size=settings.CACHE_ADMISSION_SAMPLE_SIZE
+            )
+            print("✓ Cache admission policy enabled")
+
         # Statistics
         self.hits = 0
         self.misses = 0
+        self.analytics = CacheAnalytics(
+            top_k=settings.CACHE_ANALYTICS_TOP_K,
+            window_seconds=settings.CACHE_ANALYTICS_WINDOW_SECONDS,
+            num_windows=settings.CACHE_ANALYTICS_WINDOWS
+        )
+
+        # On-disk snapshot of the in-memory cache
+        self.snapshot_path = settings.CACHE_SNAPSHOT_PATH if self.enabled and settings.CACHE_SNAPSHOT_ENABLED else None
+        self.snapshot_stats = {"restored_entries": 0, "last_saved_at": None, "last_saved_entries": 0, "last_saved_bytes": 0}
+        if self.snapshot_path:
+            self.restore_snapshot()
 
     def _generate_cache_key(self, prompt: str, **kwargs) -> str:
         """Generate cache key from prompt and parameters."""
@@ -79,66 +128,163 @@ class CacheManager:
         for key in expired_keys:
             del self.memory_cache[key]
 
-    def get(self, prompt: str, **kwargs) -> Optional[str]:
-        """Get cached response for a prompt."""
+    def _read(self, cache_key: str) -> Optional[bytes]:
+        """Read a value by its cache key from Redis or the in-memory fallback."""
+        # Try Redis first
+        if self.use_redis and self.redis_client:
+            try:
+                return self.redis_client.get(cache_key)
+            except Exception as e:
+                print(f"[Cache] Redis get error: {e}")
+                # Fall through to memory cache
+
+        # Use in-memory cache
+        self._clean_expired_entries()
+        if cache_key in self.memory_cache:
+            value, expiry = self.memory_cache[cache_key]
+            if expiry > datetime.utcnow():
+                # Mark as most recently used
+                self.memory_cache[cache_key] = self.memory_cache.pop(cache_key)
+                return value
+            else:
+                # Expired
+                del self.memory_cache[cache_key]
+
+        return None
+
+    def _memory_victim(self, cache_key: str) -> Optional[str]:
+        """Return the least recently used in-memory key that storing cache_key would evict."""
+        if cache_key in self.memory_cache or len(self.memory_cache) < self.max_memory_entries:
+            return None
+
+        self._clean_expired_entries()
+        if len(self.memory_cache) < self.max_memory_entries:
+            return None
+        return next(iter(self.memory_cache))
+
+    def _store_in_memory(self, cache_key: str, value: bytes):
+        """Store a value in the in-memory cache, evicting the least recently used entry if full."""
+        victim = self._memory_victim(cache_key)
+        if victim is not None:
+            del self.memory_cache[victim]
+            self.memory_evictions += 1
+
+        expiry = datetime.utcnow() + timedelta(seconds=self.ttl)
+        self.memory_cache.pop(cache_key, None)
+        self.memory_cache[cache_key] = (value, expiry)
+
+    def _lookup(self, prompt: str, **kwargs) -> Optional[tuple[str, Optional[List[str]]]]:
+        """Find and decode the stored value for a prompt, updating hit/miss statistics."""
         if not self.enabled:
             return None
 
         try:
             cache_key = self._generate_cache_key(prompt, **kwargs)
+            if self.admission:
+                self.admission.record_access(cache_key)
+            served_key = cache_key
+            value = self._read(cache_key)
 
-            # Try Redis first
-            if self.use_redis and self.redis_client:
-                try:
-                    cached_value = self.redis_client.get(cache_key)
-                    if cached_value:
-                        self.hits += 1
-                        return cached_value
-                    else:
-                        self.misses += 1
-                        return None
-                except Exception as e:
-                    print(f"[Cache] Redis get error: {e}")
-                    # Fall through to memory cache
+            # Fall back to the most similar previously cached prompt
+            if not value and self.semantic_cache:
+                similar_key = self.semantic_cache.lookup(prompt, **kwargs)
+                if similar_key and similar_key != cache_key:
+                    served_key = similar_key
+                    value = self._read(similar_key)
+                    if not value:
+                        # Underlying entry expired or was evicted
+                        self.semantic_cache.remove(similar_key)
 
-            # Use in-memory cache
-            self._clean_expired_entries()
-            if cache_key in self.memory_cache:
-                value, expiry = self.memory_cache[cache_key]
-                if expiry > datetime.utcnow():
-                    self.hits += 1
-                    return value
-                else:
-                    # Expired
-                    del self.memory_cache[cache_key]
+            if value:
+                text, chunks, cost = self.codec.decode(value)
+                self.hits += 1
+                self.analytics.record_hit(served_key, prompt, cost)
+                return text, chunks
 
             self.misses += 1
+            self.analytics.record_miss()
             return None
         except Exception as e:
             print(f"[Cache] Get error: {type(e).__name__}: {str(e)}")
             self.misses += 1
+            self.analytics.record_miss()
             return None
 
-    def set(self, prompt: str, response: str, **kwargs) -> bool:
-        """Cache a response for a prompt."""
+    def contains(self, prompt: str, **kwargs) -> bool:
+        """Check whether a prompt is cached without affecting statistics."""
+        if not self.enabled:
+            return False
+
+        try:
+            return self._read(self._generate_cache_key(prompt, **kwargs)) is not None
+        except Exception:
+            return False
+
+    def get(self, prompt: str, **kwargs) -> Optional[str]:
+        """Get cached response for a prompt."""
+        entry = self._lookup(prompt, **kwargs)
+        if entry is None:
+            return None
+
+        text, _ = entry
+        return text
+
+    def get_chunks(self, prompt: str, **kwargs) -> Optional[List[str]]:
+        """Get cached response for a prompt split on its original stream chunk boundaries."""
+        entry = self._lookup(prompt, **kwargs)
+        if entry is None:
+            return None
+
+        text, chunks = entry
+        return chunks if chunks else [text]
+
+    def set(
+        self,
+        prompt: str,
+        response: str,
+        chunks: Optional[List[str]] = None,
+        bypass_admission: bool = False,
+        generation_ms: Optional[float] = None,
+        tokens: Optional[int] = None,
+        **kwargs
+    ) -> bool:
+        """
+        Cache a response for a prompt.
+
+        Optionally records the stream chunks it was produced in and what it cost to
+        generate, so hits can replay the original chunking and report compute saved.
+        """
         if not self.enabled:
             return False
 
         try:
             cache_key = self._generate_cache_key(prompt, **kwargs)
 
+            # Only store entries that are likely to be requested again
+            if self.admission and not bypass_admission:
+                victim = None if self.use_redis else self._memory_victim(cache_key)
+                if not self.admission.admit(cache_key, victim):
+                    return False
+
+            cost = (generation_ms, tokens) if generation_ms is not None else None
+            value = self.codec.encode(response, chunks, cost)
+            stored = False
+
             # Try Redis first
             if self.use_redis and self.redis_client:
                 try:
-                    self.redis_client.setex(cache_key, self.ttl, response)
-                    return True
+                    self.redis_client.setex(cache_key, self.ttl, value)
+                    stored = True
                 except Exception as e:
                     print(f"[Cache] Redis set error: {e}")
                     # Fall through to memory cache
 
             # Use in-memory cache
-            expiry = datetime.utcnow() + timedelta(seconds=self.ttl)
-            self.memory_cache[cache_key] = (response, expiry)
+            if not stored:
+                self._store_in_memory(cache_key, value)
+
+            if self.semantic_cache:
+                self.semantic_cache.add(prompt, cache_key, **kwargs)
             return True
         except Exception as e:
             print(f"[Cache] Set error: {type(e).__name__}: {str(e)}")
@@ -165,9 +311,17 @@ class CacheManager:
         self.memory_cache.clear()
         count += memory_count
 
+        if self.semantic_cache:
+            self.semantic_cache.clear()
+
         # Reset hit/miss counters so stats reflect a clean slate
         self.hits = 0
         self.misses = 0
+        self.memory_evictions = 0
+        self.analytics.clear()
+        self.codec.reset_stats()
+        if self.admission:
+            self.admission.reset_stats()
 
         return count
 
@@ -196,5 +350,68 @@ class CacheManager:
             # In-memory cache stats
             self._clean_expired_entries()
             stats["entries"] = len(self.memory_cache)
+            stats["max_entries"] = self.max_memory_entries
+            stats["evictions"] = self.memory_evictions
+
+        stats["compression"] = self.codec.get_stats()
+        stats["analytics"] = self.analytics.get_stats()
+
+        if self.admission:
+            stats["admission"] = self.admission.get_stats()
+
+        if self.snapshot_path:
+            stats["snapshot"] = dict(self.snapshot_stats)
+
+        if self.semantic_cache:
+            stats["semantic"] = self.semantic_cache.get_stats()
 
         return stats
+
+    def restore_snapshot(self) -> int:
+        """Load unexpired entries from the on-disk snapshot into the in-memory cache."""
+        try:
+            entries = read_snapshot(self.snapshot_path)
+        except Exception as e:
+            print(f"[Cache] Snapshot restore error: {type(e).__name__}: {str(e)}")
+            return 0
+
+        # Most recently used entries come last in the snapshot
+        for key, value, expiry in entries[-self.max_memory_entries:]:
+            self.memory_cache[key] = (value, expiry)
+
+        restored = min(len(entries), self.max_memory_entries)
+        self.snapshot_stats["restored_entries"] = restored
+        if restored:
+            print(f"✓ Cache snapshot restored ({restored} entries)")
+        return restored
+
+    def _snapshot_entries(self) -> List[tuple[str, bytes, datetime]]:
+        """Copy in-memory entries in LRU order so they can be written outside the event loop."""
+        return [(key, value, expiry) for key, (value, expiry) in list(self.memory_cache.items())]
+
+    def _persist(self, entries: List[tuple[str, bytes, datetime]]):
+        """Write the cache snapshot and semantic index to disk."""
+        if self.snapshot_path:
+            try:
+                size = write_snapshot(self.snapshot_path, entries)
+                self.snapshot_stats.update(
+                    last_saved_at=datetime.utcnow().isoformat(),
+                    last_saved_entries=len(entries),
+                    last_saved_bytes=size
+                )
+            except Exception as e:
+                print(f"[Cache] Snapshot save error: {type(e).__name__}: {str(e)}")
+
+        if self.semantic_cache:
+            self.semantic_cache.save()
+
+    async def run_snapshot_loop(self, interval_seconds: int):
+        """Periodically persist cache state in the background."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            entries = self._snapshot_entries()
+            await asyncio.to_thread(self._persist, entries)
+
+    def shutdown(self):
+        """Persist cache state that should survive a restart."""
+        self._persist(self._snapshot_entries())
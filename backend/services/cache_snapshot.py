@@ -0,0 +1,69 @@
+"""Compact on-disk snapshots of the in-memory cache so restarts do not start cold."""
+from datetime import datetime, timezone
+from typing import List
+import os
+import struct
+
+SNAPSHOT_MAGIC = b"PLSNAP"
+SNAPSHOT_VERSION = 1
+
+# Per entry: key length, value length, expiry (unix seconds)
+_ENTRY_HEADER = struct.Struct("<HId")
+
+
+def write_snapshot(path: str, entries: List[tuple[str, bytes, datetime]]) -> int:
+    """
+    Atomically write cache entries to a snapshot file.
+
+    Values are stored as-is, so entries already compressed by the cache codec stay compressed.
+    Returns the number of bytes written.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC + bytes([SNAPSHOT_VERSION]))
+        for key, value, expiry in entries:
+            key_bytes = key.encode("utf-8")
+            expires_at = expiry.replace(tzinfo=timezone.utc).timestamp()
+            f.write(_ENTRY_HEADER.pack(len(key_bytes), len(value), expires_at))
+            f.write(key_bytes)
+            f.write(value)
+        size = f.tell()
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+    return size
+
+
+def read_snapshot(path: str) -> List[tuple[str, bytes, datetime]]:
+    """Read unexpired cache entries from a snapshot file."""
+    if not os.path.exists(path):
+        return []
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    header_size = len(SNAPSHOT_MAGIC) + 1
+    if not data.startswith(SNAPSHOT_MAGIC) or data[len(SNAPSHOT_MAGIC)] != SNAPSHOT_VERSION:
+        raise ValueError("Unrecognised cache snapshot format")
+
+    now = datetime.utcnow()
+    entries = []
+    offset = header_size
+    while offset < len(data):
+        key_len, value_len, expires_at = _ENTRY_HEADER.unpack_from(data, offset)
+        offset += _ENTRY_HEADER.size
+        key = data[offset:offset + key_len].decode("utf-8")
+        offset += key_len
+        value = data[offset:offset + value_len]
+        offset += value_len
+
+        expiry = datetime.fromtimestamp(expires_at, tz=timezone.utc).replace(tzinfo=None)
+        if expiry > now:
+            entries.append((key, value, expiry))
+
+    return entries
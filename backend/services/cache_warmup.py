@@ -0,0 +1,79 @@
+"""Background pre-warming of the LLM cache from a curated list of popular prompts."""
+from typing import List
+import asyncio
+import os
+import time
+from utils.prompt_builder import build_prompt, load_system_prompt
+
+
+def load_warmup_prompts(path: str) -> List[str]:
+    """Read prompts from a text file, one per line. Blank lines and '#' comments are ignored."""
+    if not path or not os.path.exists(path):
+        return []
+
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+class CacheWarmer:
+    """
+    Generates responses for popular prompts that are not cached yet.
+
+    Runs at low priority: each prompt is only started once no user request has been
+    generating for idle_seconds, and tokens are consumed cooperatively on the event loop
+    the same way /chat/stream does.
+    """
+
+    def __init__(self, cache_manager, inference_service, prompts: List[str], idle_seconds: float):
+        """Initialize cache warmer."""
+        self.cache_manager = cache_manager
+        self.inference_service = inference_service
+        self.prompts = prompts
+        self.idle_seconds = idle_seconds
+
+        # Statistics
+        self.generated = 0
+        self.skipped = 0
+
+    async def _wait_until_idle(self):
+        while not self.inference_service.is_idle(self.idle_seconds):
+            await asyncio.sleep(self.idle_seconds)
+
+    async def run(self):
+        """Warm the cache with every prompt that is not already cached."""
+        system_prompt = load_system_prompt("prompt.txt")
+
+        for prompt in self.prompts:
+            if self.cache_manager.contains(prompt, max_tokens=None, temperature=None):
+                self.skipped += 1
+                continue
+
+            await self._wait_until_idle()
+
+            chunks = []
+            start = time.perf_counter()
+            try:
+                formatted_prompt = build_prompt([], system_prompt, prompt)
+                for token in self.inference_service.llm_engine.generate(formatted_prompt, stream=True):
+                    if token:
+                        chunks.append(token)
+                    await asyncio.sleep(0)
+            except Exception as e:
+                print(f"[CacheWarmer] Generation error: {type(e).__name__}: {str(e)}")
+                continue
+
+            if chunks:
+                self.cache_manager.set(
+                    prompt,
+                    "".join(chunks),
+                    chunks=chunks,
+                    bypass_admission=True,
+                    generation_ms=(time.perf_counter() - start) * 1000,
+                    tokens=len(chunks),
+                    max_tokens=None,
+                    temperature=None
+                )
+                self.generated += 1
+
+        print(f"✓ Cache warm-up finished ({self.generated} generated, {self.skipped} already cached)")
@@ -0,0 +1,135 @@
+"""Rolling summarisation of older conversation turns to keep prompts short."""
+from typing import List, Optional
+import asyncio
+from schemas.chat import ChatMessage
+from utils.prompt_builder import build_summary_prompt, _estimate_tokens
+
+
+class ConversationSummarizer:
+    """
+    Keeps a running summary on each session so prompts carry only the summary plus the
+    turns it does not cover yet.
+
+    Once trigger_messages turns have piled up beyond the verbatim window, the session is
+    queued and its older turns are folded into the summary in the background. Until the
+    refresh lands, as many of those turns as fit in max_context_tokens are still sent
+    verbatim; the oldest ones beyond that are left out until the summary covers them. Like the
+    cache warmer, generation only starts when no user request has been generating for
+    idle_seconds, and tokens are consumed cooperatively on the event loop.
+    """
+
+    def __init__(
+        self,
+        session_service,
+        inference_service,
+        recent_messages: int,
+        trigger_messages: int,
+        max_tokens: int,
+        idle_seconds: float,
+        fold_limit: int = 50,
+        max_context_tokens: int = 4096
+    ):
+        """Initialize summarizer."""
+        self.session_service = session_service
+        self.inference_service = inference_service
+        self.recent_messages = recent_messages
+        self.trigger_messages = trigger_messages
+        self.max_tokens = max_tokens
+        self.idle_seconds = idle_seconds
+        self.fold_limit = fold_limit
+        self.max_context_tokens = max_context_tokens
+
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.scheduled: set[str] = set()
+
+        # Statistics
+        self.refreshed = 0
+        self.failed = 0
+
+    async def build_context(self, session_id: str) -> tuple[Optional[str], List[ChatMessage]]:
+        """Return the session summary and the newest turns not covered by it that fit the prompt."""
+        summary, summarized_until = await self.session_service.get_summary(session_id)
+
+        window = self.recent_messages + self.trigger_messages
+        messages = await self.session_service.get_recent_messages(session_id, limit=window)
+        if summarized_until is not None:
+            messages = [msg for msg in messages if msg.timestamp > summarized_until]
+
+        if len(messages) >= window:
+            # The summary lags further behind than the cached window reaches
+            budget = self.max_context_tokens - sum(_estimate_tokens(msg.content) for msg in messages)
+            older = await self._load_unsummarized(session_id, summarized_until, messages[0].timestamp, budget)
+            messages = older + messages
+            self.schedule(session_id)
+
+        return summary, messages
+
+    async def _load_unsummarized(self, session_id: str, after, before, max_tokens: int) -> List[ChatMessage]:
+        """
+        Load the newest turns with after < timestamp < before that fit in max_tokens, walking
+        back one fold_limit page at a time. Older turns are dropped.
+        """
+        loaded: List[ChatMessage] = []
+        used = 0
+        while used < max_tokens:
+            page = await self.session_service.get_messages_between(
+                session_id, after=after, before=before, limit=self.fold_limit, newest=True
+            )
+            for msg in reversed(page):
+                used += _estimate_tokens(msg.content)
+                if used > max_tokens:
+                    break
+                loaded.append(msg)
+            if len(page) < self.fold_limit:
+                break
+            before = page[0].timestamp
+        loaded.reverse()
+        return loaded
+
+    def schedule(self, session_id: str):
+        """Queue a session for a summary refresh, unless it is already queued."""
+        if session_id not in self.scheduled:
+            self.scheduled.add(session_id)
+            self.queue.put_nowait(session_id)
+
+    async def _wait_until_idle(self):
+        while not self.inference_service.is_idle(self.idle_seconds):
+            await asyncio.sleep(self.idle_seconds)
+
+    async def _refresh(self, session_id: str):
+        """Fold the turns older than the verbatim window into the session summary."""
+        summary, summarized_until = await self.session_service.get_summary(session_id)
+        recent = await self.session_service.get_recent_messages(session_id, limit=self.recent_messages)
+        if not recent:
+            return
+
+        older = await self.session_service.get_messages_between(
+            session_id, after=summarized_until, before=recent[0].timestamp, limit=self.fold_limit
+        )
+        if not older:
+            return
+
+        prompt = build_summary_prompt(summary, older)
+        tokens = []
+        for token in self.inference_service.llm_engine.generate(prompt, max_tokens=self.max_tokens, stream=True):
+            if token:
+                tokens.append(token)
+            await asyncio.sleep(0)
+
+        new_summary = "".join(tokens).strip()
+        if new_summary:
+            await self.session_service.set_summary(session_id, new_summary, older[-1].timestamp)
+            self.refreshed += 1
+
+    async def run(self):
+        """Process queued summary refreshes until cancelled."""
+        while True:
+            session_id = await self.queue.get()
+            try:
+                await self._wait_until_idle()
+                await self._refresh(session_id)
+            except Exception as e:
+                self.failed += 1
+                print(f"[Summarizer] Refresh error: {type(e).__name__}: {str(e)}")
+            finally:
+                self.scheduled.discard(session_id)
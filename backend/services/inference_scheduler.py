@@ -0,0 +1,186 @@
+"""Per-user weighted fair queuing of LLM generation steps."""
+from collections import deque
+from typing import Dict, List, Optional
+import asyncio
+import time
+
+# Priority classes a generation can be submitted under
+PRIORITY_CLASSES = ("interactive", "batch")
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class _Flow:
+    """Waiting generation steps of one (user, priority class) pair."""
+
+    __slots__ = ("key", "weight", "finish", "waiters")
+
+    def __init__(self, key: tuple, weight: float, finish: float):
+        self.key = key
+        self.weight = weight
+        self.finish = finish  # Virtual time at which this flow's service so far ends
+        self.waiters: deque = deque()
+
+
+class _UserStats:
+    __slots__ = ("steps", "tokens", "wait_ms", "max_wait_ms")
+
+    def __init__(self):
+        self.steps = 0
+        self.tokens = 0
+        self.wait_ms: deque = deque(maxlen=512)
+        self.max_wait_ms = 0.0
+
+
+class FairScheduler:
+    """
+    Grants the single LLM to one generation step at a time, fairly across users.
+
+    Streams acquire the engine once per token and non-streaming requests once per
+    generation, then release it with the number of tokens produced. Generation runs on
+    the event loop, so every acquire waits for a grant; this lets all streams that are
+    ready queue up before the next step is chosen. Steps are granted by start-time fair
+    queuing: each (user, priority class) flow advances its virtual time by
+    tokens / weight, and the waiting flow with the smallest virtual time goes next. A
+    user with many concurrent streams therefore gets one share, not one share per
+    stream, and light users wait at most a few steps behind heavy ones.
+
+    Weights are the class weight (interactive or batch) times the admin multiplier
+    for admin users.
+    """
+
+    def __init__(self, class_weights: Dict[str, float], admin_multiplier: float):
+        """Initialize scheduler with per-class weights."""
+        self.class_weights = class_weights
+        self.admin_multiplier = admin_multiplier
+        self.flows: Dict[tuple, _Flow] = {}
+        self.virtual_time = 0.0
+        self.busy = False
+        self.waiting = 0
+        self._dispatch_scheduled = False
+
+        # Statistics
+        self.grants = 0
+        self.user_stats: Dict[str, _UserStats] = {}
+
+    def weight(self, priority: str, is_admin: bool) -> float:
+        """Scheduling weight of a flow."""
+        return self.class_weights[priority] * (self.admin_multiplier if is_admin else 1.0)
+
+    def _flow(self, user_id: str, priority: str, is_admin: bool) -> _Flow:
+        key = (user_id, priority)
+        flow = self.flows.get(key)
+        if flow is None:
+            # New flows start at the current virtual time, so idle users bank no credit
+            flow = self.flows[key] = _Flow(key, self.weight(priority, is_admin), self.virtual_time)
+        return flow
+
+    def _next_flow(self) -> Optional[_Flow]:
+        best = None
+        for flow in self.flows.values():
+            if flow.waiters and (best is None or flow.finish < best.finish):
+                best = flow
+        return best
+
+    def _record_wait(self, user_id: str, wait_ms: float):
+        stats = self.user_stats.get(user_id)
+        if stats is None:
+            stats = self.user_stats[user_id] = _UserStats()
+        stats.steps += 1
+        stats.wait_ms.append(wait_ms)
+        stats.max_wait_ms = max(stats.max_wait_ms, wait_ms)
+
+    async def acquire(self, user_id: str, priority: str = "interactive", is_admin: bool = False):
+        """Wait until this user's next generation step is granted the engine."""
+        flow = self._flow(user_id, priority, is_admin)
+        if not flow.waiters:
+            # Start tag: a flow that fell behind while idle resumes at the current virtual time
+            flow.finish = max(flow.finish, self.virtual_time)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        flow.waiters.append(future)
+        self.waiting += 1
+        if not self.busy and not self._dispatch_scheduled:
+            # Grant on the next loop iteration, once every ready stream has queued
+            self._dispatch_scheduled = True
+            loop.call_soon(self._dispatch)
+
+        start = time.perf_counter()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as the waiter went away; pass the engine on
+                self.release(flow.key, 0)
+            elif future in flow.waiters:
+                flow.waiters.remove(future)
+                self.waiting -= 1
+            raise
+
+        self._record_wait(user_id, (time.perf_counter() - start) * 1000)
+        return flow.key
+
+    def _dispatch(self):
+        self._dispatch_scheduled = False
+        if not self.busy:
+            self._grant_next()
+
+    def _grant_next(self):
+        """Hand the engine to the next waiting step, or mark it free."""
+        while True:
+            next_flow = self._next_flow()
+            if next_flow is None:
+                # No contention: start afresh, so service received alone is not held against anyone
+                self.busy = False
+                self.flows.clear()
+                self.virtual_time = 0.0
+                return
+
+            future = next_flow.waiters.popleft()
+            self.waiting -= 1
+            if future.done():
+                continue  # Waiter was cancelled
+
+            self.busy = True
+            self.virtual_time = max(self.virtual_time, next_flow.finish)
+            self.grants += 1
+            future.set_result(None)
+            return
+
+    def release(self, key: tuple, tokens: int):
+        """Return the engine after a step that produced the given number of tokens."""
+        flow = self.flows.get(key)
+        if flow is not None:
+            flow.finish += tokens / flow.weight
+        stats = self.user_stats.get(key[0])
+        if stats is not None:
+            stats.tokens += tokens
+        self._grant_next()
+
+    def get_stats(self) -> dict:
+        """Get scheduler and per-user queueing delay statistics."""
+        users = {}
+        for user_id, stats in self.user_stats.items():
+            wait_ms = sorted(stats.wait_ms)
+            users[user_id] = {
+                "steps": stats.steps,
+                "tokens": stats.tokens,
+                "wait_p50_ms": round(_percentile(wait_ms, 50), 2),
+                "wait_p95_ms": round(_percentile(wait_ms, 95), 2),
+                "wait_p99_ms": round(_percentile(wait_ms, 99), 2),
+                "max_wait_ms": round(stats.max_wait_ms, 2)
+            }
+        return {
+            "class_weights": self.class_weights,
+            "admin_multiplier": self.admin_multiplier,
+            "busy": self.busy,
+            "waiting": self.waiting,
+            "active_flows": len(self.flows),
+            "grants": self.grants,
+            "users": users
+        }
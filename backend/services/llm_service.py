@@ -1,5 +1,7 @@
-from typing import Optional, Iterator
+from typing import Optional, Iterator, AsyncIterator
 from config import settings
+from services.inference_scheduler import FairScheduler
+import asyncio
 import os
 import time
 
@@ -174,11 +176,42 @@ class LLMEngine:
 
 
 class ModelInferenceService:
-    def __init__(self, cache_manager, llm_engine: LLMEngine):
+    def __init__(self, cache_manager, llm_engine: LLMEngine, scheduler: Optional[FairScheduler] = None):
         self.cache_manager = cache_manager
         self.llm_engine = llm_engine
+        # Decides whose generation step runs next when users compete for the engine
+        self.scheduler = scheduler
 
-    def infer(self, prompt: str, max_tokens: Optional[int] = None, temperature: Optional[float] = None, use_cache: bool = True, cache_key: Optional[str] = None) -> tuple[str, bool]:
+        # Tracks user-facing generations so background work can wait for idle periods
+        self.in_flight = 0
+        self.last_request_at = 0.0
+
+        # Total tokens generated for user requests (sampled into tokens/s)
+        self.tokens_generated = 0
+
+    def _begin_request(self):
+        self.in_flight += 1
+        self.last_request_at = time.monotonic()
+
+    def _end_request(self):
+        self.in_flight -= 1
+        self.last_request_at = time.monotonic()
+
+    def is_idle(self, idle_seconds: float) -> bool:
+        """Whether no user request has been generating for at least idle_seconds."""
+        return self.in_flight == 0 and time.monotonic() - self.last_request_at >= idle_seconds
+
+    async def infer(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        use_cache: bool = True,
+        cache_key: Optional[str] = None,
+        user_id: str = "anonymous",
+        priority: str = "interactive",
+        is_admin: bool = False
+    ) -> tuple[str, bool]:
         """
         Perform inference with optional caching.
 
@@ -188,6 +221,7 @@ class ModelInferenceService:
             temperature: Sampling temperature
             use_cache: Whether to use caching
             cache_key: Optional separate cache key (if None, uses prompt as cache key)
+            user_id, priority, is_admin: Identify the flow for fair-share scheduling
 
         Returns:
             Tuple of (response text, was_cached)
@@ -200,12 +234,60 @@ class ModelInferenceService:
             if cached:
                 return cached, True
 
-        response = self.llm_engine.generate(prompt, max_tokens=max_tokens, temperature=temperature, stream=False)
+        self._begin_request()
+        try:
+            key = await self.scheduler.acquire(user_id, priority, is_admin) if self.scheduler else None
+            start = time.perf_counter()
+            response = None
+            try:
+                response = self.llm_engine.generate(prompt, max_tokens=max_tokens, temperature=temperature, stream=False)
+            finally:
+                if key is not None:
+                    self.scheduler.release(key, len(response.split()) if isinstance(response, str) else 0)
+        finally:
+            self._end_request()
+        generation_ms = (time.perf_counter() - start) * 1000
+        if isinstance(response, str):
+            self.tokens_generated += len(response.split())
 
         if use_cache and isinstance(response, str):
-            self.cache_manager.set(lookup_key, response, max_tokens=max_tokens, temperature=temperature)
+            self.cache_manager.set(
+                lookup_key,
+                response,
+                generation_ms=generation_ms,
+                tokens=len(response.split()),
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
 
         return response, False
 
-    def stream_infer(self, prompt: str, max_tokens: Optional[int] = None, temperature: Optional[float] = None) -> Iterator[str]:
-        return self.llm_engine.generate(prompt, max_tokens=max_tokens, temperature=temperature, stream=True)
+    async def stream_infer(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        user_id: str = "anonymous",
+        priority: str = "interactive",
+        is_admin: bool = False
+    ) -> AsyncIterator[str]:
+        """Stream tokens, acquiring the engine from the scheduler for each one."""
+        self._begin_request()
+        try:
+            tokens = iter(self.llm_engine.generate(prompt, max_tokens=max_tokens, temperature=temperature, stream=True))
+            while True:
+                key = await self.scheduler.acquire(user_id, priority, is_admin) if self.scheduler else None
+                token = None
+                try:
+                    token = next(tokens, None)
+                finally:
+                    if key is not None:
+                        self.scheduler.release(key, 0 if token is None else 1)
+                if token is None:
+                    break
+                self.tokens_generated += 1
+                yield token
+                if key is None:
+                    await asyncio.sleep(0)  # Let other streams run between tokens
+        finally:
+            self._end_request()
@@ -0,0 +1,206 @@
+"""Write-behind persistence of chat messages in grouped transactions."""
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from typing import Iterable, List, Optional
+import asyncio
+import time
+from sqlalchemy import insert, update, bindparam
+from sqlalchemy.exc import DataError, IntegrityError
+from database import AsyncSessionLocal
+from database.models import Session as SessionModel, Message as MessageModel
+
+
+class MessageWriter:
+    """
+    Queues message inserts and flushes them in batches.
+
+    A flush runs every flush_interval_ms, or as soon as batch_size rows are queued,
+    and writes all queued rows plus the sessions' updated_at in one transaction.
+
+    A batch that keeps failing is retried max_retries times and then written row by
+    row, so rows the database rejects (e.g. for a session deleted meanwhile) are
+    dropped into dead_letters instead of blocking the queue. At most max_pending rows
+    are queued; enqueue flushes inline when the queue is full.
+    """
+
+    def __init__(self, flush_interval_ms: int, batch_size: int, max_retries: int = 3, max_pending: int = 10000):
+        """Initialize message writer."""
+        self.flush_interval = flush_interval_ms / 1000
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.max_pending = max_pending
+        self.pending: List[dict] = []
+        self.pending_sessions: Counter = Counter()
+        self.dead_letters: deque = deque(maxlen=1000)
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+
+        # Statistics
+        self.flushes = 0
+        self.rows_written = 0
+        self.max_batch_size = 0
+        self.flush_errors = 0
+        self.batch_retries = 0
+        self.rows_dropped = 0
+        self.backpressure_flushes = 0
+        self.flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    async def enqueue(self, row: dict):
+        """Queue a message row for the next flush, flushing first if the queue is full."""
+        if len(self.pending) >= self.max_pending:
+            self.backpressure_flushes += 1
+            await self.flush()
+        self.pending.append(row)
+        self.pending_sessions[row["session_id"]] += 1
+        if len(self.pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def has_pending(self, session_id: Optional[str] = None) -> bool:
+        """Whether rows are queued, optionally only for one session."""
+        if session_id is None:
+            return bool(self.pending)
+        return self.pending_sessions[session_id] > 0
+
+    @asynccontextmanager
+    async def exclusive(self):
+        """Hold off flushes for the duration of the block; enqueue keeps accepting rows."""
+        async with self._lock:
+            yield self
+
+    def discard(self, session_ids: Iterable[str]) -> int:
+        """
+        Drop the queued rows of sessions that were deleted. Returns the number dropped.
+
+        Call inside exclusive(), so a flush cannot be writing the rows meanwhile.
+        """
+        doomed = {session_id for session_id in session_ids if self.pending_sessions[session_id] > 0}
+        if not doomed:
+            return 0
+        kept = [row for row in self.pending if row["session_id"] not in doomed]
+        dropped = len(self.pending) - len(kept)
+        self.pending[:] = kept
+        for session_id in doomed:
+            del self.pending_sessions[session_id]
+        self.rows_dropped += dropped
+        return dropped
+
+    async def flush(self) -> int:
+        """Write all queued rows. Returns the number of rows written."""
+        async with self._lock:
+            written = 0
+            while self.pending:
+                batch = self.pending[:self.batch_size]
+                try:
+                    await self._write_with_retries(batch)
+                except Exception:
+                    written += await self._write_rows(batch)
+                    continue
+
+                # Rows leave the queue only once their transaction committed
+                self._dequeue(len(batch))
+                written += len(batch)
+            return written
+
+    def _dequeue(self, count: int):
+        """Remove the first count rows from the queue."""
+        for row in self.pending[:count]:
+            self.pending_sessions[row["session_id"]] -= 1
+            if self.pending_sessions[row["session_id"]] <= 0:
+                del self.pending_sessions[row["session_id"]]
+        del self.pending[:count]
+
+    async def _write_with_retries(self, batch: List[dict]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self._write(batch)
+                return
+            except Exception as e:
+                print(f"[MessageWriter] Batch write error (attempt {attempt + 1}): {type(e).__name__}: {str(getattr(e, 'orig', e))}")
+                if attempt == self.max_retries:
+                    raise
+                self.batch_retries += 1
+                await asyncio.sleep(0.05 * (attempt + 1))
+
+    async def _write_rows(self, batch: List[dict]) -> int:
+        """
+        Write a failed batch one row at a time, dropping rows the database rejects.
+
+        Other errors (e.g. the database being unreachable) are raised with the
+        remaining rows still queued. Returns the number of rows written.
+        """
+        written = 0
+        for row in batch:
+            try:
+                await self._write([row])
+                written += 1
+            except (IntegrityError, DataError) as e:
+                self.rows_dropped += 1
+                error = f"{type(e).__name__}: {str(getattr(e, 'orig', e))}"
+                self.dead_letters.append({**row, "error": error})
+                print(f"[MessageWriter] Dropped message {row['message_id']} of session {row['session_id']}: {error}")
+            self._dequeue(1)
+        return written
+
+    async def _write(self, batch: List[dict]):
+        """Insert a batch of messages and touch their sessions in one transaction."""
+        touched = {}
+        for row in batch:
+            touched[row["session_id"]] = max(touched.get(row["session_id"], row["timestamp"]), row["timestamp"])
+
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(MessageModel), batch)
+            sessions = SessionModel.__table__
+            await db.execute(
+                update(sessions)
+                .where(sessions.c.session_id == bindparam("sid"))
+                .values(updated_at=bindparam("ts")),
+                [{"sid": session_id, "ts": ts} for session_id, ts in touched.items()]
+            )
+            await db.commit()
+        elapsed = time.perf_counter() - start
+
+        self.flushes += 1
+        self.rows_written += len(batch)
+        self.max_batch_size = max(self.max_batch_size, len(batch))
+        self.flush_seconds += elapsed
+        self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+
+    async def run(self):
+        """Flush queued rows periodically until cancelled."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                # Shield so cancellation at shutdown never interrupts a commit
+                await asyncio.shield(self.flush())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.flush_errors += 1
+                print(f"[MessageWriter] Flush error: {type(e).__name__}: {str(e)}")
+
+    def get_stats(self) -> dict:
+        """Get batching and flush latency statistics."""
+        return {
+            "enabled": True,
+            "flush_interval_ms": round(self.flush_interval * 1000),
+            "batch_size": self.batch_size,
+            "pending_rows": len(self.pending),
+            "max_pending_rows": self.max_pending,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "avg_batch_size": round(self.rows_written / self.flushes, 2) if self.flushes > 0 else 0,
+            "max_batch_size": self.max_batch_size,
+            "avg_flush_ms": round(self.flush_seconds / self.flushes * 1000, 3) if self.flushes > 0 else 0,
+            "max_flush_ms": round(self.max_flush_seconds * 1000, 3),
+            "flush_errors": self.flush_errors,
+            "batch_retries": self.batch_retries,
+            "rows_dropped": self.rows_dropped,
+            "backpressure_flushes": self.backpressure_flushes
+        }
@@ -0,0 +1,133 @@
+"""Fixed-size in-memory time series of service metrics with minute and hour rollups."""
+from typing import List, Optional
+
+# Recorded fields, in row order
+FIELDS = (
+    "requests_per_second",
+    "latency_p50_ms",
+    "latency_p95_ms",
+    "latency_p99_ms",
+    "cache_hit_rate",
+    "tokens_per_second",
+    "queue_depth",  # Generation steps waiting for the fair scheduler
+    "in_flight",  # User-facing generations running or queued
+    "cpu_usage",
+    "rss_mb",
+)
+
+# Resolution name -> rollup period in seconds ("raw" holds every sample)
+RESOLUTIONS = {"raw": None, "1m": 60, "1h": 3600}
+
+
+class RingBuffer:
+    """Preallocated circular buffer of (timestamp, row) points kept in time order."""
+
+    def __init__(self, capacity: int):
+        """Initialize buffer holding at most capacity points."""
+        self.capacity = capacity
+        self.times = [0.0] * capacity
+        self.rows: list = [None] * capacity
+        self.head = 0  # Physical index of the oldest point
+        self.size = 0
+
+    def append(self, timestamp: float, row: tuple):
+        """Add a point, overwriting the oldest one when full."""
+        index = (self.head + self.size) % self.capacity
+        self.times[index] = timestamp
+        self.rows[index] = row
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.head = (self.head + 1) % self.capacity
+
+    def _time_at(self, i: int) -> float:
+        return self.times[(self.head + i) % self.capacity]
+
+    def _bisect(self, timestamp: float) -> int:
+        """First logical index whose timestamp is >= timestamp."""
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._time_at(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def window(self, start: Optional[float], end: Optional[float]) -> List[tuple]:
+        """Points with start <= timestamp <= end, located by binary search."""
+        first = self._bisect(start) if start is not None else 0
+        last = self._bisect(end + 1e-9) if end is not None else self.size
+        points = []
+        for i in range(first, last):
+            index = (self.head + i) % self.capacity
+            points.append((self.times[index], self.rows[index]))
+        return points
+
+
+class MetricsTimeSeries:
+    """
+    Records one row of FIELDS per sample and rolls samples up into 1-minute and 1-hour
+    averages, each tier in its own ring buffer.
+    """
+
+    def __init__(self, raw_capacity: int, minute_capacity: int, hour_capacity: int):
+        """Initialize time series with the number of points kept per resolution."""
+        self.buffers = {
+            "raw": RingBuffer(raw_capacity),
+            "1m": RingBuffer(minute_capacity),
+            "1h": RingBuffer(hour_capacity),
+        }
+        # Running sums of the rollup currently being filled: resolution -> [period_start, count, sums]
+        self._pending = {resolution: None for resolution, period in RESOLUTIONS.items() if period}
+
+    def record(self, timestamp: float, values: dict):
+        """Record one sample."""
+        row = tuple(float(values.get(field, 0.0)) for field in FIELDS)
+        self.buffers["raw"].append(timestamp, row)
+
+        for resolution, period in RESOLUTIONS.items():
+            if period is None:
+                continue
+            period_start = timestamp // period * period
+            pending = self._pending[resolution]
+            if pending is not None and pending[0] != period_start:
+                self._close(resolution, pending)
+                pending = None
+            if pending is None:
+                pending = self._pending[resolution] = [period_start, 0, [0.0] * len(FIELDS)]
+            pending[1] += 1
+            pending[2] = [total + value for total, value in zip(pending[2], row)]
+
+    def _close(self, resolution: str, pending: list):
+        period_start, count, sums = pending
+        self.buffers[resolution].append(period_start, tuple(total / count for total in sums))
+
+    def query(
+        self,
+        resolution: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        fields: Optional[List[str]] = None
+    ) -> dict:
+        """
+        Return the points of one resolution within [start, end], optionally only some fields.
+        Rollup resolutions end with the partial rollup of the current period.
+        """
+        if resolution not in self.buffers:
+            raise ValueError(f"Unknown resolution '{resolution}', expected one of {list(RESOLUTIONS)}")
+        fields = fields or list(FIELDS)
+        unknown = [field for field in fields if field not in FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+        window = self.buffers[resolution].window(start, end)
+
+        # Include the rollup still being filled, so recent minutes/hours are not missing
+        pending = self._pending.get(resolution)
+        if pending is not None and (start is None or pending[0] >= start) and (end is None or pending[0] <= end):
+            window.append((pending[0], tuple(total / pending[1] for total in pending[2])))
+
+        indexes = [FIELDS.index(field) for field in fields]
+        points = [[timestamp] + [round(row[i], 3) for i in indexes] for timestamp, row in window]
+        return {"resolution": resolution, "fields": ["timestamp"] + fields, "points": points}
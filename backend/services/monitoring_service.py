@@ -1,8 +1,24 @@
 """Monitoring service for system metrics and telemetry."""
+import asyncio
 import psutil
+import time
 from datetime import datetime
-from typing import Dict
+from typing import Dict, List
 from schemas.admin import SystemMetrics
+from services.metrics_timeseries import MetricsTimeSeries
+from config import settings
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _scheduler_waiting(inference_service) -> int:
+    """Generation steps queued in the fair scheduler (none queue without one)."""
+    scheduler = inference_service.scheduler if inference_service else None
+    return scheduler.waiting if scheduler else 0
 
 
 class MonitoringService:
@@ -13,14 +29,81 @@ class MonitoringService:
         self.total_requests = 0
         self.start_time = datetime.utcnow()
 
-    def get_system_metrics(self, cache_stats: dict, active_sessions: int) -> SystemMetrics:
-        """Get current system metrics."""
-        # CPU usage
-        cpu_usage = psutil.cpu_percent(interval=0.1)
+        # Latest resource sample, refreshed by run_sampler
+        psutil.cpu_percent(interval=None)  # Prime the CPU counter; the first reading is meaningless
+        self.cpu_usage = 0.0
+        self.memory_usage = psutil.virtual_memory().percent
+        self.sampled_at = datetime.utcnow()
+
+        # Time series of service metrics and the state needed to turn counters into rates
+        self.timeseries = MetricsTimeSeries(
+            settings.METRICS_RAW_POINTS,
+            settings.METRICS_MINUTE_POINTS,
+            settings.METRICS_HOUR_POINTS
+        )
+        self.process = psutil.Process()
+        self._latencies: List[float] = []
+        self._last_counts = None  # (time, requests, cache hits, cache misses, tokens)
+
+        # Streaming response framing totals
+        self.stream_responses = 0
+        self.stream_frames = 0
+        self.stream_bytes = 0
 
-        # Memory usage
-        memory = psutil.virtual_memory()
-        memory_usage = memory.percent
+    def record_latency(self, latency_ms: float):
+        """Record the latency of one HTTP request."""
+        self._latencies.append(latency_ms)
+
+    def sample(self, cache_manager=None, inference_service=None):
+        """
+        Take a resource sample without blocking (CPU usage since the previous sample) and
+        record a time-series point with rates since the previous sample.
+        """
+        now = time.time()
+        self.cpu_usage = psutil.cpu_percent(interval=None)
+        self.memory_usage = psutil.virtual_memory().percent
+        self.sampled_at = datetime.utcnow()
+
+        latencies, self._latencies = sorted(self._latencies), []
+        hits = cache_manager.hits if cache_manager else 0
+        misses = cache_manager.misses if cache_manager else 0
+        tokens = inference_service.tokens_generated if inference_service else 0
+        counts = (now, self.total_requests, hits, misses, tokens)
+
+        if self._last_counts is not None:
+            elapsed = max(now - self._last_counts[0], 1e-6)
+            # Counters can be reset (e.g. cache flush), so deltas are clamped at zero
+            requests, hits_delta, misses_delta, tokens_delta = (
+                max(0, current - previous) for current, previous in zip(counts[1:], self._last_counts[1:])
+            )
+            lookups = hits_delta + misses_delta
+            self.timeseries.record(now, {
+                "requests_per_second": requests / elapsed,
+                "latency_p50_ms": _percentile(latencies, 50),
+                "latency_p95_ms": _percentile(latencies, 95),
+                "latency_p99_ms": _percentile(latencies, 99),
+                "cache_hit_rate": hits_delta / lookups * 100 if lookups > 0 else 0.0,
+                "tokens_per_second": tokens_delta / elapsed,
+                "queue_depth": _scheduler_waiting(inference_service),
+                "in_flight": inference_service.in_flight if inference_service else 0,
+                "cpu_usage": self.cpu_usage,
+                "rss_mb": self.process.memory_info().rss / (1024 * 1024),
+            })
+        self._last_counts = counts
+
+    async def run_sampler(self, interval: float, cache_manager=None, inference_service=None):
+        """Sample system resources and service metrics every interval seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.sample(cache_manager, inference_service)
+            except Exception as e:
+                print(f"[Monitoring] Sample error: {type(e).__name__}: {str(e)}")
+
+    def get_system_metrics(self, cache_stats: dict, active_sessions: int) -> SystemMetrics:
+        """Get current system metrics from the latest background sample."""
+        cpu_usage = self.cpu_usage
+        memory_usage = self.memory_usage
 
         # Cache hit rate
         cache_hit_rate = cache_stats.get("hit_rate", 0.0)
@@ -37,6 +120,25 @@ class MonitoringService:
             uptime_seconds=uptime_seconds
         )
 
+    def record_stream(self, frames: int, bytes_sent: int):
+        """Record the SSE frames and bytes sent for one streamed response."""
+        self.stream_responses += 1
+        self.stream_frames += frames
+        self.stream_bytes += bytes_sent
+
+    def get_stream_stats(self) -> dict:
+        """Get streaming response framing statistics."""
+        responses = max(self.stream_responses, 1)
+        return {
+            "responses": self.stream_responses,
+            "frames": self.stream_frames,
+            "bytes": self.stream_bytes,
+            "avg_frames_per_response": round(self.stream_frames / responses, 1),
+            "avg_bytes_per_response": round(self.stream_bytes / responses, 1),
+            "flush_ms": settings.STREAM_FLUSH_MS,
+            "flush_chars": settings.STREAM_FLUSH_CHARS
+        }
+
     def increment_request_count(self):
         """Increment total request counter."""
         self.total_requests += 1
@@ -0,0 +1,157 @@
+"""Per-user, per-route-class token bucket rate limiting, shared through Redis when available."""
+from dataclasses import dataclass
+from typing import Dict, Optional
+import math
+import time
+
+# Atomic token bucket: refill by elapsed time, then take one token if available.
+# Uses the Redis clock so every replica sees the same time.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate))
+return {allowed, tostring(tokens)}
+"""
+
+
+@dataclass
+class RateLimitDecision:
+    """Outcome of one rate limit check."""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_seconds: int  # Until the bucket is full again
+    retry_after: int  # Until the next request is allowed (0 if allowed)
+
+    def headers(self) -> Dict[str, str]:
+        """Rate limit response headers (IETF RateLimit fields, plus Retry-After when limited)."""
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset_seconds),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class RateLimiter:
+    """
+    Token buckets per (route class, user).
+
+    Each route class allows `limit` requests per `period` seconds, refilled
+    continuously, so short bursts up to the limit are allowed. With Redis the bucket
+    update runs as one Lua script, so all replicas share the budget; otherwise buckets
+    are kept in process. After a failed Redis call the in-process buckets are used for
+    redis_retry_seconds, so an outage costs one failed round trip (and one log line)
+    per retry window rather than per request.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, int],
+        period: int,
+        redis_client=None,
+        max_local_buckets: int = 100000,
+        redis_retry_seconds: float = 5.0
+    ):
+        """Initialize limiter with requests per period for each route class."""
+        self.limits = limits
+        self.period = period
+        self.max_local_buckets = max_local_buckets
+        self.redis_retry_seconds = redis_retry_seconds
+        self._script = redis_client.register_script(TOKEN_BUCKET_LUA) if redis_client is not None else None
+        self._buckets: Dict[str, list] = {}  # key -> [tokens, monotonic timestamp]
+        self._redis_retry_at = 0.0
+
+        # Statistics
+        self.allowed = 0
+        self.limited = 0
+        self.redis_errors = 0
+
+    def _take_local(self, key: str, capacity: int, rate: float) -> tuple[bool, float]:
+        """Take a token from an in-process bucket. Returns (allowed, tokens left)."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_local_buckets:
+                self._prune(now)
+            bucket = self._buckets[key] = [float(capacity), now]
+
+        tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        bucket[0] = tokens
+        bucket[1] = now
+        return allowed, tokens
+
+    def _prune(self, now: float):
+        """Drop buckets that have refilled completely; they hold no state worth keeping."""
+        for key in [k for k, (tokens, ts) in self._buckets.items() if now - ts >= self.period]:
+            del self._buckets[key]
+
+    def _take_redis(self, key: str, capacity: int, rate: float) -> Optional[tuple[bool, float]]:
+        now = time.monotonic()
+        if now < self._redis_retry_at:
+            return None
+        try:
+            allowed, tokens = self._script(keys=[f"ratelimit:{key}"], args=[capacity, rate / 1000])
+        except Exception as e:
+            self.redis_errors += 1
+            self._redis_retry_at = now + self.redis_retry_seconds
+            print(
+                f"[RateLimiter] Redis error: {type(e).__name__}: {str(e)} "
+                f"(using in-process buckets for {self.redis_retry_seconds}s)"
+            )
+            return None
+        return bool(int(allowed)), float(tokens)
+
+    def check(self, route_class: str, user_id: str) -> RateLimitDecision:
+        """Count one request of a user against a route class."""
+        capacity = self.limits[route_class]
+        rate = capacity / self.period  # Tokens per second
+        key = f"{route_class}:{user_id}"
+
+        result = self._take_redis(key, capacity, rate) if self._script is not None else None
+        if result is None:
+            result = self._take_local(key, capacity, rate)
+
+        allowed, tokens = result
+        if allowed:
+            self.allowed += 1
+        else:
+            self.limited += 1
+
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=capacity,
+            remaining=int(tokens),
+            reset_seconds=math.ceil((capacity - tokens) / rate),
+            retry_after=0 if allowed else max(1, math.ceil((1 - tokens) / rate))
+        )
+
+    def get_stats(self) -> dict:
+        """Get rate limiter statistics."""
+        return {
+            "backend": "redis" if self._script is not None else "in-memory",
+            "limits": self.limits,
+            "period_seconds": self.period,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "redis_errors": self.redis_errors,
+            "redis_fallback_active": time.monotonic() < self._redis_retry_at,
+            "local_buckets": len(self._buckets)
+        }
@@ -0,0 +1,211 @@
+"""Scheduled purge of sessions past their retention period, in small throttled batches."""
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+import asyncio
+import time
+from sqlalchemy import and_, delete, func, or_, select
+from database import AsyncSessionLocal
+from database.models import User as UserModel, Session as SessionModel, Message as MessageModel, SessionArchive
+
+
+class RetentionPurger:
+    """
+    Deletes sessions (with their messages and archives) not updated for longer than the
+    retention period.
+
+    Unlike clear_all_sessions, each transaction covers at most batch_size sessions and
+    the purger pauses between batches, so the database write lock is only ever held
+    briefly and live chat writes interleave with the purge. Per-user overrides are
+    keyed by username; a retention of 0 days keeps history forever.
+    """
+
+    def __init__(
+        self,
+        session_service,
+        retention_days: int,
+        user_overrides: Dict[str, int],
+        batch_size: int,
+        pause_ms: int
+    ):
+        """Initialize purger with the session service whose caches and counters it must update."""
+        self.session_service = session_service
+        self.retention_days = retention_days
+        self.user_overrides = user_overrides
+        self.batch_size = batch_size
+        self.pause_ms = pause_ms
+
+        # Statistics
+        self.runs = 0
+        self.purged_sessions = 0
+        self.purged_messages = 0
+        self.batches = 0
+        self.lock_ms_total = 0.0
+        self.lock_ms_max = 0.0
+        self.last_run: Optional[dict] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any user has a finite retention period."""
+        return self.retention_days > 0 or any(days > 0 for days in self.user_overrides.values())
+
+    async def _expired_condition(self, now: datetime):
+        """WHERE clause matching sessions past the retention period of their owner."""
+        overrides = {}
+        if self.user_overrides:
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(
+                    select(UserModel.username, UserModel.user_id)
+                    .where(UserModel.username.in_(list(self.user_overrides)))
+                )).all()
+            overrides = {user_id: self.user_overrides[username] for username, user_id in rows}
+
+        clauses = []
+        if self.retention_days > 0:
+            default_clause = SessionModel.updated_at < now - timedelta(days=self.retention_days)
+            if overrides:
+                default_clause = and_(SessionModel.user_id.notin_(list(overrides)), default_clause)
+            clauses.append(default_clause)
+        for user_id, days in overrides.items():
+            if days > 0:
+                clauses.append(and_(
+                    SessionModel.user_id == user_id,
+                    SessionModel.updated_at < now - timedelta(days=days)
+                ))
+        return or_(*clauses) if clauses else None
+
+    async def _purge_batch(self, condition, skip: set) -> tuple[int, int, int, float]:
+        """
+        Delete one batch of expired sessions in a single transaction.
+
+        Returns (sessions selected, sessions deleted, messages deleted, milliseconds the
+        write lock was held).
+        """
+        writer = self.session_service.writer
+        # No flush can run while the batch is deleted, so queued rows cannot land in it
+        async with writer.exclusive() if writer is not None else nullcontext(), AsyncSessionLocal() as db:
+            query = select(SessionModel.session_id, SessionModel.user_id).where(condition)
+            if skip:
+                query = query.where(SessionModel.session_id.notin_(list(skip)))
+            session_rows = (await db.execute(query.limit(self.batch_size))).all()
+
+            # Sessions with queued writes are active again; leave them for the next run
+            stale = []
+            for session_id, user_id in session_rows:
+                if writer is not None and writer.has_pending(session_id):
+                    skip.add(session_id)
+                else:
+                    stale.append((session_id, user_id))
+            if not stale:
+                return len(session_rows), 0, 0, 0.0
+
+            session_ids = [session_id for session_id, _ in stale]
+            archived_messages = await db.scalar(
+                select(func.coalesce(func.sum(SessionArchive.message_count), 0))
+                .where(SessionArchive.session_id.in_(session_ids))
+            )
+
+            # The write lock is taken by the first DELETE and released by the commit
+            lock_start = time.perf_counter()
+            hot_messages = (await db.execute(
+                delete(MessageModel).where(MessageModel.session_id.in_(session_ids))
+            )).rowcount
+            await db.execute(delete(SessionArchive).where(SessionArchive.session_id.in_(session_ids)))
+            await db.execute(delete(SessionModel).where(SessionModel.session_id.in_(session_ids)))
+
+            # A message enqueued during the deletes revives its session; retry without it
+            revived = [session_id for session_id in session_ids if writer is not None and writer.has_pending(session_id)]
+            if revived:
+                await db.rollback()
+                skip.update(revived)
+                return len(session_rows), 0, 0, 0.0
+
+            await db.commit()
+            lock_ms = (time.perf_counter() - lock_start) * 1000
+
+            for session_id, user_id in stale:
+                self.session_service.forget_session(session_id, user_id)
+            # Rows enqueued during the commit belong to sessions that are gone now
+            dropped = writer.discard(session_ids) if writer is not None else 0
+
+        if dropped:
+            print(f"[RetentionPurger] Dropped {dropped} queued messages of purged sessions")
+        messages = hot_messages + archived_messages
+        self.session_service.total_messages -= messages + dropped
+        return len(session_rows), len(stale), messages, lock_ms
+
+    async def purge(self) -> dict:
+        """Purge all expired sessions batch by batch. Returns a report of this run."""
+        async with self._lock:
+            start = time.perf_counter()
+            report = {
+                "started_at": datetime.utcnow().isoformat(),
+                "sessions": 0,
+                "messages": 0,
+                "batches": 0,
+                "lock_ms_total": 0.0,
+                "lock_ms_max": 0.0,
+            }
+
+            condition = await self._expired_condition(datetime.utcnow())
+            skip: set = set()
+            while condition is not None:
+                selected, sessions, messages, lock_ms = await self._purge_batch(condition, skip)
+                if sessions == 0:
+                    if selected == 0:
+                        break
+                    continue
+                report["sessions"] += sessions
+                report["messages"] += messages
+                report["batches"] += 1
+                report["lock_ms_total"] += lock_ms
+                report["lock_ms_max"] = max(report["lock_ms_max"], lock_ms)
+                if selected < self.batch_size:
+                    break
+                # Give live requests a turn at the write lock
+                await asyncio.sleep(self.pause_ms / 1000)
+
+            report["seconds"] = round(time.perf_counter() - start, 3)
+            report["lock_ms_total"] = round(report["lock_ms_total"], 2)
+            report["lock_ms_max"] = round(report["lock_ms_max"], 2)
+
+            self.runs += 1
+            self.purged_sessions += report["sessions"]
+            self.purged_messages += report["messages"]
+            self.batches += report["batches"]
+            self.lock_ms_total += report["lock_ms_total"]
+            self.lock_ms_max = max(self.lock_ms_max, report["lock_ms_max"])
+            self.last_run = report
+            return report
+
+    async def run(self, interval: int):
+        """Purge expired sessions every interval seconds."""
+        while True:
+            try:
+                report = await self.purge()
+                if report["sessions"]:
+                    print(
+                        f"[RetentionPurger] Purged {report['sessions']} sessions, {report['messages']} messages "
+                        f"in {report['batches']} batches (max lock {report['lock_ms_max']}ms)"
+                    )
+            except Exception as e:
+                print(f"[RetentionPurger] Purge error: {type(e).__name__}: {str(e)}")
+            await asyncio.sleep(interval)
+
+    def get_stats(self) -> dict:
+        """Get retention purge statistics."""
+        return {
+            "enabled": self.enabled,
+            "retention_days": self.retention_days,
+            "user_overrides": self.user_overrides,
+            "batch_size": self.batch_size,
+            "pause_ms": self.pause_ms,
+            "runs": self.runs,
+            "purged_sessions": self.purged_sessions,
+            "purged_messages": self.purged_messages,
+            "batches": self.batches,
+            "lock_ms_total": round(self.lock_ms_total, 2),
+            "lock_ms_max": round(self.lock_ms_max, 2),
+            "last_run": self.last_run
+        }
@@ -0,0 +1,283 @@
+"""Semantic similarity tier for the LLM cache using a vectorised nearest-neighbour index."""
+from typing import Optional, List
+import os
+import re
+import threading
+import time
+import zlib
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# Common contractions expanded before embedding so "what's" and "what is" share features
+_CONTRACTIONS = {
+    "what's": "what is",
+    "who's": "who is",
+    "where's": "where is",
+    "how's": "how is",
+    "it's": "it is",
+    "that's": "that is",
+    "there's": "there is",
+    "can't": "can not",
+    "won't": "will not",
+    "don't": "do not",
+    "doesn't": "does not",
+    "isn't": "is not",
+    "aren't": "are not",
+    "i'm": "i am",
+}
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+# Words that can differ between two prompts without changing what is asked. Everything
+# else (including numbers, negations and prepositions) must match in order; a hashing
+# embedder scores "cats"/"bats" or "12x13"/"12x14" as near-duplicates.
+_FUNCTION_WORDS = frozenset({
+    "a", "an", "the", "is", "are", "was", "were", "be", "am", "do", "does", "did",
+    "can", "could", "would", "will", "should", "please", "i", "me", "you", "us", "we",
+})
+
+# Bumped when the embedding or tag scheme changes; older persisted indexes are dropped
+INDEX_VERSION = 2
+
+
+def _words(text: str) -> List[str]:
+    """Lower-cased words with contractions expanded."""
+    words = []
+    for word in _WORD_RE.findall(text.lower()):
+        words.extend(_CONTRACTIONS.get(word, word).split())
+    return words
+
+
+def _content_words(text: str) -> List[str]:
+    return [w for w in _words(text) if w not in _FUNCTION_WORDS]
+
+
+def content_signature(text: str) -> str:
+    """The words of a prompt that must match exactly for a semantic hit, in order."""
+    return " ".join(_content_words(text))
+
+
+class HashingEmbedder:
+    """Embeds the content words of a text into a fixed-size vector using signed feature hashing of words and character trigrams."""
+
+    def __init__(self, dim: int):
+        """Initialize embedder with the output dimension."""
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        """Extract word unigrams, word bigrams and character trigrams from the content words."""
+        words = _content_words(text)
+
+        features = [f"w:{w}" for w in words]
+        features.extend(f"b:{a}_{b}" for a, b in zip(words, words[1:]))
+        for w in words:
+            padded = f"#{w}#"
+            features.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, text: str) -> "np.ndarray":
+        """Return an L2-normalised float32 embedding for the text."""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in self._features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if (h >> 31) & 1 else -1.0
+            vector[h % self.dim] += sign
+
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector /= norm
+        return vector
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour index mapping prompt embeddings to exact cache keys.
+
+    Vectors live in a preallocated (capacity x dim) float32 matrix. Lookups are a single
+    matrix-vector product followed by a top-1 search restricted to entries generated with
+    the same sampling parameters and the same content_signature, so prompts only match
+    when they differ in function words, case, punctuation or contractions. When full,
+    the least recently used row is overwritten.
+    """
+
+    def __init__(self, capacity: int, dim: int, threshold: float, index_path: Optional[str] = None):
+        """Initialize an empty index and load the persisted one if present."""
+        self.capacity = capacity
+        self.dim = dim
+        self.threshold = threshold
+        self.index_path = index_path
+        self.embedder = HashingEmbedder(dim)
+        self._lock = threading.Lock()
+
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.param_tags = np.zeros(capacity, dtype=np.int64)
+        self.last_used = np.zeros(capacity, dtype=np.float64)
+        self.keys: List[Optional[str]] = [None] * capacity
+        self.key_to_row: dict[str, int] = {}
+        self.size = 0
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if index_path:
+            self.load()
+
+    @staticmethod
+    def param_tag(prompt: str, **kwargs) -> int:
+        """Hash the sampling parameters and content signature; lookups only match equal tags."""
+        tag = f"{kwargs.get('temperature')}|{kwargs.get('max_tokens')}|{content_signature(prompt)}"
+        return zlib.crc32(tag.encode("utf-8"))
+
+    def lookup(self, prompt: str, **kwargs) -> Optional[str]:
+        """Return the exact cache key of the most similar stored prompt above the threshold."""
+        query = self.embedder.embed(prompt)
+        tag = self.param_tag(prompt, **kwargs)
+
+        with self._lock:
+            if self.size == 0:
+                self.misses += 1
+                return None
+
+            sims = self.vectors[:self.size] @ query
+            sims[self.param_tags[:self.size] != tag] = -1.0
+            row = int(np.argmax(sims))
+
+            if sims[row] < self.threshold:
+                self.misses += 1
+                return None
+
+            self.last_used[row] = time.monotonic()
+            self.hits += 1
+            return self.keys[row]
+
+    def add(self, prompt: str, cache_key: str, **kwargs):
+        """Index a prompt under its exact cache key, evicting the least recently used row if full."""
+        vector = self.embedder.embed(prompt)
+        tag = self.param_tag(prompt, **kwargs)
+
+        with self._lock:
+            row = self.key_to_row.get(cache_key)
+            if row is None:
+                if self.size < self.capacity:
+                    row = self.size
+                    self.size += 1
+                else:
+                    row = int(np.argmin(self.last_used[:self.size]))
+                    del self.key_to_row[self.keys[row]]
+                    self.evictions += 1
+                self.keys[row] = cache_key
+                self.key_to_row[cache_key] = row
+
+            self.vectors[row] = vector
+            self.param_tags[row] = tag
+            self.last_used[row] = time.monotonic()
+
+    def remove(self, cache_key: str):
+        """Drop an entry whose exact value is no longer available."""
+        with self._lock:
+            row = self.key_to_row.pop(cache_key, None)
+            if row is None:
+                return
+
+            # Move the last row into the freed slot to keep the matrix dense
+            last = self.size - 1
+            if row != last:
+                self.vectors[row] = self.vectors[last]
+                self.param_tags[row] = self.param_tags[last]
+                self.last_used[row] = self.last_used[last]
+                self.keys[row] = self.keys[last]
+                self.key_to_row[self.keys[row]] = row
+            self.keys[last] = None
+            self.size = last
+
+    def clear(self) -> int:
+        """Remove all entries and reset statistics."""
+        with self._lock:
+            count = self.size
+            self.keys = [None] * self.capacity
+            self.key_to_row.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            return count
+
+    def save(self) -> bool:
+        """Persist the index to disk."""
+        if not self.index_path:
+            return False
+
+        try:
+            directory = os.path.dirname(self.index_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            with self._lock:
+                n = self.size
+                tmp_path = f"{self.index_path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    np.savez_compressed(
+                        f,
+                        vectors=self.vectors[:n],
+                        param_tags=self.param_tags[:n],
+                        keys=np.array(self.keys[:n], dtype=str),
+                        dim=np.array(self.dim),
+                        version=np.array(INDEX_VERSION)
+                    )
+            os.replace(tmp_path, self.index_path)
+            return True
+        except Exception as e:
+            print(f"[SemanticCache] Save error: {type(e).__name__}: {str(e)}")
+            return False
+
+    def load(self) -> bool:
+        """Load a persisted index from disk if it matches the configured dimension."""
+        if not self.index_path or not os.path.exists(self.index_path):
+            return False
+
+        try:
+            data = np.load(self.index_path)
+            if "version" not in data or int(data["version"]) != INDEX_VERSION:
+                print("[SemanticCache] Persisted index has an old format, starting empty.")
+                return False
+            if int(data["dim"]) != self.dim:
+                print("[SemanticCache] Persisted index dimension mismatch, starting empty.")
+                return False
+
+            keys = [str(key) for key in data["keys"][:self.capacity]]
+            n = len(keys)
+            with self._lock:
+                self.vectors[:n] = data["vectors"][:n]
+                self.param_tags[:n] = data["param_tags"][:n]
+                self.last_used[:n] = time.monotonic()
+                self.keys[:n] = keys
+                self.key_to_row = {key: i for i, key in enumerate(keys)}
+                self.size = n
+            print(f"✓ Semantic cache index loaded ({n} entries)")
+            return True
+        except Exception as e:
+            print(f"[SemanticCache] Load error: {type(e).__name__}: {str(e)}")
+            return False
+
+    def get_stats(self) -> dict:
+        """Get semantic tier statistics."""
+        total = self.hits + self.misses
+        hit_rate = (self.hits / total * 100) if total > 0 else 0
+
+        return {
+            "entries": self.size,
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(hit_rate, 2),
+            "index_bytes": int(self.vectors[:self.size].nbytes)
+        }
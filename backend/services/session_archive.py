@@ -0,0 +1,36 @@
+"""Compact blob format for the messages of archived sessions."""
+from datetime import datetime
+from typing import List
+import json
+import zlib
+
+ARCHIVE_VERSION = 1
+
+# Positional message fields, in payload order
+_FIELDS = ("message_id", "user_id", "role", "content", "timestamp", "tokens_used")
+
+
+def encode_messages(messages: List[dict], level: int) -> bytes:
+    """Serialize messages (dicts of message columns) into a compressed blob."""
+    rows = [
+        [msg["message_id"], msg["user_id"], msg["role"], msg["content"],
+         msg["timestamp"].isoformat(), msg["tokens_used"]]
+        for msg in messages
+    ]
+    payload = json.dumps({"version": ARCHIVE_VERSION, "messages": rows}, separators=(",", ":"))
+    return zlib.compress(payload.encode("utf-8"), level)
+
+
+def decode_messages(blob: bytes, session_id: str) -> List[dict]:
+    """Restore message dicts, ready for a bulk insert into the messages table."""
+    data = json.loads(zlib.decompress(blob))
+    if data.get("version") != ARCHIVE_VERSION:
+        raise ValueError(f"Unsupported session archive version {data.get('version')}")
+
+    messages = []
+    for row in data["messages"]:
+        msg = dict(zip(_FIELDS, row))
+        msg["session_id"] = session_id
+        msg["timestamp"] = datetime.fromisoformat(msg["timestamp"])
+        messages.append(msg)
+    return messages
@@ -1,120 +1,572 @@
 """Session management service for chat sessions."""
-from datetime import datetime
+from collections import OrderedDict
+from datetime import datetime, timedelta
 from typing import List, Optional
-from schemas.chat import ChatMessage, ChatHistory
-from database import SessionLocal
-from database.models import Session as SessionModel, Message as MessageModel
+import asyncio
+from sqlalchemy import func, select, update, delete, insert, literal, or_, and_, exists, text, Integer
+from schemas.chat import ChatMessage, ChatHistory, SessionSummary, SearchResult
+from database import DIALECT, AsyncSessionLocal
+from sqlalchemy.orm import selectinload
+from database.models import Session as SessionModel, Message as MessageModel, SessionArchive
+from config import settings
+from utils.prompt_builder import _estimate_tokens
+from services.message_writer import MessageWriter
+from services.session_archive import encode_messages, decode_messages
+import base64
+import re
 import uuid
 
+# Length of message previews in session listings
+PREVIEW_CHARS = 100
+
+
+def encode_cursor(timestamp: datetime, row_id: str) -> str:
+    """Encode a (timestamp, id) keyset position as an opaque cursor."""
+    raw = f"{timestamp.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """Decode a cursor produced by encode_cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        timestamp, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp), row_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
 
 class SessionService:
     """Manages user chat sessions and message history."""
 
     def __init__(self):
         """Initialize session service."""
-        pass
+        # Per-session cache of owner and most recent messages, in LRU order.
+        # Each entry: {"user_id": str, "messages": Optional[List[ChatMessage]], "complete": bool}
+        # The cache is per process, so it is disabled on PostgreSQL, where other replicas
+        # may add messages to (or delete) the same session.
+        self._history_cache: OrderedDict[str, dict] = OrderedDict()
+        self.history_cache_sessions = 0 if DIALECT == "postgresql" else settings.HISTORY_CACHE_SESSIONS
+        self.history_cache_messages = settings.HISTORY_CACHE_MESSAGES
+
+        # Optional write-behind queue for message inserts
+        self.writer: Optional[MessageWriter] = None
+        if settings.MESSAGE_WRITE_BEHIND:
+            self.writer = MessageWriter(
+                settings.MESSAGE_FLUSH_INTERVAL_MS,
+                settings.MESSAGE_FLUSH_BATCH_SIZE,
+                max_retries=settings.MESSAGE_FLUSH_MAX_RETRIES,
+                max_pending=settings.MESSAGE_QUEUE_MAX_ROWS
+            )
+
+        # Incrementally maintained totals for admin statistics (see reconcile_counters)
+        self.total_sessions = 0
+        self.total_messages = 0
+        self.sessions_per_user: dict[str, int] = {}
+
+        # Archive statistics
+        self.archived_sessions = 0
+        self.archived_messages = 0
+        self.archived_bytes = 0
+        self.rehydrated_sessions = 0
+        self.archive_runs = 0
+
+    def _cache_entry(self, session_id: str) -> Optional[dict]:
+        """Return the cached entry for a session, marking it most recently used."""
+        entry = self._history_cache.get(session_id)
+        if entry is not None:
+            self._history_cache.move_to_end(session_id)
+        return entry
+
+    def _cache_put(self, session_id: str, entry: dict):
+        """Insert a cache entry, evicting the least recently used session if full."""
+        self._history_cache[session_id] = entry
+        self._history_cache.move_to_end(session_id)
+        while len(self._history_cache) > self.history_cache_sessions:
+            self._history_cache.popitem(last=False)
+
+    def invalidate_history_cache(self, session_id: Optional[str] = None):
+        """Drop the cached owner and messages of a session, or of every session."""
+        if session_id is None:
+            self._history_cache.clear()
+        else:
+            self._history_cache.pop(session_id, None)
+
+    async def _sync(self, session_id: Optional[str] = None):
+        """Flush queued messages before reading them from the database (read-your-writes)."""
+        if self.writer is not None and self.writer.has_pending(session_id):
+            await self.writer.flush()
+
+    async def _rehydrate(self, session_id: str) -> bool:
+        """Move an archived session's messages back into the messages table, if archived."""
+        async with AsyncSessionLocal() as db:
+            archive = await db.get(SessionArchive, session_id)
+            if archive is None:
+                return False
+
+            messages = decode_messages(archive.payload, session_id)
+            # Deleting first makes concurrent rehydrations of the same session a no-op
+            deleted = (await db.execute(
+                delete(SessionArchive).where(SessionArchive.session_id == session_id)
+            )).rowcount
+            if not deleted:
+                await db.rollback()
+                return False
+            if messages:
+                await db.execute(insert(MessageModel), messages)
+            # Keeps the archiver from archiving it again right away; updated_at is left
+            # alone so reading an old session does not move it up the session list
+            await db.execute(
+                update(SessionModel)
+                .where(SessionModel.session_id == session_id)
+                .values(rehydrated_at=datetime.utcnow(), updated_at=SessionModel.updated_at)
+            )
+            await db.commit()
+
+        self.rehydrated_sessions += 1
+        return True
+
+    @staticmethod
+    def _to_schema(msg: MessageModel) -> ChatMessage:
+        return ChatMessage(
+            message_id=msg.message_id,
+            session_id=msg.session_id,
+            user_id=msg.user_id,
+            role=msg.role,
+            content=msg.content,
+            timestamp=msg.timestamp,
+            tokens_used=msg.tokens_used
+        )
 
-    def create_session(self, user_id: str) -> str:
+    async def create_session(self, user_id: str) -> str:
         """Create a new chat session for a user."""
         session_id = str(uuid.uuid4())
-        db = SessionLocal()
-        try:
+        async with AsyncSessionLocal() as db:
             session = SessionModel(
                 session_id=session_id,
                 user_id=user_id
             )
             db.add(session)
-            db.commit()
+            await db.commit()
+            self._cache_put(session_id, {"user_id": user_id, "messages": [], "complete": True})
+            self._count_session(user_id, 1)
             return session_id
-        finally:
-            db.close()
-
-    def get_session(self, session_id: str) -> Optional[ChatHistory]:
-        """Get session by ID."""
-        db = SessionLocal()
-        try:
-            session = db.query(SessionModel).filter(SessionModel.session_id == session_id).first()
+
+    async def get_session(
+        self,
+        session_id: str,
+        limit: Optional[int] = None,
+        before: Optional[str] = None
+    ) -> Optional[ChatHistory]:
+        """
+        Get session by ID.
+
+        Without `limit` all messages are returned. With `limit`, only the newest `limit`
+        messages older than the `before` cursor are returned, and `next_cursor` points at
+        the next older page.
+        """
+        await self._sync(session_id)
+        async with AsyncSessionLocal() as db:
+            session = await db.get(SessionModel, session_id)
             if not session:
                 return None
 
-            # Convert messages to schema
-            messages = [
-                ChatMessage(
-                    message_id=msg.message_id,
-                    session_id=msg.session_id,
-                    user_id=msg.user_id,
-                    role=msg.role,
-                    content=msg.content,
-                    timestamp=msg.timestamp,
-                    tokens_used=msg.tokens_used
+            query = select(MessageModel).where(MessageModel.session_id == session_id)
+            if before:
+                before_ts, before_id = decode_cursor(before)
+                query = query.where(or_(
+                    MessageModel.timestamp < before_ts,
+                    and_(MessageModel.timestamp == before_ts, MessageModel.message_id < before_id)
+                ))
+
+            next_cursor = None
+            if limit is None:
+                query = query.order_by(MessageModel.timestamp.asc(), MessageModel.message_id.asc())
+            else:
+                query = (
+                    query.order_by(MessageModel.timestamp.desc(), MessageModel.message_id.desc())
+                    .limit(limit + 1)
                 )
-                for msg in session.messages
-            ]
+            rows = list((await db.scalars(query)).all())
+
+            # Archived messages can only be missing if the hot table returned fewer rows than asked for
+            if limit is None or len(rows) <= limit:
+                await db.commit()  # End the read transaction before the restore writes
+                if await self._rehydrate(session_id):
+                    rows = list((await db.scalars(query)).all())
+
+            if limit is not None:
+                if len(rows) > limit:
+                    rows = rows[:limit]
+                    next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].message_id)
+                rows.reverse()
 
             return ChatHistory(
                 session_id=session.session_id,
                 user_id=session.user_id,
-                messages=messages,
+                messages=[self._to_schema(msg) for msg in rows],
                 created_at=session.created_at,
-                updated_at=session.updated_at
+                updated_at=session.updated_at,
+                next_cursor=next_cursor
+            )
+
+    async def list_user_sessions(
+        self,
+        user_id: str,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> tuple[List[SessionSummary], Optional[str]]:
+        """
+        Get one page of session summaries for a user, most recently updated first.
+
+        Message counts and previews come from correlated subqueries in a single statement,
+        so no message rows are loaded. Archived sessions use the counts and previews stored
+        with their archive. Returns the summaries and the cursor of the next page.
+        """
+        message_count = (
+            select(func.count(MessageModel.message_id))
+            .where(MessageModel.session_id == SessionModel.session_id)
+            .correlate(SessionModel)
+            .scalar_subquery()
+        )
+        title = (
+            select(func.substr(MessageModel.content, 1, PREVIEW_CHARS))
+            .where(MessageModel.session_id == SessionModel.session_id, MessageModel.role == "user")
+            .order_by(MessageModel.timestamp.asc())
+            .limit(1)
+            .correlate(SessionModel)
+            .scalar_subquery()
+        )
+        last_message = (
+            select(func.substr(MessageModel.content, 1, PREVIEW_CHARS))
+            .where(MessageModel.session_id == SessionModel.session_id)
+            .order_by(MessageModel.timestamp.desc())
+            .limit(1)
+            .correlate(SessionModel)
+            .scalar_subquery()
+        )
+
+        query = (
+            select(
+                SessionModel.session_id,
+                SessionModel.user_id,
+                SessionModel.created_at,
+                SessionModel.updated_at,
+                func.coalesce(SessionArchive.message_count, 0) + message_count,
+                func.coalesce(SessionArchive.title, title),
+                func.coalesce(last_message, SessionArchive.last_message_preview)
+            )
+            .outerjoin(SessionArchive, SessionArchive.session_id == SessionModel.session_id)
+            .where(SessionModel.user_id == user_id)
+        )
+
+        if cursor:
+            cursor_ts, cursor_id = decode_cursor(cursor)
+            query = query.where(or_(
+                SessionModel.updated_at < cursor_ts,
+                and_(SessionModel.updated_at == cursor_ts, SessionModel.session_id < cursor_id)
+            ))
+
+        query = query.order_by(SessionModel.updated_at.desc(), SessionModel.session_id.desc()).limit(limit + 1)
+
+        await self._sync()
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(query)).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].updated_at, rows[-1].session_id)
+
+        summaries = [
+            SessionSummary(
+                session_id=row[0],
+                user_id=row[1],
+                created_at=row[2],
+                updated_at=row[3],
+                message_count=row[4],
+                title=row[5],
+                last_message_preview=row[6]
+            )
+            for row in rows
+        ]
+        return summaries, next_cursor
+
+    async def search_messages(
+        self,
+        user_id: str,
+        query: str,
+        limit: int = 20,
+        offset: int = 0
+    ) -> tuple[List[SearchResult], Optional[int]]:
+        """
+        Full-text search over a user's messages, most relevant first.
+
+        Uses the FTS5 index on SQLite and the GIN tsvector index on PostgreSQL.
+        Returns the results and the offset of the next page.
+
+        Only messages in the messages table are indexed, so sessions moved to archive
+        blobs are not searched until they are opened (and rehydrated) again; see
+        count_archived_sessions.
+        """
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return [], None
+
+        params = {"user_id": user_id, "limit": limit + 1, "offset": offset}
+        if DIALECT == "postgresql":
+            # Rank first, then build headlines only for the returned page
+            statement = text(
+                "SELECT message_id, session_id, role, timestamp, score, "
+                "ts_headline('english', content, plainto_tsquery('english', :query), "
+                "'StartSel=<mark>, StopSel=</mark>, MaxWords=24, MinWords=8') AS snippet "
+                "FROM (SELECT message_id, session_id, role, timestamp, content, "
+                "ts_rank(to_tsvector('english', content), plainto_tsquery('english', :query)) AS score "
+                "FROM messages WHERE user_id = :user_id "
+                "AND to_tsvector('english', content) @@ plainto_tsquery('english', :query) "
+                "ORDER BY score DESC, timestamp DESC LIMIT :limit OFFSET :offset) AS ranked "
+                "ORDER BY score DESC, timestamp DESC"
+            )
+            params["query"] = " ".join(terms)
+        else:
+            # Terms are quoted so user input is never parsed as FTS5 syntax.
+            # The user_id column scopes the match (it gets zero weight in the ranking),
+            # and the join checks the owner again.
+            statement = text(
+                "SELECT m.message_id, m.session_id, m.role, m.timestamp, "
+                "-bm25(messages_fts, 1.0, 0.0) AS score, "
+                "snippet(messages_fts, 0, '<mark>', '</mark>', '…', 16) AS snippet "
+                "FROM messages_fts JOIN messages m ON m.seq = messages_fts.rowid AND m.user_id = :user_id "
+                "WHERE messages_fts MATCH :match "
+                "ORDER BY bm25(messages_fts, 1.0, 0.0), m.timestamp DESC LIMIT :limit OFFSET :offset"
             )
-        finally:
-            db.close()
+            phrase = " ".join(f'"{term}"' for term in terms)
+            params["match"] = f'user_id:"{user_id}" AND content:({phrase})'
+
+        await self._sync()
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(statement, params)).mappings().all()
+
+        next_offset = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_offset = offset + limit
+
+        results = [
+            SearchResult(
+                message_id=row["message_id"],
+                session_id=row["session_id"],
+                role=row["role"],
+                snippet=row["snippet"],
+                timestamp=row["timestamp"],
+                score=round(float(row["score"]), 6)
+            )
+            for row in rows
+        ]
+        return results, next_offset
+
+    async def count_archived_sessions(self, user_id: str) -> int:
+        """Number of a user's sessions whose messages are archived (and so not searchable)."""
+        async with AsyncSessionLocal() as db:
+            return await db.scalar(
+                select(func.count()).select_from(SessionArchive).where(SessionArchive.user_id == user_id)
+            )
+
+    async def get_session_owner(self, session_id: str) -> Optional[str]:
+        """Get the user_id owning a session, or None if it does not exist."""
+        entry = self._cache_entry(session_id)
+        if entry is not None:
+            return entry["user_id"]
+
+        async with AsyncSessionLocal() as db:
+            user_id = await db.scalar(
+                select(SessionModel.user_id).where(SessionModel.session_id == session_id)
+            )
+        if user_id is not None:
+            self._cache_put(session_id, {"user_id": user_id, "messages": None, "complete": False})
+        return user_id
+
+    async def _load_recent(self, session_id: str, limit: int) -> List[ChatMessage]:
+        """Load the last `limit` messages of a session in chronological order."""
+        await self._sync(session_id)
+        query = (
+            select(MessageModel)
+            .where(MessageModel.session_id == session_id)
+            .order_by(MessageModel.timestamp.desc())
+            .limit(limit)
+        )
+        async with AsyncSessionLocal() as db:
+            rows = (await db.scalars(query)).all()
+        # Only a short read can be missing archived messages
+        if len(rows) < limit and await self._rehydrate(session_id):
+            async with AsyncSessionLocal() as db:
+                rows = (await db.scalars(query)).all()
+        return [self._to_schema(msg) for msg in reversed(rows)]
+
+    async def get_recent_messages(
+        self,
+        session_id: str,
+        limit: Optional[int] = None,
+        max_tokens: Optional[int] = None
+    ) -> List[ChatMessage]:
+        """
+        Get the most recent messages of a session in chronological order.
+
+        Returns at most `limit` messages and, if `max_tokens` is given, only as many of the
+        newest messages as fit in that estimated token budget. Served from the per-session
+        cache when the cached window covers the request.
+        """
+        entry = self._cache_entry(session_id)
+        window = self.history_cache_messages
+        wanted = limit if limit is not None else window
+
+        if entry is None or entry["messages"] is None:
+            messages = await self._load_recent(session_id, window)
+            if entry is not None:
+                entry["messages"] = messages
+                entry["complete"] = len(messages) < window
+        else:
+            messages = entry["messages"]
+
+        if wanted > len(messages) and not (entry and entry["complete"]):
+            # Request exceeds the cached window
+            messages = await self._load_recent(session_id, wanted)
+
+        messages = messages[-wanted:] if wanted > 0 else []
+
+        if max_tokens is not None:
+            selected = []
+            used = 0
+            for msg in reversed(messages):
+                used += _estimate_tokens(msg.content)
+                if used > max_tokens:
+                    break
+                selected.append(msg)
+            messages = list(reversed(selected))
+
+        return list(messages)
+
+    async def get_summary(self, session_id: str) -> tuple[Optional[str], Optional[datetime]]:
+        """Get a session's running summary and the timestamp of the last message it covers."""
+        entry = self._cache_entry(session_id)
+        if entry is not None and "summary" in entry:
+            return entry["summary"]
+
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(
+                select(SessionModel.summary, SessionModel.summarized_until)
+                .where(SessionModel.session_id == session_id)
+            )).first()
+        summary = (row[0], row[1]) if row else (None, None)
+        if entry is not None:
+            entry["summary"] = summary
+        return summary
+
+    async def set_summary(self, session_id: str, summary: str, summarized_until: datetime):
+        """Store a session's running summary."""
+        async with AsyncSessionLocal() as db:
+            # Leave updated_at alone: summarising is not user activity
+            await db.execute(
+                update(SessionModel)
+                .where(SessionModel.session_id == session_id)
+                .values(summary=summary, summarized_until=summarized_until, updated_at=SessionModel.updated_at)
+            )
+            await db.commit()
+
+        entry = self._cache_entry(session_id)
+        if entry is not None:
+            entry["summary"] = (summary, summarized_until)
+
+    async def get_messages_between(
+        self,
+        session_id: str,
+        after: Optional[datetime],
+        before: datetime,
+        limit: int,
+        newest: bool = False
+    ) -> List[ChatMessage]:
+        """
+        Get up to `limit` of the oldest messages with after < timestamp < before, in order.
+
+        With newest=True the `limit` newest messages of that range are returned instead, still
+        in chronological order.
+        """
+        await self._sync(session_id)
+
+        query = select(MessageModel).where(
+            MessageModel.session_id == session_id,
+            MessageModel.timestamp < before
+        )
+        if after is not None:
+            query = query.where(MessageModel.timestamp > after)
+        order = MessageModel.timestamp.desc() if newest else MessageModel.timestamp.asc()
+        query = query.order_by(order).limit(limit)
 
-    def get_user_sessions(self, user_id: str) -> List[ChatHistory]:
+        async with AsyncSessionLocal() as db:
+            rows = (await db.scalars(query)).all()
+        # Only a short read can be missing archived messages
+        if len(rows) < limit and await self._rehydrate(session_id):
+            async with AsyncSessionLocal() as db:
+                rows = (await db.scalars(query)).all()
+        if newest:
+            rows = list(reversed(rows))
+        return [self._to_schema(msg) for msg in rows]
+
+    async def get_user_sessions(self, user_id: str) -> List[ChatHistory]:
         """Get all sessions for a user."""
-        db = SessionLocal()
-        try:
-            sessions = db.query(SessionModel).filter(SessionModel.user_id == user_id).all()
-
-            result = []
-            for session in sessions:
-                messages = [
-                    ChatMessage(
-                        message_id=msg.message_id,
-                        session_id=msg.session_id,
-                        user_id=msg.user_id,
-                        role=msg.role,
-                        content=msg.content,
-                        timestamp=msg.timestamp,
-                        tokens_used=msg.tokens_used
-                    )
-                    for msg in session.messages
-                ]
+        await self._sync()
+        async with AsyncSessionLocal() as db:
+            archived = (await db.scalars(
+                select(SessionArchive.session_id).where(SessionArchive.user_id == user_id)
+            )).all()
+        for session_id in archived:
+            await self._rehydrate(session_id)
+
+        async with AsyncSessionLocal() as db:
+            sessions = (await db.scalars(
+                select(SessionModel)
+                .where(SessionModel.user_id == user_id)
+                .options(selectinload(SessionModel.messages))
+            )).all()
 
-                result.append(ChatHistory(
+            return [
+                ChatHistory(
                     session_id=session.session_id,
                     user_id=session.user_id,
-                    messages=messages,
+                    messages=[self._to_schema(msg) for msg in session.messages],
                     created_at=session.created_at,
                     updated_at=session.updated_at
-                ))
-
-            return result
-        finally:
-            db.close()
+                )
+                for session in sessions
+            ]
 
-    def add_message(
+    async def _insert_message(
         self,
         session_id: str,
         user_id: str,
         role: str,
         content: str,
-        tokens_used: Optional[int] = None
+        tokens_used: Optional[int]
     ) -> ChatMessage:
-        """Add a message to a session."""
-        db = SessionLocal()
-        try:
-            session = db.query(SessionModel).filter(SessionModel.session_id == session_id).first()
-            if not session:
-                raise ValueError(f"Session {session_id} not found")
+        """Insert a message and touch its session in one transaction."""
+        if DIALECT == "postgresql":
+            return await self._insert_message_returning(session_id, user_id, role, content, tokens_used)
 
-            if session.user_id != user_id:
+        async with AsyncSessionLocal() as db:
+            # Touch the session and check ownership in one statement
+            result = await db.execute(
+                update(SessionModel)
+                .where(SessionModel.session_id == session_id, SessionModel.user_id == user_id)
+                .values(updated_at=datetime.utcnow())
+            )
+            if not result.rowcount:
+                await db.rollback()
+                if await self.get_session_owner(session_id) is None:
+                    raise ValueError(f"Session {session_id} not found")
                 raise ValueError("User does not own this session")
 
-            message_id = str(uuid.uuid4())
             message = MessageModel(
-                message_id=message_id,
+                message_id=str(uuid.uuid4()),
                 session_id=session_id,
                 user_id=user_id,
                 role=role,
@@ -123,82 +575,321 @@ class SessionService:
             )
 
             db.add(message)
-            session.updated_at = datetime.utcnow()
-            db.commit()
+            await db.commit()
+            return self._to_schema(message)
 
-            return ChatMessage(
-                message_id=message_id,
-                session_id=session_id,
-                user_id=user_id,
-                role=role,
-                content=content,
-                timestamp=message.timestamp,
-                tokens_used=tokens_used
+    async def _insert_message_returning(
+        self,
+        session_id: str,
+        user_id: str,
+        role: str,
+        content: str,
+        tokens_used: Optional[int]
+    ) -> ChatMessage:
+        """Touch the session and insert the message in a single statement (PostgreSQL)."""
+        message_id = str(uuid.uuid4())
+        now = datetime.utcnow()
+
+        # The insert selects from the UPDATE ... RETURNING, so it only happens for the owner
+        touched = (
+            update(SessionModel)
+            .where(SessionModel.session_id == session_id, SessionModel.user_id == user_id)
+            .values(updated_at=now)
+            .returning(SessionModel.session_id)
+            .cte("touched")
+        )
+        statement = (
+            insert(MessageModel)
+            .from_select(
+                ["message_id", "session_id", "user_id", "role", "content", "timestamp", "tokens_used"],
+                select(
+                    literal(message_id),
+                    touched.c.session_id,
+                    literal(user_id),
+                    literal(role),
+                    literal(content),
+                    literal(now),
+                    literal(tokens_used, Integer)
+                )
             )
-        finally:
-            db.close()
+            .returning(MessageModel.message_id)
+        )
 
-    def get_session_messages(self, session_id: str) -> List[ChatMessage]:
+        async with AsyncSessionLocal() as db:
+            inserted = (await db.execute(statement)).scalar()
+            if inserted is None:
+                await db.rollback()
+                if await self.get_session_owner(session_id) is None:
+                    raise ValueError(f"Session {session_id} not found")
+                raise ValueError("User does not own this session")
+            await db.commit()
+
+        return ChatMessage(
+            message_id=message_id,
+            session_id=session_id,
+            user_id=user_id,
+            role=role,
+            content=content,
+            timestamp=now,
+            tokens_used=tokens_used
+        )
+
+    async def _enqueue_message(
+        self,
+        session_id: str,
+        user_id: str,
+        role: str,
+        content: str,
+        tokens_used: Optional[int]
+    ) -> ChatMessage:
+        """Check ownership and queue a message for the next write-behind flush."""
+        owner_id = await self.get_session_owner(session_id)
+        if owner_id is None:
+            raise ValueError(f"Session {session_id} not found")
+        if owner_id != user_id:
+            raise ValueError("User does not own this session")
+
+        row = {
+            "message_id": str(uuid.uuid4()),
+            "session_id": session_id,
+            "user_id": user_id,
+            "role": role,
+            "content": content,
+            "timestamp": datetime.utcnow(),
+            "tokens_used": tokens_used
+        }
+        await self.writer.enqueue(row)
+        return ChatMessage(**row)
+
+    async def add_message(
+        self,
+        session_id: str,
+        user_id: str,
+        role: str,
+        content: str,
+        tokens_used: Optional[int] = None
+    ) -> ChatMessage:
+        """Add a message to a session."""
+        if self.writer is not None:
+            chat_message = await self._enqueue_message(session_id, user_id, role, content, tokens_used)
+        else:
+            chat_message = await self._insert_message(session_id, user_id, role, content, tokens_used)
+
+        self.total_messages += 1
+
+        # Keep the cached history window current
+        entry = self._cache_entry(session_id)
+        if entry is not None and entry["messages"] is not None:
+            entry["messages"].append(chat_message)
+            if len(entry["messages"]) > self.history_cache_messages:
+                del entry["messages"][0]
+                entry["complete"] = False
+
+        return chat_message
+
+    async def get_session_messages(self, session_id: str) -> List[ChatMessage]:
         """Get all messages in a session."""
-        db = SessionLocal()
-        try:
-            messages = db.query(MessageModel).filter(MessageModel.session_id == session_id).all()
-            return [
-                ChatMessage(
-                    message_id=msg.message_id,
-                    session_id=msg.session_id,
-                    user_id=msg.user_id,
-                    role=msg.role,
-                    content=msg.content,
-                    timestamp=msg.timestamp,
-                    tokens_used=msg.tokens_used
-                )
-                for msg in messages
-            ]
-        finally:
-            db.close()
+        await self._sync(session_id)
+        await self._rehydrate(session_id)
+        async with AsyncSessionLocal() as db:
+            messages = (await db.scalars(
+                select(MessageModel).where(MessageModel.session_id == session_id)
+            )).all()
+            return [self._to_schema(msg) for msg in messages]
 
-    def delete_session(self, session_id: str, user_id: str) -> bool:
+    async def delete_session(self, session_id: str, user_id: str) -> bool:
         """Delete a session."""
-        db = SessionLocal()
-        try:
-            session = db.query(SessionModel).filter(SessionModel.session_id == session_id).first()
-            if not session:
+        async with AsyncSessionLocal() as db:
+            owner_id = await db.scalar(
+                select(SessionModel.user_id).where(SessionModel.session_id == session_id)
+            )
+            if owner_id is None:
                 return False
 
-            if session.user_id != user_id:
+            if owner_id != user_id:
                 raise ValueError("User does not own this session")
 
-            db.delete(session)
-            db.commit()
+            # Queued rows must land before the delete, or they would outlive it
+            await self._sync(session_id)
+            archived_messages = await db.scalar(
+                select(SessionArchive.message_count).where(SessionArchive.session_id == session_id)
+            )
+            hot_messages = (await db.execute(
+                delete(MessageModel).where(MessageModel.session_id == session_id)
+            )).rowcount
+            await db.execute(delete(SessionArchive).where(SessionArchive.session_id == session_id))
+            await db.execute(delete(SessionModel).where(SessionModel.session_id == session_id))
+            await db.commit()
+            self.forget_session(session_id, user_id)
+            self.total_messages -= hot_messages + (archived_messages or 0)
             return True
-        finally:
-            db.close()
 
-    def clear_all_sessions(self) -> int:
+    async def clear_all_sessions(self) -> int:
         """Clear all sessions (admin operation)."""
-        db = SessionLocal()
-        try:
-            count = db.query(SessionModel).count()
-            db.query(SessionModel).delete()
-            db.commit()
+        async with AsyncSessionLocal() as db:
+            await self._sync()
+            await db.execute(delete(MessageModel))
+            await db.execute(delete(SessionArchive))
+            count = (await db.execute(delete(SessionModel))).rowcount
+            await db.commit()
+            self._history_cache.clear()
+            self.total_sessions = 0
+            self.total_messages = 0
+            self.sessions_per_user.clear()
             return count
-        finally:
-            db.close()
-
-    def get_total_sessions_count(self) -> int:
-        """Get total number of sessions in the database."""
-        db = SessionLocal()
-        try:
-            return db.query(SessionModel).count()
-        finally:
-            db.close()
-
-    def get_total_users_count(self) -> int:
+
+    def forget_session(self, session_id: str, user_id: str):
+        """Drop a deleted session from the history cache and the session totals."""
+        self._history_cache.pop(session_id, None)
+        self._count_session(user_id, -1)
+
+    def _count_session(self, user_id: str, delta: int):
+        """Apply a session created (+1) or deleted (-1) to the totals."""
+        self.total_sessions += delta
+        remaining = self.sessions_per_user.get(user_id, 0) + delta
+        if remaining > 0:
+            self.sessions_per_user[user_id] = remaining
+        else:
+            self.sessions_per_user.pop(user_id, None)
+
+    async def reconcile_counters(self):
+        """
+        Recompute the totals from the database.
+
+        Run at startup and periodically, to correct drift from writes made by other
+        replicas or outside this service.
+        """
+        await self._sync()
+        async with AsyncSessionLocal() as db:
+            per_user = (await db.execute(
+                select(SessionModel.user_id, func.count()).group_by(SessionModel.user_id)
+            )).all()
+            hot_messages = await db.scalar(select(func.count()).select_from(MessageModel))
+            archived_messages = await db.scalar(select(func.coalesce(func.sum(SessionArchive.message_count), 0)))
+
+        self.sessions_per_user = {user_id: count for user_id, count in per_user}
+        self.total_sessions = sum(self.sessions_per_user.values())
+        self.total_messages = hot_messages + archived_messages
+
+    async def run_reconcile_loop(self, interval: int):
+        """Reconcile the totals every interval seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reconcile_counters()
+            except Exception as e:
+                print(f"[SessionService] Counter reconcile error: {type(e).__name__}: {str(e)}")
+
+    async def get_total_sessions_count(self) -> int:
+        """Get total number of sessions."""
+        return self.total_sessions
+
+    async def get_total_users_count(self) -> int:
         """Get total number of unique users with sessions."""
-        db = SessionLocal()
-        try:
-            from sqlalchemy import func
-            return db.query(func.count(func.distinct(SessionModel.user_id))).scalar()
-        finally:
-            db.close()
+        return len(self.sessions_per_user)
+
+    async def get_total_messages_count(self) -> int:
+        """Get total number of messages, including archived ones."""
+        return self.total_messages
+
+    async def archive_idle_sessions(self) -> int:
+        """
+        Archive sessions idle for longer than ARCHIVE_IDLE_DAYS.
+
+        Each session's messages are compressed into one SessionArchive row and removed
+        from the messages table. Returns the number of sessions archived.
+        """
+        cutoff = datetime.utcnow() - timedelta(days=settings.ARCHIVE_IDLE_DAYS)
+        archived = 0
+
+        while True:
+            async with AsyncSessionLocal() as db:
+                session_rows = (await db.execute(
+                    select(SessionModel.session_id, SessionModel.user_id)
+                    .outerjoin(SessionArchive, SessionArchive.session_id == SessionModel.session_id)
+                    .where(
+                        SessionModel.updated_at < cutoff,
+                        or_(SessionModel.rehydrated_at.is_(None), SessionModel.rehydrated_at < cutoff),
+                        SessionArchive.session_id.is_(None),
+                        # Sessions without messages have nothing to archive
+                        exists().where(MessageModel.session_id == SessionModel.session_id)
+                    )
+                    .limit(settings.ARCHIVE_BATCH_SIZE)
+                )).all()
+                session_rows = [row for row in session_rows if not (self.writer and self.writer.has_pending(row[0]))]
+                if not session_rows:
+                    break
+
+                for session_id, user_id in session_rows:
+                    messages = (await db.scalars(
+                        select(MessageModel)
+                        .where(MessageModel.session_id == session_id)
+                        .order_by(MessageModel.timestamp.asc())
+                    )).all()
+                    rows = [
+                        {column: getattr(msg, column) for column in
+                         ("message_id", "user_id", "role", "content", "timestamp", "tokens_used")}
+                        for msg in messages
+                    ]
+                    first_user = next((msg.content for msg in messages if msg.role == "user"), None)
+                    payload = encode_messages(rows, settings.ARCHIVE_COMPRESS_LEVEL)
+
+                    db.add(SessionArchive(
+                        session_id=session_id,
+                        user_id=user_id,
+                        message_count=len(messages),
+                        title=first_user[:PREVIEW_CHARS] if first_user else None,
+                        last_message_preview=messages[-1].content[:PREVIEW_CHARS] if messages else None,
+                        payload=payload
+                    ))
+                    # Delete only the rows that went into the blob; newer ones stay hot
+                    await db.execute(
+                        delete(MessageModel).where(MessageModel.message_id.in_([row["message_id"] for row in rows]))
+                    )
+                    self.archived_messages += len(rows)
+                    self.archived_bytes += len(payload)
+                    self._history_cache.pop(session_id, None)
+
+                await db.commit()
+                archived += len(session_rows)
+                self.archived_sessions += len(session_rows)
+
+            if len(session_rows) < settings.ARCHIVE_BATCH_SIZE:
+                break
+
+        self.archive_runs += 1
+        return archived
+
+    async def run_archive_loop(self, interval: int):
+        """Archive idle sessions every interval seconds."""
+        while True:
+            try:
+                archived = await self.archive_idle_sessions()
+                if archived:
+                    print(f"[SessionService] Archived {archived} idle sessions")
+            except Exception as e:
+                print(f"[SessionService] Archive error: {type(e).__name__}: {str(e)}")
+            await asyncio.sleep(interval)
+
+    def get_archive_stats(self) -> dict:
+        """Get session archival statistics."""
+        return {
+            "idle_days": settings.ARCHIVE_IDLE_DAYS,
+            "runs": self.archive_runs,
+            "archived_sessions": self.archived_sessions,
+            "archived_messages": self.archived_messages,
+            "archived_bytes": self.archived_bytes,
+            "rehydrated_sessions": self.rehydrated_sessions
+        }
+
+    def get_write_stats(self) -> dict:
+        """Get write-behind statistics."""
+        if self.writer is None:
+            return {"enabled": False}
+        return self.writer.get_stats()
+
+    async def shutdown(self):
+        """Flush queued messages so nothing is lost on graceful shutdown."""
+        if self.writer is not None:
+            written = await self.writer.flush()
+            print(f"✓ Flushed {written} queued messages")
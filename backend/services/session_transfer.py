@@ -0,0 +1,223 @@
+"""Streaming NDJSON export and batched import of users, sessions and messages."""
+from datetime import datetime
+from typing import AsyncIterator, Dict, List
+import json
+import time
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from database import DIALECT, AsyncSessionLocal
+from database.models import User as UserModel, Session as SessionModel, Message as MessageModel, SessionArchive
+from services.session_archive import decode_messages
+
+# Columns written per record type, in table dependency order
+RECORD_COLUMNS = {
+    "user": ("user_id", "username", "password_hash", "is_admin", "created_at"),
+    "session": ("session_id", "user_id", "created_at", "updated_at"),
+    "message": ("message_id", "session_id", "user_id", "role", "content", "timestamp", "tokens_used"),
+}
+RECORD_MODELS = {"user": UserModel, "session": SessionModel, "message": MessageModel}
+RECORD_KEYS = {"user": UserModel.user_id, "session": SessionModel.session_id, "message": MessageModel.message_id}
+DATETIME_COLUMNS = {"created_at", "updated_at", "timestamp"}
+
+# Stored for users imported without a hash; matches no password, so they cannot log in
+DISABLED_PASSWORD_HASH = "!"
+
+
+def _line(record_type: str, values: dict) -> bytes:
+    record = {"type": record_type}
+    for column, value in values.items():
+        record[column] = value.isoformat() if isinstance(value, datetime) else value
+    return (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _insert_ignoring_existing(record_type: str):
+    """INSERT that skips rows whose primary key already exists, returning the keys inserted."""
+    model = RECORD_MODELS[record_type]
+    dialect_insert = postgresql.insert if DIALECT == "postgresql" else sqlite.insert
+    return dialect_insert(model).on_conflict_do_nothing().returning(RECORD_KEYS[record_type])
+
+
+class SessionTransfer:
+    """
+    Dumps and restores chat data as NDJSON, one record per line.
+
+    Export streams rows from server-side cursors, so memory use does not grow with the
+    number of messages. Import inserts rows in batched transactions and skips records
+    that already exist, so an interrupted import can be re-run.
+
+    Password hashes are only exported on request, and imported users are never admins
+    unless the import asks to keep the flag, so a dump cannot be edited to grant access.
+    An imported user whose username already exists is merged into the existing account:
+    their sessions and messages are imported under that account's user_id.
+    """
+
+    def __init__(self, session_service, yield_per: int, batch_size: int):
+        """Initialize transfer with the session service whose caches it must respect."""
+        self.session_service = session_service
+        self.yield_per = yield_per
+        self.batch_size = batch_size
+
+    async def export_ndjson(self, include_password_hashes: bool = False) -> AsyncIterator[bytes]:
+        """
+        Yield every user, then every session followed by its messages, as NDJSON lines.
+
+        Messages of archived sessions are expanded from their blobs. The last line is a
+        summary record with counts and throughput.
+        """
+        user_columns = [c for c in RECORD_COLUMNS["user"] if include_password_hashes or c != "password_hash"]
+        await self.session_service._sync()
+        start = time.perf_counter()
+        counts = {"user": 0, "session": 0, "message": 0}
+
+        async with AsyncSessionLocal() as db:
+            users = await db.stream(
+                select(*[getattr(UserModel, c) for c in user_columns])
+                .order_by(UserModel.user_id)
+                .execution_options(yield_per=self.yield_per)
+            )
+            async for row in users:
+                counts["user"] += 1
+                yield _line("user", row._asdict())
+
+        # One ordered pass over sessions joined to their messages and archives
+        session_columns = [getattr(SessionModel, c) for c in RECORD_COLUMNS["session"]]
+        message_columns = [getattr(MessageModel, c).label(f"m_{c}") for c in RECORD_COLUMNS["message"]]
+        query = (
+            select(*session_columns, SessionArchive.payload, *message_columns)
+            .outerjoin(MessageModel, MessageModel.session_id == SessionModel.session_id)
+            .outerjoin(SessionArchive, SessionArchive.session_id == SessionModel.session_id)
+            .order_by(SessionModel.session_id, MessageModel.timestamp)
+            .execution_options(yield_per=self.yield_per)
+        )
+
+        async with AsyncSessionLocal() as db:
+            rows = await db.stream(query)
+            current_session = None
+            async for row in rows:
+                values = row._asdict()
+                if values["session_id"] != current_session:
+                    current_session = values["session_id"]
+                    counts["session"] += 1
+                    yield _line("session", {c: values[c] for c in RECORD_COLUMNS["session"]})
+
+                    if values["payload"] is not None:
+                        for message in decode_messages(values["payload"], current_session):
+                            counts["message"] += 1
+                            yield _line("message", {c: message[c] for c in RECORD_COLUMNS["message"]})
+
+                if values["m_message_id"] is not None:
+                    counts["message"] += 1
+                    yield _line("message", {c: values[f"m_{c}"] for c in RECORD_COLUMNS["message"]})
+
+        elapsed = time.perf_counter() - start
+        yield _line("summary", self._summary(counts, elapsed))
+
+    async def import_ndjson(self, chunks: AsyncIterator[bytes], keep_admin: bool = False) -> dict:
+        """
+        Import NDJSON produced by export_ndjson from a stream of byte chunks.
+
+        Users without a password hash cannot log in; is_admin is cleared unless
+        keep_admin is set. Returns the number of records inserted and skipped (already
+        present) per type, how many users were merged into an existing account with the
+        same username, and the throughput. Raises ValueError for records of a user that
+        is neither in the import nor in the database.
+        """
+        start = time.perf_counter()
+        counts = {"user": 0, "session": 0, "message": 0}
+        skipped = {"user": 0, "session": 0, "message": 0}
+        batches: Dict[str, List[dict]] = {record_type: [] for record_type in RECORD_COLUMNS}
+        user_ids: Dict[str, str] = {}  # Exported user_id -> user_id in this database
+        pending = 0
+        buffer = b""
+        line_number = 0
+
+        async def map_users(db, rows: List[dict]):
+            """Rewrite user_id to the account each record belongs to in this database."""
+            unknown = {row["user_id"] for row in rows} - user_ids.keys()
+            if unknown:
+                existing = (await db.scalars(select(UserModel.user_id).where(UserModel.user_id.in_(unknown)))).all()
+                user_ids.update((user_id, user_id) for user_id in existing)
+                missing = unknown - set(existing)
+                if missing:
+                    raise ValueError(f"Records reference users that are not in the import or the database: {sorted(missing)[:5]}")
+            for row in rows:
+                row["user_id"] = user_ids[row["user_id"]]
+
+        async def flush():
+            nonlocal pending
+            async with AsyncSessionLocal() as db:
+                # Parents before children, so foreign keys hold within the transaction
+                for record_type, rows in batches.items():
+                    if not rows:
+                        continue
+                    if record_type != "user":
+                        await map_users(db, rows)
+                    inserted = len((await db.execute(_insert_ignoring_existing(record_type), rows)).all())
+                    counts[record_type] += inserted
+                    skipped[record_type] += len(rows) - inserted
+
+                    if record_type == "user":
+                        # A skipped user may exist under another user_id with the same username;
+                        # otherwise it was skipped because its user_id exists
+                        accounts = dict((await db.execute(
+                            select(UserModel.username, UserModel.user_id)
+                            .where(UserModel.username.in_([row["username"] for row in rows]))
+                        )).all())
+                        user_ids.update((row["user_id"], accounts.get(row["username"], row["user_id"])) for row in rows)
+                    rows.clear()
+                await db.commit()
+            pending = 0
+
+        async def add(line: bytes):
+            nonlocal pending, line_number
+            line_number += 1
+            if not line.strip():
+                return
+            try:
+                record = json.loads(line)
+                record_type = record.get("type")
+                if record_type == "summary":
+                    return
+                row = {c: record.get(c) for c in RECORD_COLUMNS[record_type]}
+                if row["user_id"] is None or (record_type == "user" and row["username"] is None):
+                    raise ValueError("missing user_id or username")
+                for column in DATETIME_COLUMNS.intersection(row):
+                    if row[column] is not None:
+                        row[column] = datetime.fromisoformat(row[column])
+                if record_type == "user":
+                    row["password_hash"] = row["password_hash"] or DISABLED_PASSWORD_HASH
+                    row["is_admin"] = bool(row["is_admin"]) and keep_admin
+            except (ValueError, KeyError, TypeError):
+                raise ValueError(f"Invalid record on line {line_number}")
+
+            batches[record_type].append(row)
+            pending += 1
+            if pending >= self.batch_size:
+                await flush()
+
+        async for chunk in chunks:
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                await add(line)
+        await add(buffer)
+        await flush()
+
+        # Imported messages may belong to sessions whose history is cached
+        self.session_service.invalidate_history_cache()
+        await self.session_service.reconcile_counters()
+
+        summary = self._summary(counts, time.perf_counter() - start)
+        summary["skipped"] = {f"{record_type}s": count for record_type, count in skipped.items()}
+        summary["merged_users"] = sum(1 for exported, local in user_ids.items() if exported != local)
+        return summary
+
+    @staticmethod
+    def _summary(counts: dict, elapsed: float) -> dict:
+        return {
+            "users": counts["user"],
+            "sessions": counts["session"],
+            "messages": counts["message"],
+            "seconds": round(elapsed, 3),
+            "messages_per_second": round(counts["message"] / elapsed) if elapsed > 0 else 0
+        }
@@ -0,0 +1,47 @@
+"""Cache admission: the frequency sketch and the TinyLFU admit decision."""
+from services.admission_policy import AdmissionPolicy, FrequencySketch
+
+
+def test_sketch_counts_saturate():
+    sketch = FrequencySketch(width=1024)
+    for _ in range(20):
+        sketch.increment("popular")
+    sketch.increment("rare")
+    assert sketch.estimate("popular") == FrequencySketch.MAX_COUNT
+    assert sketch.estimate("rare") == 1
+    assert sketch.estimate("unseen") == 0
+
+
+def test_sketch_halves_counters_after_sample_size():
+    sketch = FrequencySketch(width=1024, sample_size=10)
+    for _ in range(8):
+        sketch.increment("a")
+    sketch.increment("b")
+    sketch.increment("b")
+    assert sketch.resets == 1
+    assert sketch.estimate("a") == 4
+    assert sketch.estimate("b") == 1
+
+
+def test_keys_below_min_frequency_are_rejected():
+    policy = AdmissionPolicy(min_frequency=2, sketch_width=1024, sample_size=1000)
+    policy.record_access("once")
+    assert not policy.admit("once")
+
+    policy.record_access("twice")
+    policy.record_access("twice")
+    assert policy.admit("twice")
+    assert (policy.admitted, policy.rejected) == (1, 1)
+
+
+def test_a_key_must_be_more_popular_than_its_victim():
+    policy = AdmissionPolicy(min_frequency=1, sketch_width=1024, sample_size=1000)
+    for _ in range(3):
+        policy.record_access("resident")
+    for _ in range(3):
+        policy.record_access("newcomer")
+    assert not policy.admit("newcomer", victim="resident")
+
+    policy.record_access("newcomer")
+    assert policy.admit("newcomer", victim="resident")
+    assert policy.get_stats()["admission_rate"] == 50.0
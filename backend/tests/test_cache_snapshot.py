@@ -0,0 +1,48 @@
+"""On-disk cache snapshots: round trip, expiry and format checks."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.cache_codec import CacheCodec
+from services.cache_snapshot import read_snapshot, write_snapshot
+
+
+def test_round_trip_keeps_order_values_and_expiry(tmp_path):
+    path = str(tmp_path / "nested" / "snapshot.bin")
+    codec = CacheCodec(min_compress_bytes=64, level=1)
+    expiry = (datetime.utcnow() + timedelta(hours=1)).replace(microsecond=0)
+    long_response = "word " * 100
+    entries = [
+        ("key-short", codec.encode("short answer"), expiry),
+        ("key-long", codec.encode(long_response, chunks=["word "] * 100), expiry),
+        ("ключ", b"\x00\xffraw bytes", expiry),
+    ]
+
+    size = write_snapshot(path, entries)
+    restored = read_snapshot(path)
+
+    assert size == (tmp_path / "nested" / "snapshot.bin").stat().st_size
+    assert restored == entries
+    assert codec.compressed == 1
+    text, chunks, _ = codec.decode(restored[1][1])
+    assert text == long_response
+    assert chunks == ["word "] * 100
+
+
+def test_expired_entries_are_skipped(tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+    now = datetime.utcnow()
+    write_snapshot(path, [
+        ("expired", b"old", now - timedelta(seconds=1)),
+        ("fresh", b"new", now + timedelta(minutes=5)),
+    ])
+    assert [key for key, _, _ in read_snapshot(path)] == ["fresh"]
+
+
+def test_missing_and_foreign_files(tmp_path):
+    assert read_snapshot(str(tmp_path / "absent.bin")) == []
+
+    foreign = tmp_path / "foreign.bin"
+    foreign.write_bytes(b"not a snapshot")
+    with pytest.raises(ValueError):
+        read_snapshot(str(foreign))
@@ -0,0 +1,62 @@
+"""/chat/ws connection handling: cancelled generations and frames that are not JSON objects."""
+import asyncio
+import json
+
+from routers.chat_router import _ChatConnection, _client_message
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+
+def test_cancel_drops_queued_frames_and_forgets_the_generation():
+    async def scenario():
+        connection = _ChatConnection(FakeWebSocket(), "token", current_user=None)
+
+        async def generation():
+            for i in range(3):
+                await connection.put_frame("m1", json.dumps({"type": "token", "i": i}).encode())
+            await asyncio.Event().wait()
+
+        connection.generations["m1"] = asyncio.create_task(generation())
+        await asyncio.sleep(0)
+        assert connection.handle({"type": "cancel", "message_id": "m1"})
+
+        sender = asyncio.create_task(connection.run_sender())
+        await connection.outbox.join()
+        await asyncio.sleep(0)
+        sender.cancel()
+
+        assert connection.websocket.sent == [{"type": "cancelled", "message_id": "m1"}]
+        assert connection.generations == {}
+        assert connection._cancelled_at == {}
+
+    asyncio.run(scenario())
+
+
+def test_cancel_of_an_unknown_generation_is_an_error():
+    async def scenario():
+        connection = _ChatConnection(FakeWebSocket(), "token", current_user=None)
+        assert connection.handle({"type": "cancel", "message_id": "nope"})
+        assert connection.handle({"type": "ping"})
+
+        sender = asyncio.create_task(connection.run_sender())
+        await connection.outbox.join()
+        sender.cancel()
+        assert connection.websocket.sent == [
+            {"type": "error", "message_id": "nope", "message": "No such generation"},
+            {"type": "pong"},
+        ]
+
+    asyncio.run(scenario())
+
+
+def test_binary_and_malformed_frames_are_rejected():
+    assert _client_message({"type": "websocket.receive", "bytes": b"{}"}) == (None, "Binary frames are not supported")
+    assert _client_message({"type": "websocket.receive", "text": "{"}) == (None, "Invalid JSON")
+    assert _client_message({"type": "websocket.receive", "text": "[]"}) == (None, "Expected a JSON object")
+    assert _client_message({"type": "websocket.receive", "text": '{"type": "ping"}'}) == ({"type": "ping"}, None)
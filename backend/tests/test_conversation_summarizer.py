@@ -0,0 +1,69 @@
+"""Prompt context while the running summary lags behind the conversation."""
+import uuid
+
+import pytest
+
+from database import AsyncSessionLocal
+from database.models import User as UserModel
+from services.conversation_summarizer import ConversationSummarizer
+from services.session_service import SessionService
+
+FOLD_LIMIT = 5
+TURNS = 4 * FOLD_LIMIT + 3
+
+
+@pytest.fixture
+def service(db):
+    return SessionService()
+
+
+async def _session_with_turns(service: SessionService) -> tuple[str, list[str]]:
+    user_id = str(uuid.uuid4())
+    async with AsyncSessionLocal() as db:
+        db.add(UserModel(user_id=user_id, username=f"summary-{user_id[:8]}", password_hash="x", is_admin=False))
+        await db.commit()
+    session_id = await service.create_session(user_id)
+    contents = []
+    for i in range(TURNS):
+        # 30 characters, an estimated 10 tokens
+        contents.append(f"turn {i:02d} ".ljust(30, "."))
+        await service.add_message(session_id, user_id, "user" if i % 2 == 0 else "assistant", contents[-1])
+    return session_id, contents
+
+
+def _summarizer(service: SessionService, max_context_tokens: int) -> ConversationSummarizer:
+    return ConversationSummarizer(
+        service,
+        inference_service=None,
+        recent_messages=2,
+        trigger_messages=3,
+        max_tokens=64,
+        idle_seconds=0,
+        fold_limit=FOLD_LIMIT,
+        max_context_tokens=max_context_tokens
+    )
+
+
+def test_backfill_keeps_the_newest_turns_that_fit(service, run):
+    async def scenario():
+        session_id, contents = await _session_with_turns(service)
+        summarizer = _summarizer(service, max_context_tokens=125)
+
+        summary, messages = await summarizer.build_context(session_id)
+        assert summary is None
+        # Twelve turns of ten tokens fit in 125; the oldest are left to the summary
+        assert [msg.content for msg in messages] == contents[-12:]
+        assert summarizer.scheduled == {session_id}
+
+    run(scenario())
+
+
+def test_backfill_pages_through_a_budget_large_enough_for_everything(service, run):
+    async def scenario():
+        session_id, contents = await _session_with_turns(service)
+        summarizer = _summarizer(service, max_context_tokens=10_000)
+
+        _, messages = await summarizer.build_context(session_id)
+        assert [msg.content for msg in messages] == contents
+
+    run(scenario())
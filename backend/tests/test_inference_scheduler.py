@@ -0,0 +1,73 @@
+"""Fair scheduling of generation steps across users."""
+import asyncio
+from collections import Counter
+
+from services.inference_scheduler import FairScheduler
+
+
+def _scheduler() -> FairScheduler:
+    return FairScheduler({"interactive": 1.0, "batch": 0.25}, admin_multiplier=2.0)
+
+
+async def _contend(scheduler: FairScheduler, streams: list, steps: int) -> list:
+    """Run token-by-token streams of (user, priority, is_admin) until `steps` grants; return who got each."""
+    granted = []
+    done = asyncio.Event()
+
+    async def stream(user_id, priority, is_admin):
+        while not done.is_set():
+            key = await scheduler.acquire(user_id, priority, is_admin)
+            granted.append(user_id)
+            if len(granted) >= steps:
+                done.set()
+            await asyncio.sleep(0)  # The token is sent while others queue
+            scheduler.release(key, 1)
+
+    tasks = [asyncio.create_task(stream(*s)) for s in streams]
+    await done.wait()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return granted
+
+
+def test_users_share_equally_regardless_of_stream_count():
+    streams = [("heavy", "interactive", False)] * 4 + [("light", "interactive", False)]
+    granted = asyncio.run(_contend(_scheduler(), streams, steps=100))
+    counts = Counter(granted)
+    assert abs(counts["heavy"] - counts["light"]) <= 2
+    # Light never waits more than one heavy step in a row once both queue
+    assert "heavy, heavy, heavy" not in ", ".join(granted[5:])
+
+
+def test_weights_scale_the_share():
+    # Two streams per flow, so every flow always has a step waiting
+    streams = [
+        ("admin", "interactive", True),
+        ("user", "interactive", False),
+        ("batch", "batch", False),
+    ] * 2
+    counts = Counter(asyncio.run(_contend(_scheduler(), streams, steps=130)))
+    # Weights 2 : 1 : 0.25
+    assert 75 <= counts["admin"] <= 85
+    assert 37 <= counts["user"] <= 43
+    assert 8 <= counts["batch"] <= 12
+
+
+def test_cancelled_waiters_do_not_stall_the_engine():
+    scheduler = _scheduler()
+
+    async def scenario():
+        key = await scheduler.acquire("a")
+        abandoned = asyncio.create_task(scheduler.acquire("b"))
+        waiting = asyncio.create_task(scheduler.acquire("c"))
+        await asyncio.sleep(0)
+        abandoned.cancel()
+        await asyncio.sleep(0)
+        scheduler.release(key, 1)
+        assert await asyncio.wait_for(waiting, 1) == ("c", "interactive")
+        scheduler.release(("c", "interactive"), 1)
+
+    asyncio.run(scenario())
+    assert scheduler.waiting == 0
+    assert not scheduler.busy
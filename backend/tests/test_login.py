@@ -0,0 +1,80 @@
+"""Login throttling per username and client, and the 503 when the hasher is saturated."""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import utils.dependencies as deps
+from auth.login_throttle import LoginThrottle
+from auth.password_hasher import HasherBusyError, PasswordHasher
+from routers import auth_router
+from schemas.auth import LoginRequest
+
+
+def test_failures_are_throttled_per_username_and_client():
+    throttle = LoginThrottle(max_attempts=3, window_seconds=60)
+    for _ in range(3):
+        assert throttle.hit("alice", "10.0.0.1") == 0
+    assert 0 < throttle.hit("alice", "10.0.0.1") <= 60
+
+    # The account owner on another address and other accounts are unaffected
+    assert throttle.hit("alice", "10.0.0.2") == 0
+    assert throttle.hit("bob", "10.0.0.1") == 0
+
+
+def test_success_resets_and_unevaluated_attempts_are_refunded():
+    throttle = LoginThrottle(max_attempts=2, window_seconds=60)
+    throttle.hit("alice", "10.0.0.1")
+    throttle.reset("alice", "10.0.0.1")
+    throttle.hit("alice", "10.0.0.1")
+    throttle.refund("alice", "10.0.0.1")
+    assert throttle.hit("alice", "10.0.0.1") == 0
+    assert throttle.hit("alice", "10.0.0.1") == 0
+    assert throttle.hit("alice", "10.0.0.1") > 0
+    assert throttle.get_stats()["resets"] == 1
+
+
+def test_hasher_rejects_work_beyond_its_queue():
+    class SlowContext:
+        def verify(self, plain, hashed):
+            time.sleep(0.2)
+            return True
+
+    hasher = PasswordHasher(SlowContext(), workers=1, max_queue=1)
+
+    async def scenario():
+        running = asyncio.ensure_future(hasher.verify("a", "h"))
+        queued = asyncio.ensure_future(hasher.verify("b", "h"))
+        await asyncio.sleep(0)
+        with pytest.raises(HasherBusyError):
+            await hasher.verify("c", "h")
+        assert await running and await queued
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        hasher.shutdown()
+    assert hasher.get_stats()["rejected"] == 1
+
+
+def test_login_answers_503_when_the_hasher_is_busy(monkeypatch):
+    class BusyAuth:
+        login_throttle = LoginThrottle(max_attempts=1, window_seconds=60)
+
+        async def login(self, username, password):
+            raise HasherBusyError("Password hashing queue is full")
+
+    auth = BusyAuth()
+    monkeypatch.setattr(deps, "auth_service", auth)
+    monkeypatch.setattr(deps, "monitoring_service", SimpleNamespace(increment_request_count=lambda: None))
+    http_request = SimpleNamespace(client=SimpleNamespace(host="10.0.0.1"))
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as raised:
+            asyncio.run(auth_router.login(LoginRequest(username="alice", password="secret"), http_request))
+        assert raised.value.status_code == 503
+        assert raised.value.headers["Retry-After"] == "1"
+    # Busy answers are not failures, so the single allowed attempt is still there
+    assert auth.login_throttle.throttled == 0
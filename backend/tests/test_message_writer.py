@@ -0,0 +1,102 @@
+"""Write-behind batching: retries, dead letters and dropping rows of deleted sessions."""
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from database import AsyncSessionLocal
+from database.models import Message as MessageModel, User as UserModel
+from services.message_writer import MessageWriter
+from services.session_service import SessionService
+
+
+async def _create_session() -> tuple[str, str]:
+    user_id = str(uuid.uuid4())
+    async with AsyncSessionLocal() as db:
+        db.add(UserModel(user_id=user_id, username=f"writer-{user_id[:8]}", password_hash="x", is_admin=False))
+        await db.commit()
+    return await SessionService().create_session(user_id), user_id
+
+
+@pytest.fixture
+def session(db, run):
+    """A session to write into, owned by a fresh user."""
+    return run(_create_session())
+
+
+def _row(session_id: str, user_id: str, content: str, message_id: str = None) -> dict:
+    return {
+        "message_id": message_id or str(uuid.uuid4()),
+        "session_id": session_id,
+        "user_id": user_id,
+        "role": "user",
+        "content": content,
+        "timestamp": datetime.utcnow(),
+        "tokens_used": None
+    }
+
+
+async def _stored(session_id: str) -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(func.count()).where(MessageModel.session_id == session_id))
+
+
+def test_transient_errors_are_retried(session, run):
+    session_id, user_id = session
+    writer = MessageWriter(flush_interval_ms=1000, batch_size=10, max_retries=3)
+    write = writer._write
+    failures = [OperationalError("INSERT", {}, Exception("database is locked"))] * 2
+
+    async def flaky(batch):
+        if failures:
+            raise failures.pop()
+        await write(batch)
+
+    writer._write = flaky
+
+    async def scenario():
+        for i in range(3):
+            await writer.enqueue(_row(session_id, user_id, f"message {i}"))
+        assert await writer.flush() == 3
+        assert await _stored(session_id) == 3
+
+    run(scenario())
+    assert writer.batch_retries == 2
+    assert not writer.has_pending()
+
+
+def test_rejected_rows_go_to_dead_letters_without_blocking_the_batch(session, run):
+    session_id, user_id = session
+    writer = MessageWriter(flush_interval_ms=1000, batch_size=10, max_retries=1)
+    duplicate_id = str(uuid.uuid4())
+
+    async def scenario():
+        await writer.enqueue(_row(session_id, user_id, "first", message_id=duplicate_id))
+        await writer.flush()
+        await writer.enqueue(_row(session_id, user_id, "before"))
+        await writer.enqueue(_row(session_id, user_id, "duplicate", message_id=duplicate_id))
+        await writer.enqueue(_row(session_id, user_id, "after"))
+        assert await writer.flush() == 2
+        assert await _stored(session_id) == 3
+
+    run(scenario())
+    assert [row["content"] for row in writer.dead_letters] == ["duplicate"]
+    assert "IntegrityError" in writer.dead_letters[0]["error"]
+    assert writer.rows_dropped == 1
+    assert not writer.has_pending()
+
+
+def test_discard_drops_only_the_given_sessions(run):
+    writer = MessageWriter(flush_interval_ms=1000, batch_size=10)
+
+    async def scenario():
+        for session_id in ("kept", "purged", "kept"):
+            await writer.enqueue(_row(session_id, "user", "text"))
+        async with writer.exclusive():
+            assert writer.discard(["purged", "unknown"]) == 1
+
+    run(scenario())
+    assert [row["session_id"] for row in writer.pending] == ["kept", "kept"]
+    assert not writer.has_pending("purged")
@@ -0,0 +1,174 @@
+"""PostgreSQL code paths: migrations under concurrent startup, CTE inserts, GIN search, replica consistency."""
+import asyncio
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not os.environ.get("POSTGRES_URL"), reason="POSTGRES_URL not set")
+
+if os.environ.get("POSTGRES_URL"):
+    from sqlalchemy import create_engine, func, select, text
+
+    import database
+    from database import AsyncSessionLocal, Base
+    from database.migrations import MIGRATIONS, migration_lock, run_migrations
+    from database.models import Message as MessageModel, User as UserModel
+    from services.session_service import SessionService
+    from services.session_transfer import SessionTransfer, DISABLED_PASSWORD_HASH
+
+# asyncpg connections are bound to the loop that opened them, so every test shares one
+_loop = asyncio.new_event_loop()
+
+
+def run(coro):
+    return _loop.run_until_complete(coro)
+
+
+def _start_replica() -> list:
+    """What init_db does on startup, with the engine of a separate process."""
+    engine = create_engine(database.engine.url)
+    try:
+        with migration_lock(engine):
+            Base.metadata.create_all(bind=engine)
+            return run_migrations(engine)
+    finally:
+        engine.dispose()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def schema():
+    # Forget connections earlier modules opened on the shared conftest loop
+    run(database.async_engine.dispose(close=False))
+    with database.engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: _start_replica(), range(4)))
+
+    # Every migration applied exactly once across the replicas
+    applied = sorted(v for result in results for v in result)
+    assert applied == [version for version, _, _ in MIGRATIONS]
+    yield
+    run(database.async_engine.dispose())
+
+
+async def _create_user(username: str) -> str:
+    user_id = str(uuid.uuid4())
+    async with AsyncSessionLocal() as db:
+        db.add(UserModel(user_id=user_id, username=username, password_hash="x", is_admin=False))
+        await db.commit()
+    return user_id
+
+
+def test_add_message_checks_owner_in_one_statement():
+    service = SessionService()
+
+    async def scenario():
+        owner = await _create_user(f"owner-{uuid.uuid4().hex[:8]}")
+        other = await _create_user(f"other-{uuid.uuid4().hex[:8]}")
+        session_id = await service.create_session(owner)
+
+        message = await service.add_message(session_id, owner, "user", "hello postgres")
+        assert message.session_id == session_id
+
+        with pytest.raises(ValueError, match="does not own"):
+            await service.add_message(session_id, other, "user", "not mine")
+        with pytest.raises(ValueError, match="not found"):
+            await service.add_message(str(uuid.uuid4()), owner, "user", "no session")
+
+        messages = await service.get_session_messages(session_id)
+        assert [m.content for m in messages] == ["hello postgres"]
+
+    run(scenario())
+
+
+def test_search_uses_tsvector_and_scopes_to_user():
+    service = SessionService()
+
+    async def scenario():
+        alice = await _create_user(f"alice-{uuid.uuid4().hex[:8]}")
+        bob = await _create_user(f"bob-{uuid.uuid4().hex[:8]}")
+        alice_session = await service.create_session(alice)
+        bob_session = await service.create_session(bob)
+        await service.add_message(alice_session, alice, "user", "How do pelicans migrate in winter?")
+        await service.add_message(alice_session, alice, "user", "Unrelated question about taxes")
+        await service.add_message(bob_session, bob, "user", "Pelicans are large water birds")
+
+        results, _ = await service.search_messages(alice, "pelican")
+        assert [r.session_id for r in results] == [alice_session]
+
+    # The GIN index exists
+    with database.engine.connect() as conn:
+        assert conn.execute(text(
+            "SELECT 1 FROM pg_indexes WHERE indexname = 'ix_messages_content_fts'"
+        )).scalar() == 1
+    run(scenario())
+
+
+def test_replicas_see_each_others_messages():
+    replica_a, replica_b = SessionService(), SessionService()
+
+    async def scenario():
+        user_id = await _create_user(f"user-{uuid.uuid4().hex[:8]}")
+        session_id = await replica_a.create_session(user_id)
+        await replica_a.add_message(session_id, user_id, "user", "first turn")
+        assert [m.content for m in await replica_a.get_recent_messages(session_id)] == ["first turn"]
+
+        # The next turn is served by another replica
+        await replica_b.add_message(session_id, user_id, "user", "second turn")
+        assert [m.content for m in await replica_a.get_recent_messages(session_id)] == ["first turn", "second turn"]
+
+    run(scenario())
+
+
+def test_import_skips_existing_rows():
+    service = SessionService()
+    transfer = SessionTransfer(service, yield_per=100, batch_size=2)
+
+    async def scenario():
+        user_id = await _create_user(f"export-{uuid.uuid4().hex[:8]}")
+        session_id = await service.create_session(user_id)
+        for i in range(3):
+            await service.add_message(session_id, user_id, "user", f"message {i}")
+        dump = [chunk async for chunk in transfer.export_ndjson()]
+
+        async def chunks():
+            for chunk in dump:
+                yield chunk
+
+        async with AsyncSessionLocal() as db:
+            before = await db.scalar(select(func.count()).select_from(MessageModel))
+        summary = await transfer.import_ndjson(chunks())
+        async with AsyncSessionLocal() as db:
+            after = await db.scalar(select(func.count()).select_from(MessageModel))
+        assert after == before
+        assert summary["messages"] == 0
+        assert summary["skipped"]["messages"] == before
+
+    run(scenario())
+
+
+def test_import_drops_admin_flag_and_missing_hash():
+    service = SessionService()
+    transfer = SessionTransfer(service, yield_per=100, batch_size=10)
+    user_id = str(uuid.uuid4())
+    line = (
+        f'{{"type":"user","user_id":"{user_id}","username":"imported-{user_id[:8]}",'
+        f'"is_admin":true,"created_at":"2024-01-01T00:00:00"}}\n'
+    ).encode()
+
+    async def chunks():
+        yield line
+
+    async def scenario():
+        summary = await transfer.import_ndjson(chunks())
+        assert summary["users"] == 1
+        async with AsyncSessionLocal() as db:
+            user = await db.get(UserModel, user_id)
+        assert user.is_admin is False
+        assert user.password_hash == DISABLED_PASSWORD_HASH
+
+    run(scenario())
@@ -0,0 +1,54 @@
+"""Token bucket rate limiting and the in-process fallback when Redis fails."""
+import time
+
+import pytest
+
+redis = pytest.importorskip("redis")
+
+from services.rate_limiter import RateLimiter
+
+
+def _dead_redis():
+    """A client for a port nothing listens on; every call fails to connect."""
+    return redis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.2)
+
+
+def test_local_buckets_allow_a_burst_then_limit():
+    limiter = RateLimiter({"chat": 3}, period=60)
+    decisions = [limiter.check("chat", "alice") for _ in range(4)]
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert decisions[2].remaining == 0
+    assert decisions[3].retry_after == 20
+    assert decisions[3].headers()["Retry-After"] == "20"
+    # Buckets are per user
+    assert limiter.check("chat", "bob").allowed
+
+
+def test_redis_errors_fall_back_to_local_buckets_for_the_retry_window():
+    limiter = RateLimiter({"chat": 3}, period=60, redis_client=_dead_redis(), redis_retry_seconds=0.2)
+    decisions = [limiter.check("chat", "alice") for _ in range(4)]
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    # One failed round trip for the whole window
+    assert limiter.redis_errors == 1
+    assert limiter.get_stats()["redis_fallback_active"]
+
+    time.sleep(0.25)
+    assert not limiter.check("chat", "alice").allowed
+    assert limiter.redis_errors == 2
+
+
+def test_redis_buckets_are_used_while_redis_answers():
+    calls = []
+
+    class FakeRedis:
+        def register_script(self, script):
+            def run(keys, args):
+                calls.append(keys[0])
+                return [1, "2.0"]
+            return run
+
+    limiter = RateLimiter({"chat": 3}, period=60, redis_client=FakeRedis())
+    decision = limiter.check("chat", "alice")
+    assert decision.allowed and decision.remaining == 2
+    assert calls == ["ratelimit:chat:alice"]
+    assert limiter.get_stats()["local_buckets"] == 0
@@ -0,0 +1,66 @@
+"""Message search: owner scoping and archived sessions."""
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from database import AsyncSessionLocal
+from database.models import Session as SessionModel, User as UserModel
+from services.session_service import SessionService
+
+
+async def _create_user() -> str:
+    user_id = str(uuid.uuid4())
+    async with AsyncSessionLocal() as db:
+        db.add(UserModel(user_id=user_id, username=f"search-{user_id[:8]}", password_hash="x", is_admin=False))
+        await db.commit()
+    return user_id
+
+
+@pytest.fixture
+def service(db):
+    return SessionService()
+
+
+def test_search_is_scoped_to_the_user(service, run):
+    async def scenario():
+        alice, bob = await _create_user(), await _create_user()
+        session_id = await service.create_session(alice)
+        await service.add_message(session_id, alice, "user", "kettle descaling with vinegar")
+
+        results, _ = await service.search_messages(alice, "vinegar")
+        assert [r.session_id for r in results] == [session_id]
+        assert "<mark>vinegar</mark>" in results[0].snippet
+        assert (await service.search_messages(bob, "vinegar"))[0] == []
+
+    run(scenario())
+
+
+def test_archived_sessions_are_not_searched_until_rehydrated(service, run):
+    async def scenario():
+        user_id = await _create_user()
+        session_id = await service.create_session(user_id)
+        await service.add_message(session_id, user_id, "user", "sourdough starter hydration")
+
+        # Make only this session idle past the archive threshold
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(SessionModel)
+                .where(SessionModel.session_id == session_id)
+                .values(updated_at=datetime.utcnow() - timedelta(days=365))
+            )
+            await db.commit()
+        assert await service.archive_idle_sessions() >= 1
+
+        results, _ = await service.search_messages(user_id, "sourdough")
+        assert results == []
+        assert await service.count_archived_sessions(user_id) == 1
+
+        # Opening the session moves its messages back into the index
+        await service.get_session_messages(session_id)
+        results, _ = await service.search_messages(user_id, "sourdough")
+        assert [r.session_id for r in results] == [session_id]
+        assert await service.count_archived_sessions(user_id) == 0
+
+    run(scenario())
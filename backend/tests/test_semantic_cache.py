@@ -0,0 +1,84 @@
+"""Semantic cache tier: rephrasings hit, prompts asking something different do not."""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from services.semantic_cache import SemanticCache, content_signature
+
+SAMPLING = {"temperature": 0.7, "max_tokens": 256}
+
+NEAR_MISSES = [
+    ("convert celsius to fahrenheit", "convert fahrenheit to celsius"),
+    ("is it safe to eat raw eggs", "is it not safe to eat raw eggs"),
+    ("what is 12×13", "what is 12×14"),
+    ("tell me about cats", "tell me about bats"),
+    ("write a function that sorts a list in ascending order", "write a function that sorts a list in descending order"),
+    ("how long do i boil an egg", "how long don't i boil an egg"),
+]
+
+REPHRASINGS = [
+    ("What's the capital of France?", "what is the capital of france"),
+    ("How do I reverse a list in Python?", "How can I reverse a list in python"),
+    ("Can you explain recursion?", "Please explain recursion"),
+]
+
+
+def _cache(threshold: float = 0.97) -> SemanticCache:
+    return SemanticCache(capacity=16, dim=512, threshold=threshold)
+
+
+@pytest.mark.parametrize("stored, asked", NEAR_MISSES)
+def test_near_miss_prompts_do_not_hit(stored, asked):
+    cache = _cache()
+    cache.add(stored, "key-stored", **SAMPLING)
+    assert cache.lookup(asked, **SAMPLING) is None
+    assert cache.misses == 1
+
+
+@pytest.mark.parametrize("stored, asked", NEAR_MISSES)
+def test_near_miss_prompts_do_not_hit_at_any_threshold(stored, asked):
+    cache = _cache(threshold=0.0)
+    cache.add(stored, "key-stored", **SAMPLING)
+    assert cache.lookup(asked, **SAMPLING) is None
+
+
+@pytest.mark.parametrize("stored, asked", REPHRASINGS)
+def test_rephrased_prompts_hit(stored, asked):
+    cache = _cache()
+    cache.add(stored, "key-stored", **SAMPLING)
+    assert cache.lookup(asked, **SAMPLING) == "key-stored"
+
+
+def test_sampling_parameters_must_match():
+    cache = _cache()
+    cache.add("explain recursion", "key-stored", **SAMPLING)
+    assert cache.lookup("explain recursion", temperature=0.0, max_tokens=256) is None
+
+
+def test_signature_keeps_numbers_negations_and_order():
+    assert content_signature("Is it NOT safe?") == "it not safe"
+    assert content_signature("isn't it safe") == "not it safe"
+    assert content_signature("3.5 to 4") == "3 5 to 4"
+
+
+def test_index_from_older_format_is_dropped(tmp_path):
+    path = str(tmp_path / "index.npz")
+    np.savez_compressed(
+        path,
+        vectors=np.zeros((1, 512), dtype=np.float32),
+        param_tags=np.zeros(1, dtype=np.int64),
+        keys=np.array(["old"], dtype=str),
+        dim=np.array(512)
+    )
+    cache = SemanticCache(capacity=16, dim=512, threshold=0.97, index_path=path)
+    assert cache.size == 0
+
+
+def test_index_round_trip(tmp_path):
+    path = str(tmp_path / "index.npz")
+    cache = SemanticCache(capacity=16, dim=512, threshold=0.97, index_path=path)
+    cache.add("What's the capital of France?", "key-stored", **SAMPLING)
+    assert cache.save()
+
+    restored = SemanticCache(capacity=16, dim=512, threshold=0.97, index_path=path)
+    assert restored.lookup("what is the capital of france", **SAMPLING) == "key-stored"
@@ -0,0 +1,92 @@
+"""NDJSON export and import between databases that already hold users."""
+import json
+import uuid
+
+import pytest
+from sqlalchemy import delete, select
+
+from database import AsyncSessionLocal
+from database.models import Message as MessageModel, Session as SessionModel, User as UserModel
+from services.session_service import SessionService
+from services.session_transfer import SessionTransfer
+
+
+@pytest.fixture
+def service(db):
+    return SessionService()
+
+
+async def _create_user(username: str) -> str:
+    user_id = str(uuid.uuid4())
+    async with AsyncSessionLocal() as db:
+        db.add(UserModel(user_id=user_id, username=username, password_hash="x", is_admin=False))
+        await db.commit()
+    return user_id
+
+
+async def _stream(dump: list):
+    for chunk in dump:
+        yield chunk
+
+
+async def _wipe(user_id: str):
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(MessageModel).where(MessageModel.user_id == user_id))
+        await db.execute(delete(SessionModel).where(SessionModel.user_id == user_id))
+        await db.execute(delete(UserModel).where(UserModel.user_id == user_id))
+        await db.commit()
+
+
+def test_round_trip_into_an_instance_with_the_same_username(service, run):
+    transfer = SessionTransfer(service, yield_per=100, batch_size=2)
+    username = f"alice-{uuid.uuid4().hex[:8]}"
+
+    async def scenario():
+        exported_id = await _create_user(username)
+        session_id = await service.create_session(exported_id)
+        for i in range(3):
+            await service.add_message(session_id, exported_id, "user", f"message {i}")
+        dump = [chunk async for chunk in transfer.export_ndjson()]
+
+        # The target instance created its own account with that username
+        await _wipe(exported_id)
+        local_id = await _create_user(username)
+
+        summary = await transfer.import_ndjson(_stream(dump))
+        assert summary["sessions"] == 1
+        assert summary["messages"] == 3
+        assert summary["merged_users"] == 1
+
+        async with AsyncSessionLocal() as db:
+            owner = await db.scalar(select(SessionModel.user_id).where(SessionModel.session_id == session_id))
+            authors = set((await db.scalars(
+                select(MessageModel.user_id).where(MessageModel.session_id == session_id)
+            )).all())
+            stray = await db.scalar(select(UserModel.user_id).where(UserModel.user_id == exported_id))
+        assert owner == local_id
+        assert authors == {local_id}
+        assert stray is None
+        assert [s.session_id for s in await service.get_user_sessions(local_id)] == [session_id]
+
+        # Importing again changes nothing
+        again = await transfer.import_ndjson(_stream(dump))
+        assert (again["sessions"], again["messages"]) == (0, 0)
+
+    run(scenario())
+
+
+def test_records_of_unknown_users_are_rejected(service, run):
+    transfer = SessionTransfer(service, yield_per=100, batch_size=10)
+    record = {
+        "type": "session",
+        "session_id": str(uuid.uuid4()),
+        "user_id": str(uuid.uuid4()),
+        "created_at": "2024-01-01T00:00:00",
+        "updated_at": "2024-01-01T00:00:00",
+    }
+
+    async def scenario():
+        with pytest.raises(ValueError, match="not in the import or the database"):
+            await transfer.import_ndjson(_stream([(json.dumps(record) + "\n").encode()]))
+
+    run(scenario())
@@ -0,0 +1,75 @@
+"""Batching streamed tokens into SSE and WebSocket frames."""
+import asyncio
+import json
+import time
+
+import pytest
+
+from utils.sse import SSEWriter, WebSocketWriter
+
+
+async def _tokens(items, delays=None):
+    for i, token in enumerate(items):
+        await asyncio.sleep(delays[i] if delays else 0)
+        yield token
+
+
+def _frames(writer: SSEWriter, tokens, collected=None) -> list:
+    async def collect():
+        return [frame async for frame in writer.frames_from(tokens, collected)]
+    return asyncio.run(collect())
+
+
+def _contents(frames: list) -> list:
+    return [json.loads(frame[len(b"data: "):])["content"] for frame in frames]
+
+
+def test_a_burst_of_tokens_becomes_one_frame():
+    writer = SSEWriter(flush_ms=50, flush_chars=1000)
+    collected = []
+    frames = _frames(writer, _tokens(["Hel", "lo", "", ", ", "world"]), collected)
+    assert _contents(frames) == ["Hello, world"]
+    assert collected == ["Hel", "lo", ", ", "world"]
+    assert (writer.frames, writer.bytes) == (1, len(frames[0]))
+
+
+def test_frames_are_flushed_at_flush_chars():
+    writer = SSEWriter(flush_ms=1000, flush_chars=10)
+    contents = _contents(_frames(writer, _tokens(["abcd"] * 10)))
+    assert "".join(contents) == "abcd" * 10
+    assert len(contents) > 1
+    assert all(len(content) >= 10 for content in contents[:-1])
+
+
+def test_a_stalled_stream_is_flushed_on_time():
+    writer = SSEWriter(flush_ms=20, flush_chars=1000)
+    arrivals = []
+
+    async def collect():
+        start = time.perf_counter()
+        async for frame in writer.frames_from(_tokens(["first", "second"], delays=[0, 0.3])):
+            arrivals.append(time.perf_counter() - start)
+        return writer.frames
+
+    assert asyncio.run(collect()) == 2
+    assert arrivals[0] < 0.2
+
+
+def test_zero_flush_ms_sends_every_token():
+    writer = SSEWriter(flush_ms=0, flush_chars=1000)
+    assert _contents(_frames(writer, _tokens(["a", "b", "c"]))) == ["a", "b", "c"]
+
+
+def test_stream_errors_propagate():
+    async def failing():
+        yield "partial"
+        raise RuntimeError("engine failed")
+
+    with pytest.raises(RuntimeError, match="engine failed"):
+        _frames(SSEWriter(flush_ms=50, flush_chars=1000), failing())
+
+
+def test_websocket_frames_are_tagged_with_the_message_id():
+    writer = WebSocketWriter(flush_ms=50, flush_chars=1000, message_id="m1")
+    frames = _frames(writer, _tokens(["Hi", "!"]))
+    assert [json.loads(frame) for frame in frames] == [{"type": "token", "content": "Hi!", "message_id": "m1"}]
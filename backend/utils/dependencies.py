@@ -1,5 +1,5 @@
 """FastAPI dependencies for authentication and authorization."""
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Annotated
 from schemas.auth import TokenPayload
@@ -10,6 +10,9 @@ session_service = None
 cache_manager = None
 inference_service = None
 monitoring_service = None
+summarizer = None  # Only set when SUMMARY_ENABLED
+retention_purger = None
+rate_limiter = None  # Only set when RATE_LIMIT_ENABLED
 
 security = HTTPBearer()
 
@@ -41,3 +44,23 @@ async def get_current_admin(
             detail="Admin access required"
         )
     return current_user
+
+
+def rate_limit(route_class: str):
+    """Dependency counting the request against the current user's budget for a route class."""
+    async def check_rate_limit(
+        request: Request,
+        current_user: Annotated[TokenPayload, Depends(get_current_user)]
+    ):
+        if rate_limiter is None:
+            return
+        decision = rate_limiter.check(route_class, current_user.sub)
+        # Copied onto the response by middleware (streaming responses bypass dependency headers)
+        request.state.rate_limit_headers = decision.headers()
+        if not decision.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers=decision.headers(),
+            )
+    return check_rate_limit
@@ -29,7 +29,7 @@ def _estimate_tokens(text: str) -> int:
     """
     return len(text) // 3
 
-def build_prompt(messages: List, system_prompt: str, new_user_prompt: str, max_context_tokens: Optional[int] = None) -> str:
+def build_prompt(messages: List, system_prompt: str, new_user_prompt: str, max_context_tokens: Optional[int] = None, summary: Optional[str] = None) -> str:
     """
     构建提示词，确保系统提示词始终保留
     
@@ -38,6 +38,7 @@ def build_prompt(messages: List, system_prompt: str, new_user_prompt: str, max_c
         system_prompt: 系统提示词（必须保留）
         new_user_prompt: 新的用户输入（必须保留）
         max_context_tokens: 最大上下文 token 数（默认从配置读取）
+        summary: Running summary of older turns, appended to the system prompt
     
     Returns:
         构建好的完整提示词
@@ -47,6 +48,8 @@ def build_prompt(messages: List, system_prompt: str, new_user_prompt: str, max_c
         max_context_tokens = settings.MODEL_N_CTX
     
     # 1. 构建系统提示词和用户输入（必须保留）
+    if summary:
+        system_prompt = f"{system_prompt}\n\nSummary of the conversation so far:\n{summary.strip()}"
     system_part = fmt_chat("system", system_prompt)
     user_part = fmt_chat("user", new_user_prompt.strip())
     assistant_header = "<|start_header_id|>assistant<|end_header_id|>\n"
@@ -96,6 +99,32 @@ def build_prompt(messages: List, system_prompt: str, new_user_prompt: str, max_c
     
     return "".join(parts)
 
+SUMMARY_INSTRUCTIONS = (
+    "Summarize the conversation below in a few sentences. Keep names, facts, decisions "
+    "and open questions the assistant may need later. Reply with the summary only."
+)
+
+
+def build_summary_prompt(previous_summary: Optional[str], messages: List, max_message_chars: int = 1000) -> str:
+    """
+    Build the prompt that folds older messages into the running conversation summary.
+
+    Each message is truncated to max_message_chars so the prompt size stays bounded.
+    """
+    lines = []
+    if previous_summary:
+        lines.append(f"Summary so far:\n{previous_summary.strip()}\n")
+    lines.append("Conversation:")
+    for msg in messages:
+        content = (msg.content or "").strip()[:max_message_chars]
+        lines.append(f"{msg.role.capitalize()}: {content}")
+
+    return (
+        fmt_chat("system", SUMMARY_INSTRUCTIONS)
+        + fmt_chat("user", "\n".join(lines))
+        + "<|start_header_id|>assistant<|end_header_id|>\n"
+    )
+
 def build_cache_key(user_id: str, session_id: str, prompt: str, prev_response: str | None = None) -> str:
     """
     Build cache key for LLM responses.
@@ -0,0 +1,139 @@
+"""Server-sent event framing for token streams, batching tokens into fewer frames."""
+from typing import AsyncIterator, Optional
+import asyncio
+import json
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def encode_json(payload: dict) -> bytes:
+    """Compact JSON encoding, using orjson when installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+class SSEWriter:
+    """
+    Encodes one streamed response as SSE frames.
+
+    Tokens are buffered and sent as a single frame once flush_ms has passed since the
+    first buffered token or the buffered text reaches flush_chars. A slow next token does
+    not hold the buffer back past flush_ms (unless producing it blocks the event loop).
+    With flush_ms of 0 every token gets its own frame. Counts frames and bytes written.
+    """
+
+    def __init__(self, flush_ms: int, flush_chars: int):
+        """Initialize writer with its batching window and size threshold."""
+        self.flush_seconds = flush_ms / 1000
+        self.flush_chars = flush_chars
+        self._buffer: list[str] = []
+        self._buffered_chars = 0
+
+        # Per-response statistics
+        self.frames = 0
+        self.bytes = 0
+
+    def encode(self, payload: dict) -> bytes:
+        """Encode one event as an SSE frame."""
+        return b"data: " + encode_json(payload) + b"\n\n"
+
+    def event(self, payload: dict) -> bytes:
+        """Encode one event and count it."""
+        frame = self.encode(payload)
+        self.frames += 1
+        self.bytes += len(frame)
+        return frame
+
+    def flush(self) -> Optional[bytes]:
+        """Frame the buffered tokens, if any."""
+        if not self._buffer:
+            return None
+        content = "".join(self._buffer)
+        self._buffer.clear()
+        self._buffered_chars = 0
+        return self.event({"type": "token", "content": content})
+
+    def _add(self, token: str) -> Optional[bytes]:
+        self._buffer.append(token)
+        self._buffered_chars += len(token)
+        if self.flush_seconds <= 0 or self._buffered_chars >= self.flush_chars:
+            return self.flush()
+        return None
+
+    async def frames_from(self, tokens: AsyncIterator[str], collected: Optional[list] = None) -> AsyncIterator[bytes]:
+        """
+        Frame an async token stream. Tokens are also appended to collected, if given.
+
+        One task consumes the tokens into the buffer, and a timer armed on the first
+        buffered token wakes this generator to flush it, so a stalled stream is still
+        flushed on time. Wakeups happen per frame, not per token.
+        """
+        if self.flush_seconds <= 0:
+            async for token in tokens:
+                if token:
+                    if collected is not None:
+                        collected.append(token)
+                    yield self.event({"type": "token", "content": token})
+            return
+
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        timer: Optional[asyncio.TimerHandle] = None
+
+        async def consume():
+            nonlocal timer
+            try:
+                async for token in tokens:
+                    if not token:
+                        continue
+                    if collected is not None:
+                        collected.append(token)
+                    if not self._buffer:
+                        timer = loop.call_later(self.flush_seconds, ready.set)
+                    self._buffer.append(token)
+                    self._buffered_chars += len(token)
+                    if self._buffered_chars >= self.flush_chars:
+                        ready.set()
+            finally:
+                ready.set()
+
+        consumer = asyncio.ensure_future(consume())
+        try:
+            while not consumer.done():
+                await ready.wait()
+                ready.clear()
+                if timer is not None:
+                    timer.cancel()
+                    timer = None
+                if consumer.done():
+                    break
+                frame = self.flush()
+                if frame is not None:
+                    yield frame
+            consumer.result()
+        finally:
+            if timer is not None:
+                timer.cancel()
+            consumer.cancel()
+
+        frame = self.flush()
+        if frame is not None:
+            yield frame
+
+
+class WebSocketWriter(SSEWriter):
+    """SSEWriter for one generation on a multiplexed WebSocket: each frame is a bare JSON message tagged with its message_id."""
+
+    def __init__(self, flush_ms: int, flush_chars: int, message_id: str):
+        """Initialize writer for the generation with the given message id."""
+        super().__init__(flush_ms, flush_chars)
+        self.message_id = message_id
+
+    def encode(self, payload: dict) -> bytes:
+        """Encode one event as a JSON message."""
+        return encode_json({**payload, "message_id": self.message_id})
@@ -0,0 +1,44 @@
+/**
+ * Logout API Route (BFF Layer)
+ *
+ * Proxies logout requests to the FastAPI backend, which revokes the access token.
+ */
+import { NextRequest, NextResponse } from 'next/server'
+
+const BACKEND_URL = process.env.BACKEND_API_URL || process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'
+
+export async function POST(request: NextRequest) {
+  try {
+    // Get authorization header from request
+    const authHeader = request.headers.get('authorization')
+
+    if (!authHeader) {
+      return NextResponse.json(
+        { detail: 'Not authenticated' },
+        { status: 401 }
+      )
+    }
+
+    // Forward request to FastAPI backend
+    const response = await fetch(`${BACKEND_URL}/auth/logout`, {
+      method: 'POST',
+      headers: {
+        'Authorization': authHeader,
+      },
+    })
+
+    const data = await response.json()
+
+    if (!response.ok) {
+      return NextResponse.json(data, { status: response.status })
+    }
+
+    return NextResponse.json(data, { status: 200 })
+  } catch (error) {
+    console.error('Logout API error:', error)
+    return NextResponse.json(
+      { detail: 'Internal server error' },
+      { status: 500 }
+    )
+  }
+}
@@ -22,8 +22,9 @@ export async function GET(
       )
     }
 
-    // Forward request to FastAPI backend
-    const response = await fetch(`${BACKEND_URL}/chat/history/${params.sessionId}`, {
+    // Forward request (including pagination params) to FastAPI backend
+    const query = request.nextUrl.searchParams.toString()
+    const response = await fetch(`${BACKEND_URL}/chat/history/${params.sessionId}${query ? `?${query}` : ''}`, {
       headers: {
         'Authorization': authHeader,
       },
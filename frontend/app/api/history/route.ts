@@ -19,8 +19,9 @@ export async function GET(request: NextRequest) {
       )
     }
 
-    // Forward request to FastAPI backend
-    const response = await fetch(`${BACKEND_URL}/chat/history`, {
+    // Forward request (including pagination params) to FastAPI backend
+    const query = request.nextUrl.searchParams.toString()
+    const response = await fetch(`${BACKEND_URL}/chat/history${query ? `?${query}` : ''}`, {
       method: 'GET',
       headers: {
         'Authorization': authHeader,
@@ -0,0 +1,45 @@
+/**
+ * Search API Route (BFF Layer)
+ *
+ * Proxies chat history search requests to the FastAPI backend.
+ */
+import { NextRequest, NextResponse } from 'next/server'
+
+const BACKEND_URL = process.env.BACKEND_API_URL || process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'
+
+export async function GET(request: NextRequest) {
+  try {
+    // Get authorization header from request
+    const authHeader = request.headers.get('authorization')
+
+    if (!authHeader) {
+      return NextResponse.json(
+        { detail: 'Not authenticated' },
+        { status: 401 }
+      )
+    }
+
+    // Forward request (query and pagination params) to FastAPI backend
+    const query = request.nextUrl.searchParams.toString()
+    const response = await fetch(`${BACKEND_URL}/chat/search${query ? `?${query}` : ''}`, {
+      method: 'GET',
+      headers: {
+        'Authorization': authHeader,
+      },
+    })
+
+    const data = await response.json()
+
+    if (!response.ok) {
+      return NextResponse.json(data, { status: response.status })
+    }
+
+    return NextResponse.json(data, { status: 200 })
+  } catch (error) {
+    console.error('Search API error:', error)
+    return NextResponse.json(
+      { detail: 'Internal server error' },
+      { status: 500 }
+    )
+  }
+}
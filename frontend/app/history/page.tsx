@@ -30,6 +30,16 @@ interface ChatSession {
   updated_at: string
 }
 
+interface SessionSummary {
+  session_id: string
+  user_id: string
+  created_at: string
+  updated_at: string
+  message_count: number
+  title?: string | null
+  last_message_preview?: string | null
+}
+
 // Parse backend timestamps (typically UTC without timezone) safely as UTC.
 const parseTimestamp = (value?: string | Date): Date | null => {
   if (!value) return null
@@ -43,7 +53,9 @@ export default function HistoryPage() {
   const { isAuthenticated, isLoading: authLoading } = useAuth()
   const { loadSession } = useChatContext()
   const router = useRouter()
-  const [sessions, setSessions] = useState<ChatSession[]>([])
+  const [sessions, setSessions] = useState<SessionSummary[]>([])
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [isLoadingMore, setIsLoadingMore] = useState(false)
   const [isLoading, setIsLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
   const [selectedSession, setSelectedSession] = useState<ChatSession | null>(null)
@@ -87,7 +99,8 @@ export default function HistoryPage() {
       }
 
       const data = await response.json()
-      setSessions(data)
+      setSessions(data.sessions || [])
+      setNextCursor(data.next_cursor || null)
     } catch (err) {
       setError(err instanceof Error ? err.message : 'An error occurred')
     } finally {
@@ -95,6 +108,32 @@ export default function HistoryPage() {
     }
   }
 
+  const fetchMoreSessions = async () => {
+    if (!nextCursor) return
+
+    try {
+      setIsLoadingMore(true)
+      const token = localStorage.getItem('auth_token')
+      const response = await fetch(`/api/history?cursor=${encodeURIComponent(nextCursor)}`, {
+        headers: {
+          'Authorization': `Bearer ${token}`,
+        },
+      })
+
+      if (!response.ok) {
+        throw new Error('Failed to fetch sessions')
+      }
+
+      const data = await response.json()
+      setSessions(prev => [...prev, ...(data.sessions || [])])
+      setNextCursor(data.next_cursor || null)
+    } catch (err) {
+      setError(err instanceof Error ? err.message : 'An error occurred')
+    } finally {
+      setIsLoadingMore(false)
+    }
+  }
+
   const fetchSessionDetails = async (sessionId: string) => {
     try {
       const token = localStorage.getItem('auth_token')
@@ -161,8 +200,7 @@ export default function HistoryPage() {
   const filteredSessions = sessions.filter(session => {
     if (!searchQuery) return true
 
-    const firstUserMessage = session.messages.find(msg => msg.role === 'user')
-    const title = firstUserMessage?.content.toLowerCase() || ''
+    const title = session.title?.toLowerCase() || ''
 
     return title.includes(searchQuery.toLowerCase())
   })
@@ -284,9 +322,8 @@ export default function HistoryPage() {
                 ) : (
                   <div className="space-y-2 max-h-[calc(100vh-280px)] overflow-y-auto">
                     {filteredSessions.map((session) => {
-                      const firstUserMessage = session.messages.find(msg => msg.role === 'user')
-                      const title = firstUserMessage
-                        ? firstUserMessage.content.slice(0, 50) + (firstUserMessage.content.length > 50 ? '...' : '')
+                      const title = session.title
+                        ? session.title.slice(0, 50) + (session.title.length > 50 ? '...' : '')
                         : 'New Conversation'
 
                       const updatedAt = parseTimestamp(session.updated_at) || new Date()
@@ -327,7 +364,7 @@ export default function HistoryPage() {
                                 {title}
                               </p>
                               <p className="text-sm mt-1" style={{ color: '#64748B' }}>
-                                {session.messages.length} messages
+                                {session.message_count} messages
                               </p>
                               <p className="text-xs mt-1" style={{ color: '#94A3B8' }}>
                                 {timeAgo}
@@ -342,6 +379,16 @@ export default function HistoryPage() {
                         </div>
                       )
                     })}
+                    {nextCursor && !searchQuery && (
+                      <button
+                        onClick={fetchMoreSessions}
+                        disabled={isLoadingMore}
+                        className="w-full py-2 text-sm font-medium rounded-lg transition-colors"
+                        style={{ color: '#4A90E2', border: '1px solid #E2E8F0' }}
+                      >
+                        {isLoadingMore ? 'Loading...' : 'Load more'}
+                      </button>
+                    )}
                   </div>
                 )}
               </div>
@@ -93,9 +93,14 @@ export function AuthProvider({ children }: { children: ReactNode }) {
   }
 
   const logout = () => {
-    // Best-effort backend logout (ignore errors)
+    // Best-effort backend logout, revoking the token (ignore errors)
     try {
-      fetch('/api/auth/logout', { method: 'POST' }).catch(() => {})
+      if (token) {
+        fetch('/api/auth/logout', {
+          method: 'POST',
+          headers: { 'Authorization': `Bearer ${token}` },
+        }).catch(() => {})
+      }
     } catch {}
 
     // Clear in-memory state
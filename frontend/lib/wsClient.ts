@@ -5,7 +5,7 @@
  */
 
 export interface WebSocketMessage {
-  type: 'start' | 'token' | 'done' | 'error' | 'ping' | 'pong'
+  type: 'start' | 'token' | 'done' | 'error' | 'cancelled' | 'ping' | 'pong'
   content?: string
   session_id?: string
   message_id?: string
@@ -16,9 +16,11 @@ export interface WebSocketMessage {
 export interface ChatMessage {
   type: 'chat'
   prompt: string
+  message_id?: string  // Tags every frame of this generation; several may run at once
   session_id?: string
   max_tokens?: number
   temperature?: number
+  priority?: 'interactive' | 'batch'
 }
 
 type MessageHandler = (message: WebSocketMessage) => void
@@ -94,6 +96,11 @@ export class WebSocketClient {
     this.ws.send(JSON.stringify(message))
   }
 
+  cancel(messageId: string): void {
+    if (!this.ws || this.ws.readyState !== WebSocket.OPEN) return
+    this.ws.send(JSON.stringify({ type: 'cancel', message_id: messageId }))
+  }
+
   ping(): void {
     if (!this.ws || this.ws.readyState !== WebSocket.OPEN) return
     this.ws.send(JSON.stringify({ type: 'ping' }))